@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+import asyncio
 from typing import List, Dict, Any
 from app.core.beckn_client import transaction_store
+from app.core.audit_log import audit_journal
+from app.models.beckn import BecknTransaction
 
 router = APIRouter()
 
+def _lookup_archived(obp_id: str):
+    return audit_journal.lookup(obp_id) or audit_journal.lookup(obp_id.replace("OBP-", ""))
+
+@router.get("/stats")
+async def get_store_stats():
+    """Resident size, budgets and eviction counters of the transaction store, plus journal counters"""
+    return {**transaction_store.stats(), "journal": audit_journal.stats()}
+
 @router.get("/recent")
-async def get_recent_transactions():
-    """Get all recent transactions for aggregated audit view"""
+async def get_recent_transactions(limit: int = Query(50, ge=1, le=1000)):
+    """Get the most recent transactions (newest first) for aggregated audit view"""
     all_logs = []
     
-    # Get all transactions from the store
-    for txn in transaction_store.values():
+    # Newest transactions from the created_at index
+    for txn in transaction_store.recent(limit):
         entries = []
         
         # Build entries from history
@@ -46,16 +57,20 @@ async def get_audit_log(obp_id: str):
     # Frontend sends "OBP-<uuid>" which might be the transaction ID if OBP ID is missing
     target_txn = None
     
-    # 1. Search by OBP ID (exact match)
-    for txn in transaction_store.values():
-        if txn.obp_id == obp_id:
-            target_txn = txn
-            break
+    # 1. Search by OBP ID (exact match, includes per-provider OBP IDs)
+    target_txn = transaction_store.by_obp_id(obp_id)
             
     # 2. If not found, check if obp_id is actually a transaction ID (or "OBP-<txn_id>")
     if not target_txn:
         clean_id = obp_id.replace("OBP-", "")
         target_txn = transaction_store.get(clean_id)
+    
+    # 3. Evicted from memory: read the archived snapshot from the journal
+    if not target_txn:
+        # Disk reads (and a short wait for queued archive records) stay off the event loop
+        record = await asyncio.to_thread(_lookup_archived, obp_id)
+        if record is not None:
+            target_txn = BecknTransaction.model_validate(record)
         
     if not target_txn:
         # Return empty/mock if not found (or 404, but frontend might prefer empty)
@@ -4,14 +4,100 @@ Beckn Protocol Callback Endpoints for FLUXEON.
 Handles asynchronous responses from the Beckn network.
 """
 from fastapi import APIRouter, Request, HTTPException
-from typing import Dict, Any
+from fastapi.routing import APIRoute
+from typing import Callable, Dict, Any, Optional
+import asyncio
 import logging
+import time
 from datetime import datetime
 from app.models.beckn import TransactionStatus
+from app.core.beckn_utils import extract_provider_id
+from app.core import metrics
+from app.core.tracing import tracer
 
-router = APIRouter()
+
+class TimedCallbackRoute(APIRoute):
+    """
+    Records each callback's handling time in fluxeon_beckn_callback_ms{action}
+    and, for transactions being traced, a callback.<action> span.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        action = self.path.rsplit("/", 1)[-1]  # e.g. "on_search"
+        histogram = metrics.beckn_callback_ms.labels(action=action)
+
+        async def timed_handler(request: Request):
+            start = time.perf_counter()
+            try:
+                # request.json() is cached, the endpoint doesn't parse the body twice
+                payload = await request.json()
+                transaction_id = payload.get("context", {}).get("transaction_id")
+            except Exception:
+                payload, transaction_id = None, None
+            if transaction_id not in tracer.active:
+                transaction_id = None  # Not one of ours (or already finished): don't start a trace
+            try:
+                with tracer.span(transaction_id, f"callback.{action}") as span:
+                    response = await handler(request)
+                    if span is not None:
+                        span.set(
+                            provider_id=extract_provider_id(payload),
+                            payload_bytes=len(await request.body()),
+                            http_status=response.status_code
+                        )
+                    return response
+            finally:
+                histogram.record((time.perf_counter() - start) * 1000)
+
+        return timed_handler
+
+
+router = APIRouter(route_class=TimedCallbackRoute)
 logger = logging.getLogger(__name__)
 
+# Returned by _record_provider_callback
+UNKNOWN, TRANSACTION, ALLOCATION = "unknown", "transaction", "allocation"
+
+
+def _record_provider_callback(transaction_id: str, provider_id: Optional[str], status: TransactionStatus, **fields) -> str:
+    """
+    Records an ON_SELECT/ON_INIT/ON_CONFIRM (runs inside transaction_store.submit).
+    Multi-provider orders: only the provider's allocation moves, run_agent
+    settles the transaction status once every provider flow is done.
+    Single-provider transactions (no allocations): the transaction itself.
+    Returns ALLOCATION, TRANSACTION or UNKNOWN (unknown transaction or provider).
+    """
+    from app.core.beckn_client import transaction_store
+
+    transaction = transaction_store.get(transaction_id)
+    if transaction is None:
+        return UNKNOWN
+    if transaction.allocations:
+        if transaction_store.update_allocation(transaction_id, provider_id, status=status.value, **fields) is None:
+            logger.warning(f"⚠ {status.value} from {provider_id}, not allocated in {transaction_id}")
+            return UNKNOWN
+        # Each provider has its own OBP ID, the transaction keeps the first one
+        if fields.get("obp_id") and not transaction.obp_id:
+            transaction_store.set_obp_id(transaction_id, fields["obp_id"])
+        return ALLOCATION
+    if "obp_id" in fields:
+        transaction_store.set_obp_id(transaction_id, fields.pop("obp_id"))
+    if fields:
+        transaction_store.update(transaction_id, **fields)
+    transaction_store.set_status(transaction_id, status)
+    return TRANSACTION
+
+
+def _notify_provider_callback(transaction_id: str, status: TransactionStatus, provider_id: Optional[str], level: str):
+    """Wakes the waiters of whatever _record_provider_callback updated."""
+    from app.core.beckn_client import notify_status
+
+    if level == ALLOCATION:
+        notify_status(transaction_id, status, provider_id)
+    elif level == TRANSACTION:
+        notify_status(transaction_id, status)
+
 # ============================================================================
 # BECKN CALLBACK ENDPOINTS
 # These endpoints receive asynchronous responses from the Beckn Gateway
@@ -30,18 +116,22 @@ async def on_search_callback(request: Request):
         transaction_id = payload.get("context", {}).get("transaction_id")
         
         # Import transaction store from beckn_client
-        from app.core.beckn_client import transaction_store, store_lock
+        from app.core.beckn_client import transaction_store, notify_status
         
         # Extract catalog
         catalog = payload.get("message", {}).get("catalog", {})
         providers = catalog.get("providers", [])
         
-        # Update transaction store
-        async with store_lock:
-            if transaction_id in transaction_store:
-                transaction_store[transaction_id].response_payload = payload
-                transaction_store[transaction_id].status = TransactionStatus.SEARCH_RECEIVED
-                logger.info(f"✓ Updated transaction {transaction_id}: {len(providers)} providers")
+        # Update transaction store (off the event loop for the SQLite backend)
+        def record() -> bool:
+            if not transaction_store.set_response(transaction_id, payload):
+                return False
+            transaction_store.set_status(transaction_id, TransactionStatus.SEARCH_RECEIVED)
+            return True
+
+        if await transaction_store.submit(record):
+            logger.info(f"✓ Updated transaction {transaction_id}: {len(providers)} providers")
+        notify_status(transaction_id, TransactionStatus.SEARCH_RECEIVED)
         
         # TODO: DEMO METRICS - Timestamp returned here is displayed in BecknTimeline.tsx
         # For demo, can inject specific timestamps to show exact timing (e.g., T+0ms, T+120ms, T+250ms, T+345ms)
@@ -63,18 +153,20 @@ async def on_select_callback(request: Request):
         
         transaction_id = payload.get("context", {}).get("transaction_id")
         
-        from app.core.beckn_client import transaction_store, store_lock
+        from app.core.beckn_client import transaction_store
         
         # Extract quote
         quote = payload.get("message", {}).get("order", {}).get("quote", {})
         price = float(quote.get("price", {}).get("value", 0))
+        provider_id = extract_provider_id(payload)
         
-        # Update transaction
-        async with store_lock:
-            if transaction_id in transaction_store:
-                transaction_store[transaction_id].quoted_price = price
-                transaction_store[transaction_id].status = TransactionStatus.SELECT_RECEIVED
-                logger.info(f"✓ Quote received: {price}")
+        # Update the provider's allocation (multi-provider orders) or the transaction
+        level = await transaction_store.submit(
+            _record_provider_callback, transaction_id, provider_id, TransactionStatus.SELECT_RECEIVED, quoted_price=price
+        )
+        if level != UNKNOWN:
+            logger.info(f"✓ Quote received: {price}")
+        _notify_provider_callback(transaction_id, TransactionStatus.SELECT_RECEIVED, provider_id, level)
         
         return {"message": "ACK", "timestamp": datetime.utcnow().isoformat()}
     except Exception as e:
@@ -94,13 +186,16 @@ async def on_init_callback(request: Request):
         
         transaction_id = payload.get("context", {}).get("transaction_id")
         
-        from app.core.beckn_client import transaction_store, store_lock
+        from app.core.beckn_client import transaction_store
+        provider_id = extract_provider_id(payload)
         
-        # Update transaction
-        async with store_lock:
-            if transaction_id in transaction_store:
-                transaction_store[transaction_id].status = TransactionStatus.INIT_RECEIVED
-                logger.info(f"✓ Order initialized")
+        # Update the provider's allocation (multi-provider orders) or the transaction
+        level = await transaction_store.submit(
+            _record_provider_callback, transaction_id, provider_id, TransactionStatus.INIT_RECEIVED
+        )
+        if level != UNKNOWN:
+            logger.info(f"✓ Order initialized")
+        _notify_provider_callback(transaction_id, TransactionStatus.INIT_RECEIVED, provider_id, level)
         
         return {"message": "ACK", "timestamp": datetime.utcnow().isoformat()}
     except Exception as e:
@@ -120,18 +215,26 @@ async def on_confirm_callback(request: Request):
         
         transaction_id = payload.get("context", {}).get("transaction_id")
         
-        from app.core.beckn_client import transaction_store, store_lock
+        from app.core.beckn_client import transaction_store
         
         # Extract OBP ID (Order/Booking/Payment ID) - CRITICAL for P444
         order_id = payload.get("message", {}).get("order", {}).get("id")
+        provider_id = extract_provider_id(payload)
         
-        # Update transaction with OBP ID
-        async with store_lock:
-            if transaction_id in transaction_store:
-                transaction_store[transaction_id].obp_id = order_id
-                transaction_store[transaction_id].status = TransactionStatus.CONFIRMED
+        # Record the OBP ID (indexed for /audit/{obp_id}) on the allocation or the transaction
+        level = await transaction_store.submit(
+            _record_provider_callback, transaction_id, provider_id, TransactionStatus.CONFIRMED, obp_id=order_id
+        )
+        if level != UNKNOWN:
+            if level == ALLOCATION:
+                logger.info(f"✓ {provider_id} confirmed. OBP ID: {order_id}")
+            else:
                 logger.info(f"✓ ORDER CONFIRMED! OBP ID: {order_id}")
-                # TODO: Persist to audit log for P444 compliance
+            # P444: the OBP ID must be on disk before the confirmation is acknowledged
+            # (journal fsync in memory, batch commit in SQLite)
+            if not await asyncio.to_thread(transaction_store.flush, 5.0):
+                logger.error(f"✗ Transaction store not durable for OBP ID {order_id}")
+        _notify_provider_callback(transaction_id, TransactionStatus.CONFIRMED, provider_id, level)
         
         return {"message": "ACK", "timestamp": datetime.utcnow().isoformat()}
     except Exception as e:
@@ -147,7 +250,9 @@ async def on_status_callback(request: Request):
     """
     try:
         payload = await request.json()
-        logger.info(f"Received ON_STATUS callback: {payload}")
+        # Whole payloads only at DEBUG, formatted lazily: big catalogs/orders cost loop time
+        logger.info("Received ON_STATUS callback for %s", payload.get("context", {}).get("transaction_id"))
+        logger.debug("ON_STATUS payload: %s", payload)
         
         # TODO: Update transaction status in database
         # TODO: Update dashboard with real-time progress
@@ -166,7 +271,9 @@ async def on_update_callback(request: Request):
     """
     try:
         payload = await request.json()
-        logger.info(f"Received ON_UPDATE callback: {payload}")
+        # Whole payloads only at DEBUG, formatted lazily: big catalogs/orders cost loop time
+        logger.info("Received ON_UPDATE callback for %s", payload.get("context", {}).get("transaction_id"))
+        logger.debug("ON_UPDATE payload: %s", payload)
         
         # TODO: Process updates
         # TODO: Notify operator of changes
@@ -185,7 +292,9 @@ async def on_cancel_callback(request: Request):
     """
     try:
         payload = await request.json()
-        logger.info(f"Received ON_CANCEL callback: {payload}")
+        # Whole payloads only at DEBUG, formatted lazily: big catalogs/orders cost loop time
+        logger.info("Received ON_CANCEL callback for %s", payload.get("context", {}).get("transaction_id"))
+        logger.debug("ON_CANCEL payload: %s", payload)
         
         # TODO: Update transaction status to CANCELLED
         # TODO: Trigger fallback procedures
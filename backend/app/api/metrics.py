@@ -0,0 +1,43 @@
+from datetime import datetime
+from fastapi import APIRouter, Query, Response
+from app.core.metrics import registry, stats_samples
+from app.core.beckn_client import transaction_store
+from app.core.audit_log import audit_journal
+from app.core.orchestrator import orchestrator
+from app.core.stream import feeder_stream
+from app.core.telemetry import telemetry_ticker
+from app.core.loop_monitor import loop_monitor
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _telemetry_samples():
+    snapshot = telemetry_ticker.snapshot
+    if snapshot is None:
+        return []
+    return [
+        ("snapshot_age_seconds", {}, (datetime.now() - snapshot.generated_at).total_seconds()),
+        ("snapshot_sequence", {}, snapshot.sequence),
+        ("running", {}, int(telemetry_ticker.running)),
+    ]
+
+
+# Component stats, read at scrape time
+registry.collector("fluxeon_store", lambda: stats_samples(transaction_store.stats(), {"by_status": "status"}))
+registry.collector("fluxeon_journal", lambda: stats_samples(audit_journal.stats()))
+registry.collector("fluxeon_orchestrator", lambda: stats_samples(orchestrator.stats()))
+registry.collector("fluxeon_stream", lambda: stats_samples(feeder_stream.broadcaster.stats()))
+registry.collector("fluxeon_telemetry", _telemetry_samples)
+registry.collector("fluxeon_loop_monitor", lambda: stats_samples(loop_monitor.stats()))
+
+@router.get("")
+def prometheus_metrics():
+    """Prometheus text exposition: per-stage Beckn latency (p50/p90/p99/p99.9), inference time, snapshot age, component stats"""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/blocking")
+def blocking_reports(limit: int = Query(20, ge=1, le=100)):
+    """Latest event loop stalls with the stack that was running on the loop (newest first)"""
+    return {**loop_monitor.stats(), "reports": loop_monitor.recent(limit)}
@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from typing import List
+from app.core.orchestrator import orchestrator
+from app.models.events import FlexibilityRequest
+
+router = APIRouter()
+
+@router.get("/stats")
+def orchestrator_stats():
+    """Worker pool, queue depth and in-flight flow counts"""
+    return orchestrator.stats()
+
+@router.post("/flows")
+async def dispatch_flows(requests: List[FlexibilityRequest]):
+    """
+    Queues one Beckn flow per request (highest risk first).
+    Requests for a feeder/window that already has a flow are deduplicated.
+    """
+    deduplicated_before = orchestrator.deduplicated
+    for req in requests:
+        orchestrator.submit(
+            feeder_id=req.feeder_id,
+            risk_level=req.risk_level,
+            flexibility_kw=req.flexibility_kw,
+            window_start=req.window_start,
+            window_end=req.window_end
+        )
+    deduplicated = orchestrator.deduplicated - deduplicated_before
+    return {
+        "queued": len(requests) - deduplicated,
+        "deduplicated": deduplicated,
+        "stats": orchestrator.stats()
+    }
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+from app.core.stream import feeder_stream, encode_event, KEEPALIVE
+
+router = APIRouter()
+
+KEEPALIVE_S = 15.0  # Comment frame interval so proxies keep idle streams open
+
+@router.get("/feeders")
+async def stream_feeders(request: Request):
+    """
+    Server-Sent Events stream of feeder updates.
+    Starts with a full `snapshot` event, then one `delta` event per telemetry tick
+    (changed risk levels, new load points, new audit entries). A client that falls
+    behind receives a fresh `snapshot` instead of the deltas it missed.
+    """
+    subscription = feeder_stream.broadcaster.subscribe()
+
+    async def events():
+        try:
+            state = feeder_stream.full_state()
+            yield encode_event("snapshot", state, state["sequence"])
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    frame = KEEPALIVE
+                yield frame
+        finally:
+            feeder_stream.broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+def stream_stats():
+    """Subscriber and fan-out counters of the feeder stream."""
+    return feeder_stream.broadcaster.stats()
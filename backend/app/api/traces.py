@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from app.core.tracing import tracer
+
+router = APIRouter()
+
+@router.get("")
+async def get_recent_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: float = Query(0.0, ge=0)
+):
+    """Finished Beckn flow traces (newest first); min_duration_ms keeps only the slow ones"""
+    return {
+        **tracer.stats(),
+        "traces": [trace.summary() for trace in tracer.recent(limit, min_duration_ms)]
+    }
+
+@router.get("/export")
+async def export_traces():
+    """Every trace in the ring buffer with all its spans, as a JSON download"""
+    return JSONResponse(
+        content=tracer.export(),
+        headers={"Content-Disposition": 'attachment; filename="fluxeon-traces.json"'}
+    )
+
+@router.get("/{trace_id}")
+async def get_trace(trace_id: str):
+    """Span breakdown of one transaction (in progress or finished)"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"No trace for {trace_id}")
+    return trace.to_dict()
@@ -12,54 +12,17 @@ from sklearn.utils import resample
 # Import simulator from the app module (adjust path if running as script)
 try:
     from app.core.simulator import grid_sim
+    from app.core.features import prepare_features, LAG_WINDOW
 except ImportError:
     import sys
     # Add backend directory to path
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     from app.core.simulator import grid_sim
+    from app.core.features import prepare_features, LAG_WINDOW
 
 # --- CONFIGURATION ---
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '../../data/models/flux_model.pkl')
 SCALER_PATH = os.path.join(os.path.dirname(__file__), '../../data/models/scaler.pkl')
-LAG_WINDOW = 4  # 1 hour history (4 x 15 mins)
-
-def prepare_features(df):
-    """
-    Phase 1: Fast Feature Extraction.
-    Creates a flattened vector from the last 4 intervals.
-    """
-    X, y = [], []
-    
-    # We need a rolling window of 'LAG_WINDOW'
-    # Features per lag: Load, Temp
-    # Global features: Activity
-    
-    for i in range(LAG_WINDOW, len(df)):
-        window = df.iloc[i-LAG_WINDOW : i]
-        # TARGET: Forecasting (predicting the FUTURE risk)
-        # The simulator now generates RAMP-UP peaks, so the past window contains precursors.
-        target = df.iloc[i]['risk_label']
-        
-        # Feature Vector Construction
-  
-        loads = window['load_kw'].values       # 1. Lagged Loads
-       
-        temps = window['temperature'].values  # 2. Lagged Temps
-
-        # 3. Statistical Features (spike if > 100%)
-        rms = np.sqrt(np.mean(loads**2))
-        peak = np.max(loads)
-        kurtosis_proxy = peak / np.mean(loads) if np.mean(loads) > 0 else 0
-        
-        is_workday = 1 if df.iloc[i]['is_workday'] else 0 # 4. Exogenous
-        
-        vector = np.concatenate([loads, temps, [rms, peak, kurtosis_proxy, is_workday]]) # Combine into a single vector
-        # [load_t-4, load_t-3..., temp_t-4..., rms, peak, kurtosis, workday]
-        
-        X.append(vector)
-        y.append(target)
-        
-    return np.array(X), np.array(y)
 
 def train_agent():
     print("FLUXORAX AI Training. Started.")
@@ -69,7 +32,7 @@ def train_agent():
     print(f"Generated {len(df)} samples.")
 
     # 2. Feature Engineering
-    X, y = prepare_features(df)
+    X, y = prepare_features(df, lag_window=LAG_WINDOW)
     
     # --- CLASS BALANCING (Oversampling) ---
     # Convert to DataFrame for easier manipulation
@@ -0,0 +1,395 @@
+# backend/app/core/audit_log.py
+"""
+Durable audit journal for FLUXEON (P444 compliance).
+Every transaction store write (new transaction, status change, OBP ID, history
+entry, allocation, ...) is appended as one record to a segment-rotated,
+append-only journal; replaying the segments in order rebuilds the store after
+a restart. Transactions evicted from memory are written as "archive" records,
+which also serve /audit lookups once they are gone from the store.
+
+Record layout: header (payload length, crc32 of payload, flags) + JSON payload,
+zlib-compressed when large. A writer thread drains appends in batches and
+fsyncs once per batch (group commit), so append() never blocks on disk.
+
+On startup the replayed segments are compacted into one snapshot segment
+(current state of the live transactions + every archive record), so replay
+time follows the store's size rather than the journal's age.
+"""
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.audit import JournalOp, FLAG_COMPRESSED
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct(">IIB")    # length, crc32, flags
+SEGMENT_PATTERN = re.compile(r"^journal-(\d{6,})\.log$")
+
+
+def segment_name(number: int) -> str:
+    return f"journal-{number:06d}.log"
+
+
+def encode_record(record: Dict[str, Any], compress_min_bytes: Optional[int] = None) -> bytes:
+    """Frames one record. Payloads of at least `compress_min_bytes` are zlib-compressed."""
+    payload = json.dumps(record, separators=(",", ":"), default=str).encode()
+    flags = 0
+    if compress_min_bytes is not None and len(payload) >= compress_min_bytes:
+        payload = zlib.compress(payload, 1)
+        flags |= FLAG_COMPRESSED
+    return HEADER.pack(len(payload), zlib.crc32(payload), flags) + payload
+
+
+def read_segment(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (offset, record) for every intact record of a segment.
+    Stops at the first torn or corrupt record (e.g. a crash mid-write).
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        length, crc, flags = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            logger.warning(f"⚠ Journal {os.path.basename(path)}: torn record at offset {offset}, ignoring the rest")
+            return
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+        yield offset, json.loads(bytes(payload))
+        offset = start + length
+    if offset < len(data):
+        logger.warning(f"⚠ Journal {os.path.basename(path)}: truncated header at offset {offset}")
+
+
+def _archive_keys(snapshot: Dict[str, Any]) -> List[str]:
+    """transaction_id plus every OBP ID (own and per-provider) of an archived snapshot."""
+    keys = [snapshot["transaction_id"], snapshot.get("obp_id")]
+    keys += [allocation.get("obp_id") for allocation in snapshot.get("allocations") or ()]
+    return [key for key in keys if key]
+
+# ============================================================================
+# JOURNAL
+# ============================================================================
+
+class AuditJournal:
+    """Append-only, segment-rotated journal with a group-commit writer thread."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        compress_min_bytes: Optional[int] = 1024,
+        fsync: bool = True
+    ):
+        """
+        Args:
+            directory: Where journal-NNNNNN.log segments live
+            segment_bytes: Rotate to a new segment past this size
+            compress_min_bytes: zlib-compress payloads this large (None = never)
+            fsync: fsync each batch (disable only for throwaway journals)
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.fsync = fsync
+        # Counters
+        self.appended = 0            # Records accepted (sequence of the latest append)
+        self.durable = 0             # Records written (and fsynced) to disk
+        self.failed = 0              # Records lost to write errors
+        self.batches = 0
+        self.archived = 0
+        self.replayed = 0
+        self.compacted = 0           # Segments replaced by snapshots
+        # Writer state
+        self._pending: List[Tuple[Dict[str, Any], Optional[List[str]]]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._file = None
+        self._segment: Optional[int] = None      # Segment being written
+        self._segment_size = 0
+        self._first_own_segment: Optional[int] = None
+        self._replayed_upto = 0                  # Segments <= this were already replayed
+        # Archive lookups: key -> (segment, offset)
+        self._locations: Dict[str, Tuple[int, int]] = {}
+
+    # ------------------------------------------------------------------------
+    # WRITES
+    # ------------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any], archive_keys: Optional[List[str]] = None) -> int:
+        """
+        Queues a record for the writer thread and returns its sequence number.
+        Never blocks on disk; use flush() to wait until it is durable.
+        Records must not be mutated after being appended.
+        """
+        with self._cond:
+            if self._thread is None:
+                self._start_writer()
+            self._pending.append((record, archive_keys))
+            self.appended += 1
+            if len(self._pending) == 1:
+                self._cond.notify_all()
+            return self.appended
+
+    def archive(self, transaction) -> None:
+        """Journals the final snapshot of a transaction leaving memory (store spill hook)."""
+        snapshot = transaction.model_dump(mode="json")
+        self.append({"op": JournalOp.ARCHIVE.value, "txn": snapshot}, _archive_keys(snapshot))
+        self.archived += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every record appended so far is on disk. False on timeout or write error."""
+        with self._cond:
+            target, failed = self.appended, self.failed
+            self._cond.wait_for(lambda: self.durable + self.failed >= target or self._thread is None, timeout)
+            return self.durable + failed >= target and self.failed == failed
+
+    def close(self):
+        """Drains pending records, fsyncs and stops the writer. Appending again restarts it."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        thread.join()
+
+    # ------------------------------------------------------------------------
+    # READS
+    # ------------------------------------------------------------------------
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """Existing segments as (number, path), oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields every record journaled by previous runs, oldest first, and indexes
+        archive records for lookup(). Each segment is replayed at most once per
+        process; segments written by this process are skipped.
+        """
+        for number, path in self.segments():
+            if number <= self._replayed_upto:
+                continue
+            if self._first_own_segment is not None and number >= self._first_own_segment:
+                break
+            for offset, record in read_segment(path):
+                if record.get("op") == JournalOp.ARCHIVE.value:
+                    for key in _archive_keys(record["txn"]):
+                        self._locations[key] = (number, offset)
+                self.replayed += 1
+                yield record
+            self._replayed_upto = number
+
+    def lookup(self, key: str, flush_timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Latest archived snapshot for an obp_id (own or per-provider) or transaction_id.
+        Blocking file IO: call it off the event loop (asyncio.to_thread).
+        """
+        # A just-archived record may still be queued: wait for it, but only briefly
+        self.flush(flush_timeout)
+        location = self._locations.get(key)
+        if location is None:
+            return None
+        record = self._read_at(*location)
+        if record is None:
+            logger.error(f"✗ Corrupt archive record for {key} in {segment_name(location[0])}")
+            return None
+        return record["txn"]
+
+    def _read_at(self, number: int, offset: int) -> Optional[Dict[str, Any]]:
+        """One record at a known position; None if it fails its checksum."""
+        with open(os.path.join(self.directory, segment_name(number)), "rb") as f:
+            f.seek(offset)
+            length, crc, flags = HEADER.unpack(f.read(HEADER.size))
+            payload = f.read(length)
+        if zlib.crc32(payload) != crc:
+            return None
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    # ------------------------------------------------------------------------
+    # COMPACTION
+    # ------------------------------------------------------------------------
+
+    def compact(self, live: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Replaces every segment replayed so far with one snapshot segment: the
+        `live` records (one put per resident transaction) followed by the
+        archive record of every archived transaction, so lookups keep working.
+        The snapshot is fsynced and renamed into place before the old segments
+        are deleted; a crash in between only means both get replayed (same state).
+        Only runs before this process has journaled anything. False when skipped.
+        """
+        with self._cond:
+            if self._first_own_segment is not None or self._thread is not None:
+                logger.info("📒 Journal compaction skipped: this process already wrote to the journal")
+                return False
+        replayed = [(number, path) for number, path in self.segments() if number <= self._replayed_upto]
+        if not replayed:
+            return False
+
+        live = list(live)
+        live_ids = {record["txn"]["transaction_id"] for record in live}
+        archived = []
+        for location in sorted(set(self._locations.values())):
+            record = self._read_at(*location)
+            if record is None:
+                logger.error(f"✗ Corrupt archive record in {segment_name(location[0])}, not carried over")
+            elif record["txn"]["transaction_id"] not in live_ids:
+                archived.append(record)
+
+        number = self._replayed_upto + 1
+        path = os.path.join(self.directory, segment_name(number))
+        locations, size = {}, 0
+        with open(path + ".tmp", "wb") as f:
+            for record in live + archived:
+                if record.get("op") == JournalOp.ARCHIVE.value:
+                    for key in _archive_keys(record["txn"]):
+                        locations[key] = (number, size)
+                framed = encode_record(record, self.compress_min_bytes)
+                f.write(framed)
+                size += len(framed)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self._fsync_directory()
+        for _, old in replayed:
+            os.remove(old)
+
+        self._locations = locations
+        self._replayed_upto = number
+        self.compacted += len(replayed)
+        logger.info(
+            f"📒 Compacted {len(replayed)} journal segment(s) into {segment_name(number)} "
+            f"({len(live)} live, {len(archived)} archived, {size / 1024:.0f} KB)"
+        )
+        return True
+
+    def _fsync_directory(self):
+        """Makes renames/creations in the journal directory durable (POSIX only)."""
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segment": self._segment,
+            "segment_bytes": self._segment_size,
+            "appended": self.appended,
+            "durable": self.durable,
+            "failed": self.failed,
+            "pending": self.appended - self.durable - self.failed,
+            "batches": self.batches,
+            "archived": self.archived,
+            "replayed": self.replayed,
+            "compacted": self.compacted,
+        }
+
+    # ------------------------------------------------------------------------
+    # WRITER THREAD
+    # ------------------------------------------------------------------------
+
+    def _start_writer(self):
+        """Called with the lock held."""
+        self._closing = False
+        self._thread = threading.Thread(target=self._writer, name="audit-journal", daemon=True)
+        self._thread.start()
+
+    def _open_segment(self):
+        """Starts a new segment after every existing one (never appends to a possibly torn file)."""
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        existing = self.segments()
+        self._segment = max((existing[-1][0] if existing else 0), self._segment or 0) + 1
+        if self._first_own_segment is None:
+            self._first_own_segment = self._segment
+        self._file = open(os.path.join(self.directory, segment_name(self._segment)), "ab")
+        self._segment_size = 0
+        logger.info(f"📒 Audit journal writing {segment_name(self._segment)}")
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._finish()
+                    return
+            try:
+                locations = self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"✗ Audit journal write failed, {len(batch)} records lost: {e}")
+                with self._cond:
+                    self.failed += len(batch)
+                    self._cond.notify_all()
+                self._segment_size = self.segment_bytes  # Rotate to a fresh segment on the next batch
+                continue
+            with self._cond:
+                self._locations.update(locations)
+                self.durable += len(batch)
+                self.batches += 1
+                self._cond.notify_all()
+
+    def _write_batch(self, batch) -> Dict[str, Tuple[int, int]]:
+        """Frames, writes and fsyncs one batch (group commit). Returns archive locations."""
+        if self._file is None or self._segment_size >= self.segment_bytes:
+            self._open_segment()
+        buffer = bytearray()
+        locations = {}
+        for record, archive_keys in batch:
+            if archive_keys:
+                for key in archive_keys:
+                    locations[key] = (self._segment, self._segment_size + len(buffer))
+            buffer += encode_record(record, self.compress_min_bytes)
+        self._file.write(buffer)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._segment_size += len(buffer)
+        return locations
+
+    def _finish(self):
+        """Closes the segment on shutdown. Called with the lock held."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                logger.error(f"✗ Closing audit journal failed: {e}")
+        self._file = None
+        self._thread = None
+        self._closing = False
+        self._cond.notify_all()
+
+
+# Singleton
+audit_journal = AuditJournal(
+    settings.audit_journal_dir,
+    segment_bytes=settings.audit_journal_segment_bytes,
+    compress_min_bytes=1024 if settings.audit_journal_compress else None,
+    fsync=settings.audit_journal_fsync
+)
@@ -6,25 +6,72 @@ ONIX handles all protocol complexity: signatures, validation, routing.
 """
 import httpx
 import asyncio
+import importlib.util
 import uuid
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 import logging
 
 from app.core.config import settings
 from app.core import beckn_utils
+from app.core.der_market import rank_der_offers, allocate_flexibility
+from app.core import metrics
+from app.core.tracing import tracer
+from app.core.transaction_store import TransactionStore, TransactionStoreBase, find_allocation
+from app.core.sqlite_store import SqliteTransactionStore
+from app.core.audit_log import audit_journal
 from app.models.beckn import BecknTransaction, TransactionStatus, BecknAction
 
 logger = logging.getLogger(__name__)
 
 # ============================================================================
-# IN-MEMORY TRANSACTION STORE
+# TRANSACTION STORE
 # ============================================================================
 
 # Shared transaction store for correlating async request-response pairs
-transaction_store: Dict[str, BecknTransaction] = {}
-store_lock = asyncio.Lock()
+# (indexed by obp_id / feeder_id / status / created_at, see transaction_store.py)
+def create_transaction_store() -> TransactionStoreBase:
+    """Store backend selected by settings.store_backend."""
+    if settings.store_backend == "sqlite":
+        # Shared by every worker; callbacks landing on another worker wake waiters here.
+        # No eviction and no audit journal: the database file is the durable record.
+        return SqliteTransactionStore(
+            settings.store_sqlite_path,
+            commit_interval_s=settings.store_sqlite_commit_ms / 1000,
+            poll_interval_s=settings.store_sqlite_poll_ms / 1000
+        )
+    if settings.store_backend != "memory":
+        raise ValueError(f"Unknown store backend '{settings.store_backend}' (expected 'memory' or 'sqlite')")
+    return TransactionStore(
+        max_entries=settings.store_max_entries,
+        max_bytes=settings.store_max_bytes,
+        spill=audit_journal.archive,  # Evicted transactions are archived first
+        journal=audit_journal,        # Every write is journaled (replayed on startup)
+        compact_journal=settings.audit_journal_compact
+    )
+
+
+transaction_store = create_transaction_store()
+
+# Pending waiters: (transaction_id, status, provider_id or None) -> futures resolved by the webhook routes
+status_waiters: Dict[Tuple[str, TransactionStatus, Optional[str]], Set[asyncio.Future]] = {}
+
+
+def notify_status(transaction_id: str, status: TransactionStatus, provider_id: Optional[str] = None) -> None:
+    """
+    Wakes every wait_for_callback() waiting for this transaction to reach
+    `status`, or with provider_id, for that provider's allocation to reach it
+    (the transaction status of a multi-provider order is settled by run_agent).
+    Called by the /beckn/webhook/on_* routes right after they update the store.
+    """
+    for future in status_waiters.pop((transaction_id, status, provider_id), ()):
+        if not future.done():
+            future.set_result(True)
+
+
+# Status changes written by other workers (SQLite backend) wake local waiters too
+transaction_store.add_change_listener(notify_status)
 
 
 # ============================================================================
@@ -42,11 +89,57 @@ class BecknClient:
     - Dynamic domains: compute-energy for discover, demand-flexibility for confirm/status
     """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            transport: Optional httpx transport for every pooled client
+                       (e.g. httpx.ASGITransport to talk to an in-process app)
+        """
         # DEG Hackathon BAP Sandbox URL
         self.sandbox_url = settings.beckn_bap_sandbox_url
         self.onix_url = settings.onix_url
         self.timeout = httpx.Timeout(30.0, connect=10.0)
+        self.limits = httpx.Limits(
+            max_connections=settings.beckn_http_max_connections,
+            max_keepalive_connections=settings.beckn_http_max_keepalive,
+            keepalive_expiry=settings.beckn_http_keepalive_expiry_s
+        )
+        self.http2 = settings.beckn_http2
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("⚠ BECKN_HTTP2 enabled but the 'h2' package is not installed, using HTTP/1.1")
+            self.http2 = False
+        self.transport = transport
+        # Pooled clients, one per base URL (sandbox, ONIX)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    # ------------------------------------------------------------------------
+    # CONNECTION POOL
+    # ------------------------------------------------------------------------
+
+    async def start(self):
+        """Opens the pooled clients (app startup)."""
+        for base_url in (self.sandbox_url, self.onix_url):
+            self._client(base_url)
+        logger.info(f"✓ Beckn HTTP pool ready ({len(self._clients)} clients, http2={self.http2})")
+
+    async def close(self):
+        """Closes the pooled clients and their connections (app shutdown)."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def _client(self, base_url: str) -> httpx.AsyncClient:
+        """Long-lived client for a base URL; created on first use outside the app lifespan."""
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport
+            )
+            self._clients[base_url] = client
+        return client
         
     async def send_discover(
         self,
@@ -70,7 +163,9 @@ class BecknClient:
         
         transaction_id = payload["context"]["transaction_id"]
         
-        # Create transaction record
+        # Create transaction record (expires with the context ttl)
+        ttl = beckn_utils.parse_duration(payload["context"].get("ttl"))
+        created_at = datetime.utcnow()
         transaction = BecknTransaction(
             transaction_id=transaction_id,
             message_id=payload["context"]["message_id"],
@@ -80,43 +175,51 @@ class BecknClient:
             flexibility_kw=flexibility_kw,
             window_start=window_start,
             window_end=window_end,
-            request_payload=payload
+            request_payload=payload,
+            created_at=created_at,
+            expires_at=created_at + ttl if ttl else None
         )
         
         # Store transaction
-        async with store_lock:
-            transaction_store[transaction_id] = transaction
+        await transaction_store.submit(transaction_store.add, transaction)
         
         # Send to DEG Hackathon BAP Sandbox
-        start_time = time.time()
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.sandbox_url}/api/discover",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                logger.info(f"✓ DISCOVER sent to BAP Sandbox for transaction {transaction_id}")
-                
+        start_time = time.perf_counter()
+        try:
+            await self._post(transaction_id, "discover", self.sandbox_url, "/api/discover", payload, feeder_id=feeder_id)
+            metrics.beckn_stage_ms.labels(stage=metrics.STAGE_DISCOVER).record((time.perf_counter() - start_time) * 1000)
+            logger.info(f"✓ DISCOVER sent to BAP Sandbox for transaction {transaction_id}")
             # Response should be empty ACK or minimal
-                # Real data comes via async callback to bap_uri
-            except Exception as e:
-                latency_ms = (time.time() - start_time) * 1000
-                logger.error(f"✗ DISCOVER failed after {latency_ms:.2f}ms: {e}")
+            # Real data comes via async callback to bap_uri
+        except Exception as e:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            metrics.beckn_stage_failures.labels(stage=metrics.STAGE_DISCOVER).inc()
+            logger.error(f"✗ DISCOVER failed after {latency_ms:.2f}ms: {e}")
                 
-                # Update transaction state
-                transaction.status = TransactionStatus.FAILURE_EXTERNAL
-                transaction.metrics["latency_attempt"] = latency_ms
-                transaction.metrics["error"] = str(e)
+            # Update transaction state
+            await transaction_store.submit(transaction_store.update_metrics, transaction_id, latency_attempt=latency_ms, error=str(e))
+            await transaction_store.submit(transaction_store.set_status, transaction_id, TransactionStatus.FAILURE_EXTERNAL)
                 
-                # We don't raise here because we want to return the transaction with the failure status
-                # so the orchestrator can report it properly instead of crashing
-                return transaction
-                # raise  <-- Removed re-raise to allow graceful failure reporting
+            # We don't raise here because we want to return the transaction with the failure status
+            # so the orchestrator can report it properly instead of crashing
+            return transaction_store.get(transaction_id) or transaction
+            # raise  <-- Removed re-raise to allow graceful failure reporting
         
         return transaction
     
+    async def _post(self, transaction_id: str, action: str, base_url: str, path: str, payload: Dict[str, Any], **attributes) -> httpx.Response:
+        """POSTs a Beckn message on the pooled client, traced as a send.<action> span."""
+        with tracer.span(transaction_id, f"send.{action}", **attributes) as span:
+            client = self._client(base_url)
+            response = await client.post(
+                f"{base_url}{path}",
+                json=payload,
+                headers={"Content-Type": "application/json"}
+            )
+            span.set(payload_bytes=len(response.request.content), http_status=response.status_code)
+            response.raise_for_status()
+            return response
+    
     async def send_select(
         self,
         transaction_id: str,
@@ -132,18 +235,12 @@ class BecknClient:
             flexibility_kw=flexibility_kw
         )
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.onix_url}/bap/caller/select",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                logger.info(f"✓ SELECT sent via ONIX for transaction {transaction_id}")
-            except Exception as e:
-                logger.error(f"✗ SELECT failed: {e}")
-                raise
+        try:
+            await self._post(transaction_id, "select", self.onix_url, "/bap/caller/select", payload, provider_id=provider_id)
+            logger.info(f"✓ SELECT sent via ONIX for transaction {transaction_id}")
+        except Exception as e:
+            logger.error(f"✗ SELECT failed: {e}")
+            raise
     
     async def send_init(
         self,
@@ -158,18 +255,12 @@ class BecknClient:
             item_id=item_id
         )
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.onix_url}/bap/caller/init",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                logger.info(f"✓ INIT sent via ONIX for transaction {transaction_id}")
-            except Exception as e:
-                logger.error(f"✗ INIT failed: {e}")
-                raise
+        try:
+            await self._post(transaction_id, "init", self.onix_url, "/bap/caller/init", payload, provider_id=provider_id)
+            logger.info(f"✓ INIT sent via ONIX for transaction {transaction_id}")
+        except Exception as e:
+            logger.error(f"✗ INIT failed: {e}")
+            raise
     
     async def send_confirm(
         self,
@@ -187,18 +278,12 @@ class BecknClient:
             item_id=item_id
         )
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.sandbox_url}/api/confirm",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                logger.info(f"✓ CONFIRM sent to BAP Sandbox for transaction {transaction_id}")
-            except Exception as e:
-                logger.error(f"✗ CONFIRM failed: {e}")
-                raise
+        try:
+            await self._post(transaction_id, "confirm", self.sandbox_url, "/api/confirm", payload, provider_id=provider_id)
+            logger.info(f"✓ CONFIRM sent to BAP Sandbox for transaction {transaction_id}")
+        except Exception as e:
+            logger.error(f"✗ CONFIRM failed: {e}")
+            raise
     
     async def send_status(
         self,
@@ -215,18 +300,16 @@ class BecknClient:
             order_id=order_id
         )
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.sandbox_url}/api/status",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                logger.info(f"✓ STATUS sent to BAP Sandbox for transaction {transaction_id}")
-            except Exception as e:
-                logger.error(f"✗ STATUS failed: {e}")
-                raise
+        try:
+            await self._post(transaction_id, "status", self.sandbox_url, "/api/status", payload, order_id=order_id)
+            logger.info(f"✓ STATUS sent to BAP Sandbox for transaction {transaction_id}")
+        except Exception as e:
+            logger.error(f"✗ STATUS failed: {e}")
+            raise
+
+
+# Singleton: shared connection pool, opened/closed by the app lifespan
+beckn_client = BecknClient()
 
 
 # ============================================================================
@@ -242,89 +325,135 @@ def select_best_der(providers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]
     2. Availability (higher capacity is better)
     3. Provider reputation (simulated for now)
     
+    Every item of every provider is considered (see der_market.rank_der_offers,
+    which also serves top-k fallback candidates).
+    
     Returns:
         Selected provider dict with 'provider_id' and 'item_id'
     """
-    if not providers:
-        return None
-    
-    best_provider = None
-    best_score = float('-inf')
-    
-    for provider in providers:
-        try:
-            # Extract provider info
-            provider_id = provider.get("id")
-            items = provider.get("items", [])
-            
-            if not items:
-                continue
-            
-            # Analyze first item (simplification)
-            item = items[0]
-            item_id = item.get("id")
-            
-            # Extract price
-            price_value = float(item.get("price", {}).get("value", 999999))
-            
-            # Extract available capacity
-            available_kw = float(
-                item.get("quantity", {}).get("available", {}).get("count", 0)
-            )
-            
-            # Score calculation (normalized 0-1):
-            # Lower price is better, higher availability is better
-            price_score = 1.0 / (1.0 + price_value / 1000.0)  # Normalize
-            capacity_score = min(available_kw / 100.0, 1.0)  # Cap at 1.0
-            
-            # Weighted score
-            total_score = (0.6 * price_score) + (0.4 * capacity_score)
-            
-            logger.info(
-                f"Provider {provider_id}: price={price_value}, "
-                f"capacity={available_kw} kW, score={total_score:.3f}"
-            )
-            
-            if total_score > best_score:
-                best_score = total_score
-                best_provider = {
-                    "provider_id": provider_id,
-                    "item_id": item_id,
-                    "price": price_value,
-                    "capacity": available_kw
-                }
-        except Exception as e:
-            logger.warning(f"Error evaluating provider: {e}")
-            continue
-    
-    return best_provider
+    best = rank_der_offers(providers).top(1)
+    return best[0] if best else None
+
+
+def _status_reached(transaction_id: str, expected_status: TransactionStatus, provider_id: Optional[str]) -> bool:
+    transaction = transaction_store.get(transaction_id)
+    if transaction is None:
+        return False
+    if provider_id is None:
+        return transaction.status == expected_status
+    allocation = find_allocation(transaction, provider_id)
+    return allocation is not None and allocation["status"] == expected_status
 
 
 async def wait_for_callback(
     transaction_id: str,
     expected_status: TransactionStatus,
-    timeout_seconds: int = 60
+    timeout_seconds: float = 60,
+    provider_id: Optional[str] = None
 ) -> bool:
     """
     Wait for callback to update transaction to expected status.
+    With provider_id, waits for that provider's allocation instead (multi-provider orders).
     Returns True if status reached, False if timeout.
+    Event-driven: the webhook route resolves the waiter via notify_status().
     """
-    start_time = asyncio.get_event_loop().time()
-    
-    while True:
-        async with store_lock:
-            transaction = transaction_store.get(transaction_id)
-            if transaction and transaction.status == expected_status:
-                return True
-        
-        # Check timeout
-        elapsed = asyncio.get_event_loop().time() - start_time
-        if elapsed >= timeout_seconds:
-            logger.warning(f"Timeout waiting for {expected_status}")
+    with tracer.span(transaction_id, f"wait.{expected_status.value.lower()}", provider_id=provider_id) as span:
+        if _status_reached(transaction_id, expected_status, provider_id):
+            span.set(reached=True)
+            return True
+
+        # Registering and checking happen without an await in between,
+        # so a callback can't slip in unnoticed
+        key = (transaction_id, expected_status, provider_id)
+        future = asyncio.get_running_loop().create_future()
+        status_waiters.setdefault(key, set()).add(future)
+        try:
+            await asyncio.wait_for(future, timeout=timeout_seconds)
+            span.set(reached=True)
+            return True
+        except asyncio.TimeoutError:
+            span.set(reached=False, timeout_s=timeout_seconds)
+            logger.warning(f"Timeout waiting for {expected_status}" + (f" from {provider_id}" if provider_id else ""))
             return False
-        
-        # Wait before checking again
-        await asyncio.sleep(0.5)
+        finally:
+            waiters = status_waiters.get(key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del status_waiters[key]
+
+
+async def _run_provider_flow(
+    client: BecknClient,
+    transaction_id: str,
+    allocation: Dict[str, Any],
+    timeout_seconds: float = 60
+) -> bool:
+    """
+    SELECT -> INIT -> CONFIRM for one provider's share of the order.
+    Runs concurrently with the other providers under the same transaction_id.
+    Returns True once the provider confirmed.
+    """
+    provider_id = allocation["provider_id"]
+    item_id = allocation["item_id"]
+    steps = (
+        ("SELECT", TransactionStatus.SELECT_RECEIVED,
+         lambda: client.send_select(transaction_id, provider_id, item_id, allocation["flexibility_kw"])),
+        ("INIT", TransactionStatus.INIT_RECEIVED,
+         lambda: client.send_init(transaction_id, provider_id, item_id)),
+        ("CONFIRM", TransactionStatus.CONFIRMED,
+         lambda: client.send_confirm(transaction_id, provider_id, item_id)),
+    )
+
+    with tracer.span(transaction_id, "provider_flow", provider_id=provider_id, flexibility_kw=allocation["flexibility_kw"]) as span:
+        for action, expected_status, send in steps:
+            error = None
+            stage = action.lower()  # metrics.STAGE_SELECT / STAGE_INIT / STAGE_CONFIRM
+            start = time.perf_counter()
+            try:
+                await send()
+                if not await wait_for_callback(transaction_id, expected_status, timeout_seconds, provider_id=provider_id):
+                    error = f"ON_{action} timeout"
+            except Exception as e:
+                error = f"{action} failed: {e}"
+
+            if error:
+                metrics.beckn_stage_failures.labels(stage=stage).inc()
+            else:
+                metrics.beckn_stage_ms.labels(stage=stage).record((time.perf_counter() - start) * 1000)
+
+            if error:
+                await transaction_store.submit(
+                    transaction_store.update_allocation,
+                    transaction_id, provider_id, status=TransactionStatus.FAILED.value, error=error
+                )
+                message = f"{action} -> {provider_id}: {error}"
+            elif action == "SELECT":
+                message = f"ON_SELECT -> Quote received from {provider_id}"
+            elif action == "INIT":
+                message = f"ON_INIT -> Order initialized with {provider_id}"
+            else:
+                obp_id = find_allocation(transaction_store.get(transaction_id), provider_id).get("obp_id")
+                message = f"ON_CONFIRM -> {provider_id} confirmed. OBP ID: {obp_id}"
+            await transaction_store.submit(transaction_store.append_history, transaction_id, message)
+            if error:
+                logger.error(f"✗ {provider_id}: {error}")
+                span.set(confirmed=False, failed_step=action)
+                return False
+
+        logger.info(f"✓ {provider_id} confirmed {allocation['flexibility_kw']} kW")
+        span.set(confirmed=True)
+        return True
+
+
+async def _settle(transaction_id: str, status: TransactionStatus, message: str):
+    """Sets the final status of an order run_agent gave up on (callbacks only move allocations)."""
+    def record():
+        transaction_store.set_status(transaction_id, status)
+        transaction_store.append_history(transaction_id, message)
+
+    await transaction_store.submit(record)
+    notify_status(transaction_id, status)
 
 
 # ============================================================================
@@ -344,17 +473,30 @@ async def run_agent(
     Flow:
     1. SEARCH - Discover DER providers (via ONIX)
     2. Wait for ON_SEARCH callbacks (from ONIX)
-    3. SELECT - Choose best provider (via ONIX)
-    4. Wait for ON_SELECT (quote)
-    5. INIT - Initialize order (via ONIX)
-    6. Wait for ON_INIT
-    7. CONFIRM - Finalize order (via ONIX)
-    8. Wait for ON_CONFIRM (get obp_id for P444)
+    3. ALLOCATE - Min-cost set of providers covering flexibility_kw
+    4. SELECT - Request each provider's share (via ONIX)
+    5. Wait for ON_SELECT (quote)
+    6. INIT - Initialize order (via ONIX)
+    7. Wait for ON_INIT
+    8. CONFIRM - Finalize order (via ONIX)
+    9. Wait for ON_CONFIRM (get obp_id for P444)
+    Steps 4-9 run in parallel for every allocated provider, under the same transaction.
     
     Returns:
-        Complete transaction result with obp_id
+        Complete transaction result with obp_id and per-provider allocations
     """
-    client = BecknClient()
+    return await _run_agent_flow(feeder_id, risk_level, flexibility_kw, window_start, window_end)
+
+
+async def _run_agent_flow(
+    feeder_id: str,
+    risk_level: int,
+    flexibility_kw: float,
+    window_start: datetime,
+    window_end: datetime
+) -> Dict[str, Any]:
+    client = beckn_client
+    started = time.perf_counter()
     
     logger.info("=" * 70)
     logger.info(f"🚀 FLUXEON BECKN ORCHESTRATOR (DEG Hackathon)")
@@ -370,13 +512,37 @@ async def run_agent(
         window_end=window_end
     )
     transaction_id = transaction.transaction_id
+    tracer.annotate(transaction_id, feeder_id=feeder_id, risk_level=risk_level, flexibility_kw=flexibility_kw)
+
+    # From here on the trace is closed however the flow ends (store errors, cancellation)
+    try:
+        result = await _run_transaction_flow(client, transaction, started, flexibility_kw, window_start, window_end)
+    except BaseException as e:
+        tracer.finish(transaction_id, status="error", error=repr(e))
+        raise
+    tracer.finish(
+        transaction_id,
+        status="ok" if result.get("success") else "error",
+        obp_id=result.get("obp_id"),
+        confirmed_kw=result.get("confirmed_kw"),
+        error=result.get("error")
+    )
+    return result
+
+
+async def _run_transaction_flow(
+    client: BecknClient,
+    transaction: BecknTransaction,
+    started: float,
+    flexibility_kw: float,
+    window_start: datetime,
+    window_end: datetime
+) -> Dict[str, Any]:
+    """Steps after DISCOVER was sent: ON_SEARCH wait, allocation, per-provider flows, final status."""
+    transaction_id = transaction.transaction_id
     
     # Log start
-    async with store_lock:
-        transaction.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "message": f"DISCOVER -> Sent request for {flexibility_kw}kW"
-        })
+    await transaction_store.submit(transaction_store.append_history, transaction_id, f"DISCOVER -> Sent request for {flexibility_kw}kW")
         
     # Check for immediate failure (e.g. timeout)
     if transaction.status == TransactionStatus.FAILURE_EXTERNAL:
@@ -390,14 +556,19 @@ async def run_agent(
     
     # Step 2: Wait for async callback (ON_DISCOVER)
     logger.info("[1/3] Waiting for async ON_DISCOVER callback...")
+    wait_start = time.perf_counter()
     success = await wait_for_callback(
         transaction_id,
         TransactionStatus.SEARCH_RECEIVED,  # Keep internal status naming
-        timeout_seconds=60
+        timeout_seconds=settings.beckn_callback_timeout_s
     )
     
-    if not success:
-        # Check if it failed externally during send_discover
+    if success:
+        metrics.beckn_stage_ms.labels(stage=metrics.STAGE_ON_SEARCH_WAIT).record((time.perf_counter() - wait_start) * 1000)
+    else:
+        metrics.beckn_stage_failures.labels(stage=metrics.STAGE_ON_SEARCH_WAIT).inc()
+        # Check if it failed externally during send_discover (re-read: another worker may have written it)
+        transaction = transaction_store.get(transaction_id) or transaction
         if transaction.status == TransactionStatus.FAILURE_EXTERNAL:
             latency = transaction.metrics.get("latency_attempt", 0)
             return {
@@ -409,124 +580,101 @@ async def run_agent(
         return {"error": "ON_SEARCH timeout", "transaction_id": transaction_id}
     
     # Extract providers from ON_SEARCH
-    async with store_lock:
-        catalog = transaction.response_payload.get("message", {}, {}).get("catalog", {})
-        providers = catalog.get("providers", [])
-        
-        transaction.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "message": f"ON_DISCOVER -> Found {len(providers)} DER providers"
-        })
+    transaction = transaction_store.get(transaction_id)
+    catalog = (transaction.response_payload or {}).get("message", {}).get("catalog", {})
+    providers = catalog.get("providers", [])
+    await transaction_store.submit(transaction_store.append_history, transaction_id, f"ON_DISCOVER -> Found {len(providers)} DER providers")
     
     logger.info(f"✓ Received {len(providers)} providers")
     
-    # Step 3: SELECT best DER
-    logger.info("\n[2/4] Selecting best DER provider...")
-    selected = select_best_der(providers)
+    # Step 3: ALLOCATE the requested kW across DER providers (min-cost cover)
+    logger.info("\n[2/4] Allocating flexibility across DER providers...")
+    with tracer.span(transaction_id, "allocate", offers=len(providers)) as span:
+        allocation = allocate_flexibility(rank_der_offers(providers).catalog, flexibility_kw)
+        span.set(providers=len(allocation.indices), covered_kw=allocation.covered_kw, method=allocation.method)
     
-    if not selected:
+    if not allocation.indices:
+        await _settle(transaction_id, TransactionStatus.FAILED, "ALLOCATE -> No suitable providers found")
         return {"error": "No suitable providers found", "transaction_id": transaction_id}
-    
-    logger.info(
-        f"✓ Selected: {selected['provider_id']} "
-        f"(price={selected['price']}, capacity={selected['capacity']} kW)"
-    )
-    
-    await client.send_select(
-        transaction_id=transaction_id,
-        provider_id=selected["provider_id"],
-        item_id=selected["item_id"],
-        flexibility_kw=flexibility_kw
-    )
-    
-    # Wait for ON_SELECT
-    logger.info("[2/4] Waiting for ON_SELECT (quote) from ONIX...")
-    success = await wait_for_callback(
+    if not allocation.covered:
+        logger.warning(f"⚠ Catalog covers only {allocation.covered_kw:.1f} of {flexibility_kw} kW")
+    
+    # Each provider is asked for its share of the request (never more than it offers)
+    share = min(1.0, flexibility_kw / allocation.covered_kw) if allocation.covered_kw else 0.0
+    allocations = [
+        dict(
+            offer,
+            flexibility_kw=round(offer["capacity"] * share, 3),
+            status=TransactionStatus.PENDING.value,
+            quoted_price=None,
+            obp_id=None
+        )
+        for offer in allocation.offers
+    ]
+    await transaction_store.submit(transaction_store.set_allocations, transaction_id, allocations)
+    await transaction_store.submit(
+        transaction_store.append_history,
         transaction_id,
-        TransactionStatus.SELECT_RECEIVED,
-        timeout_seconds=60
+        f"ALLOCATE -> {len(allocations)} provider(s) for "
+        f"{min(allocation.covered_kw, flexibility_kw):.1f}/{flexibility_kw}kW "
+        f"(price {allocation.total_price:.2f}, {allocation.method})"
     )
     
-    if not success:
-        return {"error": "ON_SELECT timeout", "transaction_id": transaction_id}
+    for entry in allocations:
+        logger.info(
+            f"✓ Selected: {entry['provider_id']} "
+            f"(price={entry['price']}, capacity={entry['capacity']} kW, share={entry['flexibility_kw']} kW)"
+        )
     
-    async with store_lock:
-        transaction.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "message": f"ON_SELECT -> Quote received from {selected['provider_id']}"
-        })
+    # Steps 4-6: SELECT -> INIT -> CONFIRM with every allocated provider in parallel
+    logger.info("\n[3/4] Running SELECT/INIT/CONFIRM with each provider...")
+    results = await asyncio.gather(*(
+        _run_provider_flow(client, transaction_id, entry, settings.beckn_callback_timeout_s)
+        for entry in allocations
+    ))
+    
+    # Callbacks updated the stored allocations: read them back
+    transaction = transaction_store.get(transaction_id)
+    allocations = transaction.allocations
+    confirmed = [entry for entry, ok in zip(allocations, results) if ok]
+    if not confirmed:
+        errors = "; ".join(entry.get("error", "unknown error") for entry in allocations)
+        await _settle(transaction_id, TransactionStatus.FAILED, f"FAILED -> No provider confirmed: {errors}")
+        return {"error": errors, "transaction_id": transaction_id, "allocations": allocations}
+    
+    confirmed_kw = sum(entry["flexibility_kw"] for entry in confirmed)
+    quotes = [entry["quoted_price"] for entry in confirmed]
 
-    logger.info("✓ Quote received")
-    
-    # Step 4: INIT
-    logger.info("\n[3/4] Sending INIT via ONIX...")
-    await client.send_init(
-        transaction_id=transaction_id,
-        provider_id=selected["provider_id"],
-        item_id=selected["item_id"]
-    )
-    
-    # Wait for ON_INIT
-    logger.info("[3/4] Waiting for ON_INIT from ONIX...")
-    success = await wait_for_callback(
-        transaction_id,
-        TransactionStatus.INIT_RECEIVED,
-        timeout_seconds=60
-    )
-    
-    if not success:
-        return {"error": "ON_INIT timeout", "transaction_id": transaction_id}
-    
-    async with store_lock:
-        transaction.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "message": "ON_INIT -> Order initialized"
-        })
+    def record_confirmation() -> BecknTransaction:
+        transaction_store.update(
+            transaction_id,
+            provider_id=confirmed[0]["provider_id"],
+            quoted_price=sum(quotes) if all(q is not None for q in quotes) else transaction.quoted_price
+        )
+        if not transaction.obp_id:
+            transaction_store.set_obp_id(transaction_id, confirmed[0]["obp_id"])
+        return transaction_store.set_status(transaction_id, TransactionStatus.CONFIRMED)
 
-    logger.info("✓ Order initialized")
-    
-    # Step 5: CONFIRM
-    logger.info("\n[4/4] Sending CONFIRM via ONIX...")
-    await client.send_confirm(
-        transaction_id=transaction_id,
-        provider_id=selected["provider_id"],
-        item_id=selected["item_id"]
-    )
-    
-    # Wait for ON_CONFIRM
-    logger.info("[4/4] Waiting for ON_CONFIRM (obp_id) from ONIX...")
-    success = await wait_for_callback(
-        transaction_id,
-        TransactionStatus.CONFIRMED,
-        timeout_seconds=60
-    )
-    
-    if not success:
-        return {"error": "ON_CONFIRM timeout", "transaction_id": transaction_id}
-    
-    # Extract obp_id for P444 compliance
-    async with store_lock:
-        obp_id = transaction.obp_id
-        transaction.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "message": f"ON_CONFIRM -> Order confirmed. OBP ID: {obp_id}"
-        })
+    transaction = await transaction_store.submit(record_confirmation)
+    notify_status(transaction_id, TransactionStatus.CONFIRMED)
+    obp_id = transaction.obp_id
     
-    logger.info(f"✓ ORDER CONFIRMED! OBP ID: {obp_id}")
+    logger.info(f"✓ ORDER CONFIRMED! OBP ID: {obp_id} ({len(confirmed)}/{len(results)} providers, {confirmed_kw:.1f} kW)")
     logger.info("=" * 70)
     
-    # Calculate total latency if available
-    total_latency = transaction.metrics.get("latency_attempt", 0)
-    if total_latency == 0:
-        # Fallback calculation if not recorded
-        total_latency = (datetime.utcnow() - transaction.created_at).total_seconds() * 1000 if hasattr(transaction, 'created_at') else 0
+    # End-to-end latency: DISCOVER sent -> every allocated provider settled
+    total_latency = (time.perf_counter() - started) * 1000
+    metrics.beckn_stage_ms.labels(stage=metrics.STAGE_END_TO_END).record(total_latency)
+    await transaction_store.submit(transaction_store.update_metrics, transaction_id, latency_ms=total_latency)
 
     return {
-        "success": True,
+        "success": len(confirmed) == len(results) and allocation.covered,
         "transaction_id": transaction_id,
         "obp_id": obp_id,
-        "provider_id": selected["provider_id"],
+        "provider_id": confirmed[0]["provider_id"],
         "flexibility_kw": flexibility_kw,
+        "confirmed_kw": confirmed_kw,
+        "allocations": allocations,
         "window_start": window_start.isoformat(),
         "window_end": window_end.isoformat(),
         "latency_ms": total_latency
@@ -558,5 +706,6 @@ if __name__ == "__main__":
         
         print("\nFinal Result:")
         print(result)
+        await beckn_client.close()
     
     asyncio.run(test_orchestrator())
@@ -3,6 +3,7 @@
 Beckn Protocol Utilities for FLUXEON - DEG Hackathon Edition.
 Functions to build standard Beckn messages for DEG Hackathon BAP Sandbox API.
 """
+import re
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
@@ -118,6 +119,85 @@ def build_discover_message(
     return message
 
 
+def build_select_message(
+    transaction_id: str,
+    provider_id: str,
+    item_id: str,
+    flexibility_kw: float
+) -> Dict[str, Any]:
+    """
+    Build a SELECT message (sent via ONIX /bap/caller/select).
+    Uses demand-flexibility domain.
+    
+    Args:
+        transaction_id: Existing transaction ID from discover
+        provider_id: Selected provider's ID
+        item_id: Selected item ID from the ON_DISCOVER catalog
+        flexibility_kw: Flexibility requested from this provider in kW
+    
+    Returns:
+        Complete Beckn SELECT payload
+    """
+    context = build_context(action="select", transaction_id=transaction_id)
+    
+    return {
+        "context": context.model_dump(),
+        "message": {
+            "order": {
+                "provider": {
+                    "id": provider_id
+                },
+                "items": [
+                    {
+                        "id": item_id,
+                        "quantity": {
+                            "selected": {
+                                "measure": {"value": flexibility_kw, "unit": "kW"}
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+    }
+
+
+def build_init_message(
+    transaction_id: str,
+    provider_id: str,
+    item_id: str
+) -> Dict[str, Any]:
+    """
+    Build an INIT message (sent via ONIX /bap/caller/init).
+    Uses demand-flexibility domain.
+    
+    Args:
+        transaction_id: Existing transaction ID from discover
+        provider_id: Selected provider's ID
+        item_id: Item ID quoted in ON_SELECT
+    
+    Returns:
+        Complete Beckn INIT payload
+    """
+    context = build_context(action="init", transaction_id=transaction_id)
+    
+    return {
+        "context": context.model_dump(),
+        "message": {
+            "order": {
+                "provider": {
+                    "id": provider_id
+                },
+                "items": [
+                    {
+                        "id": item_id
+                    }
+                ]
+            }
+        }
+    }
+
+
 def build_confirm_message(
     transaction_id: str,
     provider_id: str,
@@ -202,6 +282,31 @@ def extract_message_id(payload: Dict[str, Any]) -> Optional[str]:
         return None
 
 
+def extract_provider_id(payload: Dict[str, Any]) -> Optional[str]:
+    """Extract the responding provider from an on_select/on_init/on_confirm payload."""
+    try:
+        provider = payload.get("message", {}).get("order", {}).get("provider", {})
+        return provider.get("id") or payload.get("context", {}).get("bpp_id")
+    except:
+        return None
+
+
+_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$"
+)
+
+
+def parse_duration(ttl: Optional[str]) -> Optional[timedelta]:
+    """Parse a Beckn context ttl (ISO 8601 duration such as "PT10M"). None if absent/invalid."""
+    if not ttl:
+        return None
+    match = _DURATION_RE.match(ttl)
+    if not match or not any(match.groupdict().values()):
+        return None
+    return timedelta(**{unit: float(value) for unit, value in match.groupdict().items() if value})
+
+
 def validate_context(payload: Dict[str, Any]) -> bool:
     """
     Validate that a payload contains required Beckn context fields.
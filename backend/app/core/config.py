@@ -42,6 +42,53 @@ class Settings(BaseSettings):
     beckn_country: str = Field(default="ARG", env="BECKN_COUNTRY")
     beckn_city: str = Field(default="Buenos Aires", env="BECKN_CITY")
     
+    # Beckn HTTP connection pool (one long-lived client per base URL)
+    beckn_http_max_connections: int = Field(default=100, env="BECKN_HTTP_MAX_CONNECTIONS")
+    beckn_http_max_keepalive: int = Field(default=20, env="BECKN_HTTP_MAX_KEEPALIVE")
+    beckn_http_keepalive_expiry_s: float = Field(default=30.0, env="BECKN_HTTP_KEEPALIVE_EXPIRY_S")
+    beckn_http2: bool = Field(default=False, env="BECKN_HTTP2")  # Requires the optional `h2` package
+    # How long run_agent waits for each on_* callback before giving up on that step
+    beckn_callback_timeout_s: float = Field(default=60.0, env="BECKN_CALLBACK_TIMEOUT_S")
+    
+    # Orchestration engine (concurrent run_agent flows)
+    orchestrator_max_workers: int = Field(default=8, env="ORCHESTRATOR_MAX_WORKERS")
+    
+    # Transaction store memory bounds (terminal/expired transactions are evicted LRU-first)
+    store_max_entries: int = Field(default=10000, env="STORE_MAX_ENTRIES")
+    store_max_bytes: int = Field(default=64 * 1024 * 1024, env="STORE_MAX_BYTES")
+    # Store backend: "memory" (single worker) or "sqlite" (shared by every uvicorn worker)
+    store_backend: str = Field(default="memory", env="STORE_BACKEND")
+    store_sqlite_path: str = Field(
+        default=os.path.join(os.path.dirname(__file__), "../../data/store/transactions.db"),
+        env="STORE_SQLITE_PATH"
+    )
+    store_sqlite_commit_ms: float = Field(default=5.0, env="STORE_SQLITE_COMMIT_MS")  # Write batching window
+    store_sqlite_poll_ms: float = Field(default=10.0, env="STORE_SQLITE_POLL_MS")      # Cross-worker change polling
+    
+    # Audit journal (append-only log of every store write, replayed on startup)
+    audit_journal_dir: str = Field(
+        default=os.path.join(os.path.dirname(__file__), "../../data/audit/journal"),
+        env="AUDIT_JOURNAL_DIR"
+    )
+    audit_journal_segment_bytes: int = Field(default=64 * 1024 * 1024, env="AUDIT_JOURNAL_SEGMENT_BYTES")
+    audit_journal_compress: bool = Field(default=True, env="AUDIT_JOURNAL_COMPRESS")  # zlib for records >= 1 KB
+    audit_journal_fsync: bool = Field(default=True, env="AUDIT_JOURNAL_FSYNC")
+    audit_journal_compact: bool = Field(default=True, env="AUDIT_JOURNAL_COMPACT")  # Snapshot the replayed segments on startup
+    
+    # Event loop monitor (lag histogram + stack capture of blocking calls)
+    loop_monitor_enabled: bool = Field(default=True, env="LOOP_MONITOR_ENABLED")
+    loop_monitor_interval_ms: float = Field(default=50.0, env="LOOP_MONITOR_INTERVAL_MS")
+    loop_block_threshold_ms: float = Field(default=100.0, env="LOOP_BLOCK_THRESHOLD_MS")
+    
+    # Tracing (per-transaction spans, finished traces kept in a ring buffer served by /traces)
+    trace_buffer_size: int = Field(default=500, env="TRACE_BUFFER_SIZE")
+    
+    # Telemetry (background ticker feeding /feeders)
+    telemetry_interval_s: float = Field(default=2.5, env="TELEMETRY_INTERVAL_S")
+    
+    # Risk pipeline: feeders whose rolling window/feature buffer stay resident (LRU)
+    ts_max_feeders: int = Field(default=1024, env="TS_MAX_FEEDERS")
+    
     # Application Settings
     debug: bool = Field(default=True, env="DEBUG")
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
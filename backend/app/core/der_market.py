@@ -0,0 +1,281 @@
+# backend/app/core/der_market.py
+"""
+DER marketplace ranking for FLUXEON.
+Flattens every item of every provider in an ON_SEARCH catalog into arrays,
+scores price and capacity in one vectorized pass, and serves the top-k offers.
+A DerRanking keeps its scores, so fallback candidates never need rescoring.
+"""
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MISSING_PRICE = 999999.0    # Offers without a price rank last on price
+PRICE_WEIGHT = 0.6
+CAPACITY_WEIGHT = 0.4
+PRICE_SCALE = 1000.0        # price_score = 1 / (1 + price / PRICE_SCALE)
+CAPACITY_SCALE_KW = 100.0   # capacity_score = min(available_kw / CAPACITY_SCALE_KW, 1)
+
+
+def _to_float(value: Any, default: float) -> float:
+    """Catalog numbers arrive as strings; unparseable values become NaN (offer dropped)."""
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+# ============================================================================
+# FLATTENED CATALOG
+# ============================================================================
+
+class DerCatalog:
+    """All provider items of a catalog as parallel arrays (one row per offer)."""
+
+    def __init__(self, provider_ids: Sequence[str], item_ids: Sequence[str], price: np.ndarray, capacity_kw: np.ndarray):
+        self.provider_ids = list(provider_ids)
+        self.item_ids = list(item_ids)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.capacity_kw = np.asarray(capacity_kw, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    @classmethod
+    def from_providers(cls, providers: Sequence[Dict[str, Any]]) -> "DerCatalog":
+        """Flattens ON_SEARCH `catalog.providers`, skipping malformed entries."""
+        provider_ids, item_ids, prices, capacities = [], [], [], []
+        for provider in providers or ():
+            if not isinstance(provider, dict):
+                continue
+            provider_id = provider.get("id")
+            for item in provider.get("items") or ():
+                if not isinstance(item, dict):
+                    continue
+                provider_ids.append(provider_id)
+                item_ids.append(item.get("id"))
+                prices.append(_to_float((item.get("price") or {}).get("value"), MISSING_PRICE))
+                capacities.append(_to_float(((item.get("quantity") or {}).get("available") or {}).get("count"), 0.0))
+
+        price = np.array(prices, dtype=np.float64)
+        capacity = np.array(capacities, dtype=np.float64)
+        valid = np.isfinite(price) & np.isfinite(capacity)
+        if not valid.all():
+            logger.warning(f"Skipping {int((~valid).sum())} DER offers with unparseable price/capacity")
+            keep = np.flatnonzero(valid).tolist()
+            provider_ids = [provider_ids[i] for i in keep]
+            item_ids = [item_ids[i] for i in keep]
+            price, capacity = price[valid], capacity[valid]
+        return cls(provider_ids, item_ids, price, capacity)
+
+    def offer(self, index: int, score: Optional[float] = None) -> Dict[str, Any]:
+        """Offer dict in the shape run_agent expects."""
+        offer = {
+            "provider_id": self.provider_ids[index],
+            "item_id": self.item_ids[index],
+            "price": float(self.price[index]),
+            "capacity": float(self.capacity_kw[index]),
+        }
+        if score is not None:
+            offer["score"] = float(score)
+        return offer
+
+# ============================================================================
+# SCORING / RANKING
+# ============================================================================
+
+def score_offers(price: np.ndarray, capacity_kw: np.ndarray) -> np.ndarray:
+    """
+    Weighted score in [0, 1] (higher is better):
+    lower price is better, higher available capacity is better (capped).
+    """
+    price_score = 1.0 / (1.0 + price / PRICE_SCALE)
+    capacity_score = np.minimum(capacity_kw / CAPACITY_SCALE_KW, 1.0)
+    return PRICE_WEIGHT * price_score + CAPACITY_WEIGHT * capacity_score
+
+
+class DerRanking:
+    """Scored catalog. top(k) selects with argpartition; ties keep catalog order."""
+
+    def __init__(self, catalog: DerCatalog):
+        self.catalog = catalog
+        self.scores = score_offers(catalog.price, catalog.capacity_kw)
+
+    def top_indices(self, k: int) -> np.ndarray:
+        """Row indices of the k best offers, best first."""
+        n = len(self.scores)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < n:
+            candidates = np.argpartition(-self.scores, k - 1)[:k]
+        else:
+            candidates = np.arange(n)
+        # Sort the k candidates by (-score, catalog position)
+        return candidates[np.lexsort((candidates, -self.scores[candidates]))]
+
+    def top(self, k: int = 5) -> List[Dict[str, Any]]:
+        """The k best offers (dicts with provider_id, item_id, price, capacity, score), best first."""
+        return [self.catalog.offer(i, self.scores[i]) for i in self.top_indices(k).tolist()]
+
+
+def rank_der_offers(providers: Sequence[Dict[str, Any]]) -> DerRanking:
+    """Flattens and scores an ON_SEARCH provider list."""
+    ranking = DerRanking(DerCatalog.from_providers(providers))
+    logger.info(f"Ranked {len(ranking.catalog)} DER offers from {len(providers or ())} providers")
+    return ranking
+
+# ============================================================================
+# ALLOCATION (min-cost cover of the requested kW)
+# ============================================================================
+# Offer prices are the total price of an item's available capacity and items are
+# indivisible. Items of one provider are alternatives backed by the same DER, so
+# at most one item per provider is chosen (a multiple-choice cover problem).
+
+DP_CANDIDATES = 64      # Cheapest-per-kW offers handed to the exact DP
+DP_MAX_UNITS = 2048     # Capacity resolution of the DP (requested kW / units)
+
+
+class Allocation:
+    """Offers chosen to cover a flexibility request."""
+
+    def __init__(self, catalog: DerCatalog, indices: Sequence[int], requested_kw: float, method: str):
+        self.catalog = catalog
+        self.indices = [int(i) for i in indices]
+        self.requested_kw = requested_kw
+        self.method = method
+        self.total_price = float(catalog.price[self.indices].sum()) if self.indices else 0.0
+        self.covered_kw = float(catalog.capacity_kw[self.indices].sum()) if self.indices else 0.0
+
+    @property
+    def covered(self) -> bool:
+        return self.covered_kw >= self.requested_kw
+
+    @property
+    def offers(self) -> List[Dict[str, Any]]:
+        return [self.catalog.offer(i) for i in self.indices]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requested_kw": self.requested_kw,
+            "covered_kw": self.covered_kw,
+            "total_price": self.total_price,
+            "method": self.method,
+            "offers": self.offers,
+        }
+
+
+def _provider_groups(catalog: DerCatalog, indices: np.ndarray) -> List[np.ndarray]:
+    """Splits offer indices by provider, preserving order."""
+    groups: Dict[Any, List[int]] = {}
+    for i in indices.tolist():
+        groups.setdefault(catalog.provider_ids[i], []).append(i)
+    return [np.array(g, dtype=np.intp) for g in groups.values()]
+
+
+def _greedy_cover(catalog: DerCatalog, order: np.ndarray, requested_kw: float) -> List[int]:
+    """
+    Takes offers by increasing price per kW (one per provider) until the request is
+    covered, then drops the most expensive picks that are no longer needed.
+    """
+    chosen, used, covered = [], set(), 0.0
+    for i in order.tolist():
+        provider_id = catalog.provider_ids[i]
+        if provider_id in used:
+            continue
+        chosen.append(i)
+        used.add(provider_id)
+        covered += catalog.capacity_kw[i]
+        if covered >= requested_kw:
+            break
+    if covered < requested_kw:
+        return chosen
+    for i in sorted(chosen, key=lambda j: -catalog.price[j]):
+        if covered - catalog.capacity_kw[i] >= requested_kw:
+            chosen.remove(i)
+            covered -= catalog.capacity_kw[i]
+    return chosen
+
+
+def _dp_cover(catalog: DerCatalog, candidates: np.ndarray, requested_kw: float) -> Optional[List[int]]:
+    """
+    Exact multiple-choice min-cost cover over the candidate offers.
+    Capacities are floored to DP units, so any DP solution really covers the request.
+    Returns None when the candidates can't cover it.
+    """
+    units = int(min(DP_MAX_UNITS, max(1, np.ceil(requested_kw))))
+    unit_kw = requested_kw / units
+    groups = _provider_groups(catalog, candidates)
+
+    # cost[j] = cheapest price reaching min(coverage, units) == j
+    cost = np.full(units + 1, np.inf)
+    cost[0] = 0.0
+    choice = np.full((len(groups), units + 1), -1, dtype=np.intp)   # Offer taken at stage g
+    previous = np.tile(np.arange(units + 1), (len(groups), 1))       # Coverage before stage g
+    for g, group in enumerate(groups):
+        new_cost = cost.copy()
+        for i in group.tolist():
+            step = int(np.floor(catalog.capacity_kw[i] / unit_kw + 1e-9))
+            if step <= 0:
+                continue
+            reached = cost + catalog.price[i]
+            # Transitions j -> j + step (uncapped part)
+            if step < units:
+                better = reached[:units - step] < new_cost[step:units]
+                target = np.flatnonzero(better) + step
+                new_cost[target] = reached[:units - step][better]
+                choice[g, target] = i
+                previous[g, target] = target - step
+            # Transitions j -> units (capped part)
+            tail = max(0, units - step)
+            j = tail + int(np.argmin(reached[tail:]))
+            if reached[j] < new_cost[units]:
+                new_cost[units] = reached[j]
+                choice[g, units] = i
+                previous[g, units] = j
+        cost = new_cost
+
+    if not np.isfinite(cost[units]):
+        return None
+    chosen, j = [], units
+    for g in range(len(groups) - 1, -1, -1):
+        if choice[g, j] >= 0:
+            chosen.append(int(choice[g, j]))
+        j = previous[g, j]
+    return chosen[::-1]
+
+
+def allocate_flexibility(catalog: DerCatalog, requested_kw: float, dp_candidates: int = DP_CANDIDATES) -> Allocation:
+    """
+    Chooses offers whose capacities sum to at least `requested_kw` at minimum total price.
+    A greedy cover over the whole catalog is refined by an exact DP over the
+    cheapest-per-kW candidates; the cheaper of the two wins. If nothing covers
+    the request, the largest offer of every provider is taken (best effort).
+    """
+    if len(catalog) == 0 or requested_kw <= 0:
+        return Allocation(catalog, [], requested_kw, "empty")
+
+    usable = np.flatnonzero(catalog.capacity_kw > 0)
+    unit_price = catalog.price[usable] / catalog.capacity_kw[usable]
+    order = usable[np.lexsort((usable, unit_price))]
+
+    greedy = Allocation(catalog, _greedy_cover(catalog, order, requested_kw), requested_kw, "greedy")
+    largest: List[int] = []
+    if not greedy.covered:
+        # One-per-provider greedy can miss a cover built from larger items
+        largest = [int(g[np.argmax(catalog.capacity_kw[g])]) for g in _provider_groups(catalog, usable)]
+
+    # DP candidates: the cheapest per kW plus the greedy picks (so DP is never worse),
+    # or every provider's largest offer when greedy couldn't cover the request
+    candidates = np.unique(np.concatenate([order[:dp_candidates], greedy.indices, largest]).astype(np.intp))
+    dp = _dp_cover(catalog, candidates, requested_kw)
+    best = greedy if greedy.covered else None
+    if dp is not None:
+        dp_allocation = Allocation(catalog, dp, requested_kw, "dp")
+        if best is None or dp_allocation.total_price < best.total_price:
+            best = dp_allocation
+    if best is None:
+        return Allocation(catalog, largest, requested_kw, "partial")
+    return best
@@ -0,0 +1,175 @@
+# backend/app/core/features.py
+"""
+Feature extraction shared by the trainers (agent_core, agent_core_with_preview)
+and online inference (TSPipeline). Both go through the same compute_features kernel.
+For training, all lag windows are built at once as strided views over the
+load/temperature columns, so no per-row slicing happens in Python.
+"""
+import math
+import numpy as np
+import pandas as pd
+from collections import deque
+from numpy.lib.stride_tricks import sliding_window_view
+
+LAG_WINDOW = 4  # 1 hour history (4 x 15 mins)
+
+
+def n_features(lag_window: int = LAG_WINDOW) -> int:
+    """Length of the feature vector: lagged loads + lagged temps + rms, peak, kurtosis, workday."""
+    return 2 * lag_window + 4
+
+
+def compute_features(loads: np.ndarray, temps: np.ndarray, is_workday, out: np.ndarray, scratch: np.ndarray = None) -> np.ndarray:
+    """
+    Feature kernel shared by training (prepare_features) and online inference (TSPipeline).
+    Writes one feature vector per window into the preallocated `out` and returns it.
+
+    Vector layout: [load_t-L..., temp_t-L..., rms, peak, kurtosis_proxy, workday]
+
+    Args:
+        loads, temps: (n, lag_window) windows (strided views are fine)
+        is_workday: (n,) activity flags or a single flag for all rows
+        out: (n, n_features(lag_window)) float64 output
+        scratch: Optional (n, lag_window) float64 work array (avoids one allocation)
+    """
+    lag_window = loads.shape[1]
+    rms = out[:, 2 * lag_window]
+    peak = out[:, 2 * lag_window + 1]
+    kurtosis_proxy = out[:, 2 * lag_window + 2]
+
+    # 1. Lagged Loads and 2. Lagged Temps
+    out[:, :lag_window] = loads
+    out[:, lag_window:2 * lag_window] = temps
+
+    # 3. Statistical Features (spike if > 100%)
+    np.mean(np.multiply(loads, loads, out=scratch), axis=1, out=rms)
+    np.sqrt(rms, out=rms)
+    np.max(loads, axis=1, out=peak)
+    np.mean(loads, axis=1, out=kurtosis_proxy)  # mean, turned into peak / mean below
+    positive = kurtosis_proxy > 0
+    np.divide(peak, kurtosis_proxy, out=kurtosis_proxy, where=positive)
+    if not positive.all():
+        kurtosis_proxy[~positive] = 0
+
+    # 4. Exogenous
+    out[:, 2 * lag_window + 3] = is_workday
+    return out
+
+
+class FeatureBuffer:
+    """
+    Preallocated arrays for extracting features of `n_rows` windows.
+    Fill `loads` / `temps` in place, then call compute(); the output array is reused across calls.
+    """
+    __slots__ = ("loads", "temps", "out", "scratch")
+
+    def __init__(self, n_rows: int = 1, lag_window: int = LAG_WINDOW):
+        self.loads = np.zeros((n_rows, lag_window))
+        self.temps = np.zeros((n_rows, lag_window))
+        self.out = np.zeros((n_rows, n_features(lag_window)))
+        self.scratch = np.empty((n_rows, lag_window))
+
+    def compute(self, is_workday) -> np.ndarray:
+        return compute_features(self.loads, self.temps, is_workday, self.out, self.scratch)
+
+
+class RollingFeatureState:
+    """
+    Incremental window state of one feeder for online inference.
+    Keeps a ring of the last `lag_window` loads/temps, a running sum and sum of squares,
+    and a monotonic deque for the window max, so each new reading is O(1).
+    """
+    RESYNC_EVERY = 1024  # Pushes between exact recomputations of the running sums (bounds float drift)
+
+    def __init__(self, lag_window: int = LAG_WINDOW):
+        self.lag_window = lag_window
+        self.loads = np.zeros(lag_window)
+        self.temps = np.zeros(lag_window)
+        self.count = 0              # Readings pushed so far
+        self.load_sum = 0.0
+        self.load_sumsq = 0.0
+        self.is_workday = False     # Activity flag of the latest reading
+        self._max = deque()         # (sequence, load), loads strictly decreasing
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window has been pushed."""
+        return self.count >= self.lag_window
+
+    def push(self, load_kw: float, temperature: float, is_workday: bool) -> bool:
+        """Adds a reading, evicting the oldest one once the window is full. Returns `ready`."""
+        pos = self.count % self.lag_window
+        if self.count >= self.lag_window:
+            old = self.loads[pos]
+            self.load_sum -= old
+            self.load_sumsq -= old * old
+        self.loads[pos] = load_kw
+        self.temps[pos] = temperature
+        self.load_sum += load_kw
+        self.load_sumsq += load_kw * load_kw
+        self.is_workday = is_workday
+
+        # Monotonic max: drop smaller loads behind the new one, then expired ones in front
+        while self._max and self._max[-1][1] <= load_kw:
+            self._max.pop()
+        self._max.append((self.count, load_kw))
+        if self._max[0][0] <= self.count - self.lag_window:
+            self._max.popleft()
+
+        self.count += 1
+        if self.count % self.RESYNC_EVERY == 0:
+            self.load_sum = float(np.sum(self.loads))
+            self.load_sumsq = float(np.sum(self.loads * self.loads))
+        return self.ready
+
+    def write_features(self, out: np.ndarray) -> np.ndarray:
+        """Writes the current feature vector (same layout as compute_features) into the 1-D `out`."""
+        lag_window = self.lag_window
+        oldest = self.count % lag_window
+        tail = lag_window - oldest
+
+        # 1. Lagged Loads and 2. Lagged Temps, oldest first
+        out[:tail] = self.loads[oldest:]
+        out[tail:lag_window] = self.loads[:oldest]
+        out[lag_window:lag_window + tail] = self.temps[oldest:]
+        out[lag_window + tail:2 * lag_window] = self.temps[:oldest]
+
+        # 3. Statistical Features from the running aggregates
+        mean = self.load_sum / lag_window
+        peak = self._max[0][1]
+        out[2 * lag_window] = math.sqrt(max(self.load_sumsq / lag_window, 0.0))
+        out[2 * lag_window + 1] = peak
+        out[2 * lag_window + 2] = peak / mean if mean > 0 else 0
+
+        # 4. Exogenous
+        out[2 * lag_window + 3] = 1 if self.is_workday else 0
+        return out
+
+
+def prepare_features(df: pd.DataFrame, lag_window: int = LAG_WINDOW):
+    """
+    Phase 1: Fast Feature Extraction.
+    Creates a flattened vector from the last `lag_window` intervals for every row.
+
+    Vector layout: [load_t-L..., temp_t-L..., rms, peak, kurtosis_proxy, workday]
+    Target: risk label of the row right after the window (forecasting the FUTURE risk).
+
+    Returns:
+        X: (len(df) - lag_window, n_features) float64 matrix
+        y: (len(df) - lag_window,) int64 targets
+    """
+    n_rows = max(len(df) - lag_window, 0)
+    X = np.empty((n_rows, n_features(lag_window)))
+    if n_rows == 0:
+        return X, np.empty(0, dtype=np.int64)
+
+    # (n_rows, lag_window) views: window k covers rows k .. k+lag_window-1 and predicts row k+lag_window
+    loads = sliding_window_view(df['load_kw'].to_numpy(dtype=np.float64), lag_window)[:n_rows]
+    temps = sliding_window_view(df['temperature'].to_numpy(dtype=np.float64), lag_window)[:n_rows]
+    # Activity flag of the predicted interval
+    is_workday = df['is_workday'].to_numpy(dtype=bool)[lag_window:]
+
+    compute_features(loads, temps, is_workday, out=X)
+
+    y = df['risk_label'].to_numpy(dtype=np.int64)[lag_window:]
+    return X, y
@@ -0,0 +1,174 @@
+# backend/app/core/loop_monitor.py
+"""
+Event-loop lag and blocking-call detector.
+
+A sampler task sleeps `interval` on the event loop and records how late it
+wakes up (fluxeon_event_loop_lag_ms): under a healthy loop that is ~0, any
+CPU work done on the loop (sklearn calls, pandas, big JSON bodies) shows up
+as lag for every callback handler waiting behind it.
+
+A watchdog thread watches the sampler's heartbeat. When the loop has not
+come back for longer than the block threshold, it grabs the loop thread's
+current stack with sys._current_frames(), i.e. the code that is blocking,
+while it is still blocking. Reports are kept in a small ring buffer
+(GET /metrics/blocking) and counted in fluxeon_event_loop_blocked_total.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Lag sampler (on the loop) + blocking watchdog (own thread)."""
+
+    def __init__(
+        self,
+        interval_s: float = 0.05,
+        block_threshold_ms: float = 100.0,
+        max_reports: int = 50,
+        max_frames: int = 30
+    ):
+        """
+        Args:
+            interval_s: Sampler period (lag resolution)
+            block_threshold_ms: Lag beyond which the loop's stack is captured
+            max_reports: Blocking reports kept (oldest dropped first)
+            max_frames: Innermost frames kept per captured stack
+        """
+        self.interval_s = interval_s
+        self.block_threshold_ms = block_threshold_ms
+        self.max_frames = max_frames
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self.samples = 0
+        self.blocked = 0
+        self.max_lag_ms = 0.0
+        self._lag = metrics.event_loop_lag_ms.labels()
+        self._blocked = metrics.event_loop_blocked.labels()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._heartbeat = 0.0                       # perf_counter of the sampler's last wake-up
+        self._reported_beat: Optional[float] = None # Heartbeat whose stall was already captured
+        self._open_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"✓ Event loop monitor started (every {self.interval_s * 1000:.0f} ms, blocking threshold {self.block_threshold_ms:.0f} ms)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._watchdog.join, 1.0)
+        self._watchdog = None
+
+    # ------------------------------------------------------------------------
+    # SAMPLER (event loop)
+    # ------------------------------------------------------------------------
+
+    async def _sample(self):
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            lag_ms = max(now - expected, 0.0) * 1000
+            self._heartbeat = now
+            self.samples += 1
+            self._lag.record(lag_ms)
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+            report = self._open_report
+            if report is not None:
+                # The block the watchdog caught is over: record how long it really lasted
+                report["blocked_ms"] = round(max(report["blocked_ms"], lag_ms), 3)
+                self._open_report = None
+
+    # ------------------------------------------------------------------------
+    # WATCHDOG (own thread)
+    # ------------------------------------------------------------------------
+
+    def _watch(self):
+        period = max(self.block_threshold_ms / 4000, 0.005)
+        while not self._stopping.wait(period):
+            beat = self._heartbeat
+            stalled_ms = (time.perf_counter() - beat - self.interval_s) * 1000
+            if stalled_ms >= self.block_threshold_ms and beat != self._reported_beat:
+                self._reported_beat = beat
+                self._capture(stalled_ms)
+
+    def _capture(self, stalled_ms: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)[-self.max_frames:]
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        report = {
+            "detected_at": datetime.now().isoformat(),
+            "blocked_ms": round(stalled_ms, 3),     # Updated to the full duration once the loop is back
+            "task": task.get_name() if task is not None else None,
+            "stack": [f"{f.filename}:{f.lineno} in {f.name}" + (f": {f.line}" if f.line else "") for f in stack],
+        }
+        self.reports.append(report)
+        self._open_report = report
+        self.blocked += 1
+        self._blocked.inc()
+        culprit = stack[-1] if stack else None
+        logger.warning(
+            f"⚠ Event loop blocked for {stalled_ms:.0f}+ ms"
+            + (f" at {culprit.filename}:{culprit.lineno} in {culprit.name}" if culprit else "")
+        )
+
+    # ------------------------------------------------------------------------
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest blocking reports first."""
+        return list(self.reports)[::-1][:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "blocked": self.blocked,
+            "max_lag_ms": self.max_lag_ms,
+            "block_threshold_ms": self.block_threshold_ms,
+        }
+
+
+# Singleton
+loop_monitor = LoopMonitor(
+    interval_s=settings.loop_monitor_interval_ms / 1000,
+    block_threshold_ms=settings.loop_block_threshold_ms
+)
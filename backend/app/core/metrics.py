@@ -0,0 +1,250 @@
+# backend/app/core/metrics.py
+"""
+In-process metrics for FLUXEON, exported in Prometheus text format at /metrics.
+
+Latencies are recorded in HDR-style (log-linear) histograms: values are kept
+in microsecond buckets with ~1% relative precision from 1 µs up to days, so
+p50/p99/p99.9 stay accurate under load while recording stays O(1) and
+allocation-free. Histograms are exported as Prometheus summaries.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Log-linear bucketing: values below 2^SUB_BUCKET_BITS µs get one bucket each,
+# every further power of two is split into 2^(SUB_BUCKET_BITS - 1) buckets
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+MAX_EXPONENT = 40                      # 2^47 µs ~ 4.5 years: plenty
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+Labels = Dict[str, str]
+
+
+def bucket_index(value_us: int) -> int:
+    if value_us < SUB_BUCKETS:
+        return value_us
+    exponent = value_us.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (exponent - 1) * HALF_BUCKETS + (value_us >> exponent) - HALF_BUCKETS
+
+
+def bucket_value(index: int) -> float:
+    """Midpoint (µs) of the values that land in a bucket."""
+    if index < SUB_BUCKETS:
+        return float(index)
+    exponent = (index - SUB_BUCKETS) // HALF_BUCKETS + 1
+    mantissa = (index - SUB_BUCKETS) % HALF_BUCKETS + HALF_BUCKETS
+    return ((mantissa << exponent) + ((1 << exponent) - 1) / 2)
+
+# ============================================================================
+# METRIC TYPES
+# ============================================================================
+
+class Histogram:
+    """Latency histogram (milliseconds in, milliseconds out)."""
+
+    def __init__(self):
+        self._counts = [0] * (SUB_BUCKETS + MAX_EXPONENT * HALF_BUCKETS)
+        self._lock = threading.Lock()   # Recorded from the event loop and worker threads
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float):
+        value_us = min(max(int(value_ms * 1000), 0), (1 << (MAX_EXPONENT + SUB_BUCKET_BITS - 1)) - 1)
+        index = bucket_index(value_us)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            if value_ms > self.max_ms:
+                self.max_ms = value_ms
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Records the duration of the `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record((time.perf_counter() - start) * 1000)
+
+    def percentiles(self, quantiles: Sequence[float] = QUANTILES) -> List[float]:
+        """Values (ms) at the given quantiles, in one pass over the buckets."""
+        with self._lock:
+            counts, count, max_ms = list(self._counts), self.count, self.max_ms
+        if count == 0:
+            return [math.nan] * len(quantiles)
+        targets = [max(1, math.ceil(q * count)) for q in quantiles]
+        order = sorted(range(len(targets)), key=targets.__getitem__)
+        values = [max_ms] * len(targets)
+        seen, next_target = 0, 0
+        for index, bucket_count in enumerate(counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while next_target < len(order) and seen >= targets[order[next_target]]:
+                values[order[next_target]] = min(bucket_value(index) / 1000, max_ms)
+                next_target += 1
+            if next_target == len(order):
+                break
+        return values
+
+    def percentile(self, quantile: float) -> float:
+        return self.percentiles((quantile,))[0]
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricFamily:
+    """One metric name with a child per label combination."""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_names: Sequence[str], factory: Callable):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> List[Tuple[Labels, object]]:
+        return [(dict(zip(self.label_names, key)), child) for key, child in list(self._children.items())]
+
+    def clear(self):
+        """Drops every child (load tests measure each run from zero)."""
+        with self._lock:
+            self._children.clear()
+
+# ============================================================================
+# REGISTRY + PROMETHEUS TEXT FORMAT
+# ============================================================================
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def stats_samples(stats: Dict, nested_labels: Optional[Dict[str, str]] = None) -> List[Tuple[str, Labels, float]]:
+    """
+    Turns a component's stats() dict into gauge samples: numeric values as-is,
+    nested {key: number} dicts as one labeled series (label name from `nested_labels`).
+    """
+    samples = []
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            samples.append((key, {}, int(value)))
+        elif isinstance(value, (int, float)):
+            samples.append((key, {}, value))
+        elif isinstance(value, dict):
+            label = (nested_labels or {}).get(key, "key")
+            samples += [(key, {label: str(k)}, v) for k, v in value.items() if isinstance(v, (int, float))]
+    return samples
+
+
+class MetricsRegistry:
+    """Holds every metric family and renders the /metrics page."""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.collectors: List[Tuple[str, Callable[[], Iterable[Tuple[str, Labels, float]]]]] = []
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, "summary", label_names, Histogram))
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, "counter", label_names, Counter))
+
+    def collector(self, prefix: str, collect: Callable[[], Iterable[Tuple[str, Labels, float]]]):
+        """Gauges computed at scrape time: collect() yields (suffix, labels, value)."""
+        self.collectors.append((prefix, collect))
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        if family.name in self.families:
+            raise ValueError(f"Metric {family.name} already registered")
+        self.families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in family.children():
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_format_labels(labels)} {_format_value(child.value)}")
+                    continue
+                for q, value in zip(QUANTILES, child.percentiles()):
+                    lines.append(f"{family.name}{_format_labels({**labels, 'quantile': str(q)})} {_format_value(value)}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(child.total_ms)}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {child.count}")
+
+        for prefix, collect in self.collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                lines.append(f"# {prefix} collection failed: {e}")
+                continue
+            typed = set()
+            for suffix, labels, value in samples:
+                name = f"{prefix}_{suffix}"
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Singleton
+registry = MetricsRegistry()
+
+# ============================================================================
+# FLUXEON METRICS
+# ============================================================================
+
+# Beckn flow stages (run_agent); SELECT/INIT/CONFIRM are per provider, send + callback wait
+STAGE_DISCOVER = "discover"
+STAGE_ON_SEARCH_WAIT = "on_search_wait"
+STAGE_SELECT = "select"
+STAGE_INIT = "init"
+STAGE_CONFIRM = "confirm"
+STAGE_END_TO_END = "end_to_end"
+
+beckn_stage_ms = registry.histogram("fluxeon_beckn_stage_ms", "Beckn flow stage latency (ms)", ["stage"])
+beckn_stage_failures = registry.counter("fluxeon_beckn_stage_failures_total", "Beckn flow stages that failed or timed out", ["stage"])
+beckn_callback_ms = registry.histogram("fluxeon_beckn_callback_ms", "Beckn webhook callback handling time (ms)", ["action"])
+# feeder_id values come from telemetry.FEEDERS only (unknown ids get a 404), so the series count is bounded
+inference_ms = registry.histogram("fluxeon_inference_ms", "Risk inference time per feeder, batch time amortized over its feeders (ms)", ["feeder_id"])
+telemetry_tick_ms = registry.histogram("fluxeon_telemetry_tick_ms", "Telemetry tick duration: simulation + inference + encoding (ms)")
+snapshot_age_ms = registry.histogram("fluxeon_snapshot_age_ms", "Age of the telemetry snapshot served by /feeders (ms)")
+event_loop_lag_ms = registry.histogram("fluxeon_event_loop_lag_ms", "Event loop lag: how late a periodic timer wakes up (ms)")
+event_loop_blocked = registry.counter("fluxeon_event_loop_blocked_total", "Event loop stalls longer than LOOP_BLOCK_THRESHOLD_MS (stack captured)")
@@ -0,0 +1,125 @@
+# backend/app/core/native_mlp.py
+"""
+Native NumPy forward pass for the trained MLPClassifier.
+Weights are extracted once at load time, the StandardScaler is folded into the
+first layer, and scoring is a plain float32 matmul -> activation -> argmax.
+This skips sklearn's per-call input validation, which dominates at this model size.
+"""
+import numpy as np
+from typing import List, Optional
+
+DTYPE = np.float32
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _tanh(x: np.ndarray) -> np.ndarray:
+    return np.tanh(x, out=x)
+
+
+def _logistic(x: np.ndarray) -> np.ndarray:
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1
+    return np.reciprocal(x, out=x)
+
+
+def _identity(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+# Hidden-layer activations supported by MLPClassifier (applied in place)
+ACTIVATIONS = {
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+    "identity": _identity,
+}
+
+#--------------------------------------------------------------------------------------------------------------
+class NativeMLP:
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray], classes: np.ndarray, activation: str = "relu"):
+        """
+        Args:
+            weights: Per-layer (n_in, n_out) matrices (first layer already scaler-folded)
+            biases: Per-layer (n_out,) vectors
+            classes: Class label of each output unit (sklearn `classes_`)
+            activation: Hidden-layer activation name (see ACTIVATIONS)
+        """
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+        self.weights = [np.ascontiguousarray(w, dtype=DTYPE) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=DTYPE) for b in biases]
+        self.classes = np.asarray(classes)
+        self.activation = ACTIVATIONS[activation]
+        self.n_features = self.weights[0].shape[0]
+        # Binary classifiers have a single logistic output unit
+        self.binary = self.weights[-1].shape[1] == 1
+
+        # Single-row fast path buffers
+        self._x = np.empty(self.n_features, dtype=DTYPE)
+        self._hidden = [np.empty(w.shape[1], dtype=DTYPE) for w in self.weights]
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None) -> "NativeMLP":
+        """
+        Builds the native network from a fitted MLPClassifier and (optionally) the
+        StandardScaler applied before it. The scaler is folded into layer 1:
+            ((x - mean) / scale) @ W + b == x @ (W / scale) + (b - (mean / scale) @ W)
+        """
+        weights = [np.asarray(w, dtype=np.float64) for w in model.coefs_]
+        biases = [np.asarray(b, dtype=np.float64) for b in model.intercepts_]
+
+        if scaler is not None:
+            n_in = weights[0].shape[0]
+            mean = getattr(scaler, "mean_", None)
+            scale = getattr(scaler, "scale_", None)
+            mean = np.zeros(n_in) if mean is None else np.asarray(mean, dtype=np.float64)
+            scale = np.ones(n_in) if scale is None else np.asarray(scale, dtype=np.float64)
+            biases[0] = biases[0] - (mean / scale) @ weights[0]
+            weights[0] = weights[0] / scale[:, None]
+
+        return cls(weights, biases, model.classes_, activation=model.activation)
+
+#--------------------------------------------------------------------------------------------------------------
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicts class labels for an (N, n_features) matrix of raw (unscaled) features."""
+        h = np.asarray(X, dtype=DTYPE)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w
+            h += b
+            if i < last:
+                self.activation(h)
+        if self.binary:
+            return self.classes[(h[:, 0] > 0).astype(np.intp)]
+        return self.classes[np.argmax(h, axis=1)]
+
+    def predict_one(self, x: np.ndarray) -> int:
+        """Single-row fast path: no allocations, returns the class label as int."""
+        h = self._x
+        h[:] = x
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, self._hidden)):
+            np.dot(h, w, out=out)
+            out += b
+            if i < last:
+                self.activation(out)
+            h = out
+        if self.binary:
+            return int(self.classes[1 if h[0] > 0 else 0])
+        return int(self.classes[int(np.argmax(h))])
+
+
+def try_build(model, scaler=None) -> Optional[NativeMLP]:
+    """Builds a NativeMLP, or returns None when the model can't be mapped (e.g. multilabel)."""
+    try:
+        if getattr(model, "out_activation_", "softmax") not in ("softmax", "logistic"):
+            return None
+        return NativeMLP.from_sklearn(model, scaler)
+    except (AttributeError, ValueError) as e:
+        print(f"⚠ Native MLP unavailable, using sklearn path: {e}")
+        return None
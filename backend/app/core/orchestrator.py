@@ -0,0 +1,198 @@
+# backend/app/core/orchestrator.py
+"""
+Orchestration engine for FLUXEON.
+Runs many run_agent() flows concurrently on a bounded pool of async workers.
+Flows are scheduled by risk level (critical first, then FIFO), and a feeder can
+only have one queued or in-flight flow per flexibility window.
+"""
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FlowKey = Tuple[str, datetime, datetime]   # (feeder_id, window_start, window_end)
+FlowRunner = Callable[..., Awaitable[Dict[str, Any]]]
+
+# ============================================================================
+# FLOW REQUESTS
+# ============================================================================
+
+@dataclass(order=True)
+class FlowRequest:
+    """One queued run_agent() call. Ordered by (-risk_level, arrival)."""
+    priority: int
+    sequence: int
+    feeder_id: str = field(compare=False)
+    risk_level: int = field(compare=False)
+    flexibility_kw: float = field(compare=False)
+    window_start: datetime = field(compare=False)
+    window_end: datetime = field(compare=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+
+    @property
+    def key(self) -> FlowKey:
+        return (self.feeder_id, self.window_start, self.window_end)
+
+def _consume_exception(future: asyncio.Future):
+    """Fire-and-forget submissions: the failure is already logged by the worker."""
+    if not future.cancelled():
+        future.exception()
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class OrchestrationEngine:
+    """Bounded-concurrency scheduler around run_agent()."""
+
+    def __init__(self, max_workers: int = settings.orchestrator_max_workers, runner: Optional[FlowRunner] = None):
+        """
+        Args:
+            max_workers: Flows allowed to run at the same time
+            runner: Coroutine executing one flow (defaults to beckn_client.run_agent)
+        """
+        self.max_workers = max_workers
+        self._runner = runner
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._flows: Dict[FlowKey, FlowRequest] = {}   # Queued + in-flight, for deduplication
+        self._sequence = itertools.count()
+        self.in_flight = 0
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0      # Flows whose result reports success
+        self.unsuccessful = 0   # Flows that returned an error/partial result ({"success": False} or no flag)
+        self.failed = 0         # Flows whose runner raised
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Spawns the worker pool (app startup)."""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_workers)]
+        logger.info(f"✓ Orchestration engine started ({self.max_workers} workers)")
+
+    async def stop(self):
+        """Cancels the workers and every queued or in-flight flow (app shutdown)."""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for request in self._flows.values():
+            request.future.cancel()
+        self._flows.clear()
+        self._queue = None
+        self.in_flight = 0
+
+    def submit(
+        self,
+        feeder_id: str,
+        risk_level: int,
+        flexibility_kw: float,
+        window_start: datetime,
+        window_end: datetime
+    ) -> asyncio.Future:
+        """
+        Queues a flow and returns a future with its run_agent() result.
+        If the same feeder already has a flow for this window, that flow's future
+        is returned instead of queueing a duplicate.
+        """
+        self._ensure_started()
+        key = (feeder_id, window_start, window_end)
+        existing = self._flows.get(key)
+        if existing is not None:
+            self.deduplicated += 1
+            logger.info(f"↺ Flow for {feeder_id} [{window_start.isoformat()}] already queued/in flight")
+            return existing.future
+
+        request = FlowRequest(
+            priority=-risk_level,
+            sequence=next(self._sequence),
+            feeder_id=feeder_id,
+            risk_level=risk_level,
+            flexibility_kw=flexibility_kw,
+            window_start=window_start,
+            window_end=window_end,
+            future=asyncio.get_running_loop().create_future()
+        )
+        request.future.add_done_callback(_consume_exception)
+        self._flows[key] = request
+        self._queue.put_nowait(request)
+        self.submitted += 1
+        return request.future
+
+    async def run(self, feeder_id: str, risk_level: int, flexibility_kw: float, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+        """Submits a flow and waits for its result. Cancelling the caller doesn't cancel the shared flow."""
+        future = self.submit(feeder_id, risk_level, flexibility_kw, window_start, window_end)
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "unsuccessful": self.unsuccessful,
+            "failed": self.failed,
+        }
+
+    async def _worker(self, worker_id: int):
+        while True:
+            request: FlowRequest = await self._queue.get()
+            if request.future.done():  # Cancelled while queued
+                self._flows.pop(request.key, None)
+                self._queue.task_done()
+                continue
+            self.in_flight += 1
+            try:
+                result = await self._run_flow(request)
+                if not request.future.done():
+                    request.future.set_result(result)
+                if result.get("success"):
+                    self.completed += 1
+                else:
+                    self.unsuccessful += 1
+            except asyncio.CancelledError:
+                request.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"✗ Flow for {request.feeder_id} failed: {e}")
+                if not request.future.done():
+                    request.future.set_exception(e)
+                self.failed += 1
+            finally:
+                self.in_flight -= 1
+                self._flows.pop(request.key, None)
+                self._queue.task_done()
+
+    async def _run_flow(self, request: FlowRequest) -> Dict[str, Any]:
+        runner = self._runner
+        if runner is None:
+            from app.core.beckn_client import run_agent
+            runner = run_agent
+        return await runner(
+            feeder_id=request.feeder_id,
+            risk_level=request.risk_level,
+            flexibility_kw=request.flexibility_kw,
+            window_start=request.window_start,
+            window_end=request.window_end
+        )
+
+
+# Singleton
+orchestrator = OrchestrationEngine()
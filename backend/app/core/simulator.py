@@ -8,6 +8,15 @@ import pandas as pd
 from datetime import datetime, timedelta
 from app.models.feeder import FeederReading
 
+# Columnar layout returned by GridSimulator.get_readings (one field per FeederReading attribute)
+READING_DTYPE = np.dtype([
+    ("timestamp", "datetime64[us]"),
+    ("load_kw", np.float64),
+    ("temperature", np.float64),
+    ("is_workday", np.bool_),
+    ("risk_label", np.int64),
+])
+
 class GridSimulator:
     # Configuration aligned with UK Power Networks
     def __init__(self):
@@ -17,24 +26,33 @@ class GridSimulator:
         # Simulation State
         self.current_time = datetime.now()
         self.data_buffer = [] # Stores recent history
+        self.rng = np.random.default_rng() # Generator for the vectorized engine
 
 #--------------------------------------------------------------------------------------------------------------
-    def _generate_base_load(self, decimal_hour: float, is_workday: bool) -> float:
-        """Generates sinusoidal wave for daily consumption."""
+    def _generate_base_load(self, decimal_hour, is_workday, max_capacity_kw=None, peak_scale=1.0, peak_shift=0.0):
+        """
+        Generates sinusoidal wave for daily consumption.
+        Works on scalars or NumPy arrays (elementwise, with broadcasting), so per-feeder
+        profiles can be passed as arrays:
+            max_capacity_kw: Feeder rating (defaults to this simulator's capacity)
+            peak_scale: Amplitude of the morning/evening peaks relative to the default shape
+            peak_shift: Hours by which the daily curve is shifted (negative = earlier peaks)
+        """
+        if max_capacity_kw is None:
+            max_capacity_kw = self.max_capacity_kw
+        decimal_hour = decimal_hour - peak_shift
         # Morning peak (8 AM) and Evening peak (6 PM)
         morning_curve = 0.4 * np.sin(2 * np.pi * (decimal_hour - 8) / 16)
         evening_curve = 0.35 * np.sin(2 * np.pi * (decimal_hour - 18) / 24)
         # Base load calculation
-        base = (morning_curve + evening_curve + 1.5) * (self.max_capacity_kw * 0.3)
+        base = (peak_scale * (morning_curve + evening_curve) + 1.5) * (max_capacity_kw * 0.3)
         # After midnight curve (00:00 - 06:00) - Low consumption
-        if decimal_hour < 6:
-            # Smooth curve: lowest at 3 AM, rising to normal by 6 AM
-            night_factor = 1.0 - 0.5 * np.exp(-((decimal_hour - 3) ** 2) / 3)
-            base *= night_factor
+        # Smooth curve: lowest at 3 AM, rising to normal by 6 AM
+        night_factor = 1.0 - 0.5 * np.exp(-((decimal_hour - 3) ** 2) / 3)
+        base = np.where(decimal_hour < 6, base * night_factor, base)
         # Weekend consumption is typically lower
-        if not is_workday:
-            base *= 0.85
-        return max(base, 100.0) # Minimum load floor
+        base = np.where(is_workday, base, base * 0.85)
+        return np.maximum(base, 100.0) # Minimum load floor
 
 #--------------------------------------------------------------------------------------------------------------
     def get_reading(self, timestamp: datetime = None, inject_spikes: bool = True) -> FeederReading:
@@ -90,79 +108,161 @@ class GridSimulator:
         )
 
 #--------------------------------------------------------------------------------------------------------------
-    def generate_history(self, days=30, interval_mins=15) -> pd.DataFrame:
-        """Generates a large dataset for training the AI model."""
-        data = []
-        start_time = datetime.now() - timedelta(days=days)
+    def get_readings(self, timestamps, feeder_ids=None, inject_spikes=True) -> np.ndarray:
+        """
+        Batch version of get_reading: many timestamps x many feeders in one vectorized call.
+        
+        Args:
+            timestamps: Sequence of datetimes (or a DatetimeIndex)
+            feeder_ids: Feeder identifiers, one output row each (None = single feeder)
+            inject_spikes: Bool, or one bool per timestamp to enable fault spikes selectively
+        
+        Returns:
+            Structured array of READING_DTYPE with shape (n_feeders, n_timestamps).
+            Each feeder gets independent noise; access columns as block["load_kw"], etc.
+        """
+        timestamps = pd.DatetimeIndex(timestamps)
+        n_feeders = 1 if feeder_ids is None else len(feeder_ids)
+        shape = (n_feeders, len(timestamps))
+        
+        decimal_hour = np.asarray(timestamps.hour + timestamps.minute / 60.0, dtype=float)
+        is_workday = np.asarray(timestamps.weekday < 5)
+        
+        load, temp = self._simulate_clean(decimal_hour, is_workday, self.rng, shape=shape)
+        spike_mask = np.broadcast_to(np.asarray(inject_spikes, dtype=bool), (len(timestamps),))
+        if spike_mask.any():
+            load = self._inject_spikes(load, self.rng, spike_mask)
+        
+        block = np.empty(shape, dtype=READING_DTYPE)
+        block["timestamp"] = timestamps.values
+        block["load_kw"] = np.round(load, 2)
+        block["temperature"] = np.round(temp, 1)
+        block["is_workday"] = is_workday
+        block["risk_label"] = self._risk_labels(load)
+        return block
+
+#--------------------------------------------------------------------------------------------------------------
+    def _simulate_clean(self, decimal_hour, is_workday, rng, shape=None):
+        """
+        Vectorized equivalent of get_reading(inject_spikes=False).
+        Returns (load, temp) arrays of `shape` (defaults to the shape of decimal_hour).
+        """
+        if shape is None:
+            shape = np.shape(decimal_hour)
+        load = np.broadcast_to(self._generate_base_load(decimal_hour, is_workday), shape)
+        
+        # Temperature: colder at night, warmer at noon (+ sensor noise)
+        temp = 12 + 5 * np.sin(2 * np.pi * (decimal_hour - 14) / 24)
+        temp = temp + rng.normal(0, 1.0, size=shape)
+        
+        # Heating effect and grid noise
+        load = np.where(temp < 8, load * 1.1, load)
+        load = load + rng.normal(0, 45, size=shape)
+        return load, temp
+
+    def _inject_spikes(self, load: np.ndarray, rng, mask=True) -> np.ndarray:
+        """
+        Vectorized fault spikes (same odds as get_reading) where `mask` is True.
+        12% Critical spike (96%-120% capacity), 10% Warning spike (86%-94% capacity).
+        """
+        rand_val = rng.random(load.shape)
+        critical = (rand_val < 0.12) & mask
+        warning = (rand_val >= 0.12) & (rand_val < 0.22) & mask
+        load = np.where(critical, self.max_capacity_kw * rng.uniform(0.96, 1.20, load.shape), load)
+        load = np.where(warning, self.max_capacity_kw * rng.uniform(0.86, 0.94, load.shape), load)
+        return load
+
+    def _risk_labels(self, load: np.ndarray) -> np.ndarray:
+        """Vectorized physics labels: 0 (Normal), 1 (Warning), 2 (Critical)."""
+        risk = np.zeros(np.shape(load), dtype=np.int64)
+        risk[load >= self.max_capacity_kw * self.warning_threshold] = 1
+        risk[load >= self.max_capacity_kw * self.critical_threshold] = 2
+        return risk
+
+    @staticmethod
+    def _ramp_events(limit: int, rng):
+        """
+        Start positions (all < limit) and durations of the ramp-up events.
+
+        Scanning interval by interval, a real event starts with p = 0.05 * 0.7 and,
+        once started, its 3-6 intervals are skipped. The k-th event therefore starts
+        after k geometric waits (gaps - 1 failures each) plus the k - 1 earlier
+        durations, so all starts can be drawn at once with cumulative sums.
+        """
+        # Each event consumes at least 3 intervals (no wait + 3 ramp steps)
+        max_events = limit // 3 + 1
+        gaps = rng.geometric(0.05 * 0.7, size=max_events)
+        durations = rng.integers(3, 7, size=max_events) # 3 to 6 intervals (45m - 1.5h)
+        starts = np.cumsum(gaps - 1) + np.concatenate(([0], np.cumsum(durations[:-1])))
+        n_events = int(np.searchsorted(starts, limit))
+        return starts[:n_events], durations[:n_events]
+
+    def _inject_ramps(self, load: np.ndarray, rng) -> np.ndarray:
+        """
+        Injects ramp-up events into `load` in place and returns the touched indices.
+        Same process as the original interval scan, see _ramp_events.
+        """
+        limit = len(load) - 10
+        if limit <= 0:
+            return np.empty(0, dtype=np.int64)
+        starts, durations = self._ramp_events(limit, rng)
+        n_events = len(starts)
+        
+        # Critical (40%) or Warning (30%) relative to the 70% of non-'none' events
+        is_critical = rng.random(n_events) < 0.4 / 0.7
+        target_factor = np.where(
+            is_critical,
+            rng.uniform(1.05, 1.25, n_events), # > 100%
+            rng.uniform(0.88, 0.94, n_events)  # Warning zone
+        )
+        peak_load = self.max_capacity_kw * target_factor
+        start_load = load[starts]
+        
+        # Flatten all ramps: step k of event e lands on starts[e] + k
+        ramp_start = np.repeat(np.cumsum(durations) - durations, durations)
+        step = np.arange(int(durations.sum())) - ramp_start
+        idx = np.repeat(starts, durations) + step
+        progress = (step + 1) / np.repeat(durations, durations)
+        
+        # Linear interpolation + ramp noise so it's not perfectly linear
+        ramp = np.repeat(start_load, durations) + np.repeat(peak_load - start_load, durations) * progress
+        load[idx] = ramp + rng.normal(0, 35, size=len(idx))
+        return idx
+
+    def generate_history(self, days=30, interval_mins=15, seed=None, start_time=None) -> pd.DataFrame:
+        """
+        Generates a large dataset for training the AI model.
+        Fully array-based: the whole timestamp vector is simulated in one pass.
+        Pass `seed` (and `start_time`) for a reproducible dataset.
+        """
+        rng = np.random.default_rng(seed) if seed is not None else self.rng
+        if start_time is None:
+            start_time = datetime.now() - timedelta(days=days)
         total_points = int(days * 24 * 60 / interval_mins)
         
         print(f"Generating {total_points} data points for training...")
         
-        # 1. Generate Base Load (Clean)
-        for i in range(total_points):
-            ts = start_time + timedelta(minutes=i * interval_mins)
-            # We use get_reading but force NO random spikes first
-            # We will inject them manually later to create "Ramps"
-            reading = self.get_reading(ts, inject_spikes=False)
-            data.append(reading.dict())
-            
-        df = pd.DataFrame(data)
+        timestamps = pd.date_range(start=start_time, periods=total_points, freq=pd.Timedelta(minutes=interval_mins))
+        decimal_hour = np.asarray(timestamps.hour + timestamps.minute / 60.0, dtype=float)
+        is_workday = np.asarray(timestamps.weekday < 5)
+        
+        # 1. Generate Base Load (Clean) - labels use the unrounded load, like get_reading
+        load, temp = self._simulate_clean(decimal_hour, is_workday, rng)
+        risk = self._risk_labels(load)
+        load = np.round(load, 2)
+        temp = np.round(temp, 1)
         
         # 2. Inject Ramp-up Peaks (Forecasting Precursors)
-        # We iterate and inject events every ~20-40 intervals
-        i = 0
-        while i < len(df) - 10:
-            # Randomly decide to inject an event
-            if np.random.random() < 0.05: # 5% chance per interval to start an event
-                
-                # Decide type: Critical (12%) or Warning (10%) - relative to total events
-                event_type = np.random.choice(['critical', 'warning', 'none'], p=[0.4, 0.3, 0.3])
-                
-                if event_type == 'none':
-                    i += 1
-                    continue
-                    
-                duration = np.random.randint(3, 7) # Variable duration: 3 to 6 intervals (45m - 1.5h)
-                
-                # Target Peak Load
-                if event_type == 'critical':
-                    target_factor = np.random.uniform(1.05, 1.25) # > 100%
-                else:
-                    target_factor = np.random.uniform(0.88, 0.94) # Warning zone
-                
-                peak_load = self.max_capacity_kw * target_factor
-                
-                # Create Ramp
-                # We want to go from current load to peak_load in 'duration' steps
-                start_load = df.at[i, 'load_kw']
-                
-                for step in range(duration):
-                    if i + step >= len(df): break
-                    
-                    # Linear interpolation + some noise
-                    progress = (step + 1) / duration
-                    current_target = start_load + (peak_load - start_load) * progress
-                    
-                    # Add randomness to the ramp so it's not perfectly linear
-                    noise = np.random.normal(0, 35) # Increased ramp noise from 15 to 35
-                    new_load = current_target + noise
-                    
-                    # Update DataFrame
-                    df.at[i+step, 'load_kw'] = new_load
-                    
-                    # Update Risk Label
-                    if new_load >= self.max_capacity_kw * self.critical_threshold:
-                        df.at[i+step, 'risk_label'] = 2
-                    elif new_load >= self.max_capacity_kw * self.warning_threshold:
-                        df.at[i+step, 'risk_label'] = 1
-                    else:
-                        df.at[i+step, 'risk_label'] = 0
-                
-                i += duration # Skip the event duration
-            else:
-                i += 1
-            
-        return df
+        idx = self._inject_ramps(load, rng)
+        risk[idx] = self._risk_labels(load[idx])
+        
+        return pd.DataFrame({
+            "timestamp": timestamps,
+            "load_kw": load,
+            "temperature": temp,
+            "is_workday": is_workday,
+            "risk_label": risk
+        })
 
 #--------------------------------------------------------------------------------------------------------------
 # Singleton instance
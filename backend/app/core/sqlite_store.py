@@ -0,0 +1,666 @@
+# backend/app/core/sqlite_store.py
+"""
+SQLite (WAL) transaction store backend for multi-worker deployments.
+Every uvicorn worker opens the same local database file, so a Beckn callback
+handled by one worker is visible to the worker waiting in run_agent.
+
+- Writes are queued to a committer thread, which owns the write transaction:
+  it takes the write lock (BEGIN IMMEDIATE, retried while another worker holds
+  it), applies queued writes as they arrive and commits a few milliseconds
+  later, or as soon as `batch_size` writes have accumulated. Synchronous store
+  methods return once their write is applied; reads on the same connection
+  see the uncommitted writes. From the event loop, `await store.submit(...)`
+  queues the same calls without blocking the loop and resumes once they are
+  committed; flush() is the durability barrier for everything queued so far.
+- A commit that fails is rolled back and the batch re-applied, up to
+  COMMIT_RETRIES times; after that the submit() callers get the error.
+- Hot fields (obp_id, feeder_id, status, created_at) are columns with indexes;
+  the rest of the transaction (allocations, payloads, metrics) is JSON.
+- Status changes are also appended to a `changes` table. Each worker polls
+  PRAGMA data_version (cheap, changes only when another connection commits)
+  and hands new changes from other workers to its listeners (notify_status),
+  so waiters wake within a poll interval.
+
+Unlike the in-memory backend there is no LRU/TTL eviction and no audit
+journal: the database file itself is the durable audit record, so rows are
+kept until they are removed explicitly.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.transaction_store import (
+    TransactionStoreBase, ChangeListener, HISTORY_LOG_SIZE, INDEXED_FIELDS
+)
+from app.models.beckn import BecknTransaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+CHANGES_KEPT = 10000   # Rows left in `changes` after pruning
+PRUNE_EVERY = 100      # Commits between prunes
+COMMIT_RETRIES = 3     # Attempts at committing a batch before its writes fail
+BUSY_TIMEOUT_S = 10.0  # How long BEGIN IMMEDIATE waits for another worker's write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id TEXT PRIMARY KEY,
+    obp_id TEXT,
+    feeder_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_feeder ON transactions (feeder_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_transactions_status ON transactions (status, created_at);
+CREATE INDEX IF NOT EXISTS ix_transactions_created ON transactions (created_at);
+
+CREATE TABLE IF NOT EXISTS obp_ids (
+    obp_id TEXT PRIMARY KEY,
+    transaction_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_obp_ids_transaction ON obp_ids (transaction_id);
+
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_history_transaction ON history (transaction_id, seq);
+
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    provider_id TEXT,
+    origin TEXT NOT NULL
+);
+"""
+
+COLUMNS = "transaction_id, obp_id, feeder_id, status, created_at, expires_at, body"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class _Write:
+    """A queued write: `fn` runs on the committer thread (None = flush barrier)."""
+    __slots__ = ("fn", "future", "durable", "result")
+
+    def __init__(self, fn: Optional[Callable[[], Any]], durable: bool):
+        self.fn = fn
+        self.future: Future = Future()
+        self.durable = durable   # Resolve once committed rather than once applied
+        self.result: Any = None
+
+
+def _queued(method):
+    """Runs a write method on the committer thread, inside the open batch."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if threading.current_thread() is self._committer:
+            return method(self, *args, **kwargs)  # Nested call or submit(): already in the batch
+        return self._enqueue(functools.partial(method, self, *args, **kwargs)).future.result()
+    return wrapper
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class SqliteTransactionStore(TransactionStoreBase):
+    """Transaction store shared by every worker through one SQLite file."""
+
+    def __init__(
+        self,
+        path: str,
+        commit_interval_s: float = 0.005,
+        batch_size: int = 256,
+        poll_interval_s: float = 0.01
+    ):
+        """
+        Args:
+            path: Database file (created with its directory if missing)
+            commit_interval_s: How long a write batch stays open before it's committed
+            batch_size: Commit early once this many writes are pending
+            poll_interval_s: How often other workers' commits are checked for
+        """
+        self.path = path
+        self.commit_interval_s = commit_interval_s
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"   # Tags this process's changes
+        self.listeners: List[ChangeListener] = []
+        # Counters
+        self.writes = 0
+        self.commits = 0
+        self.failed_writes = 0
+        self.last_error: Optional[str] = None
+        self.changes_received = 0
+        # Write connection: written by the committer thread, read by everyone.
+        # No busy timeout: BEGIN IMMEDIATE is retried without holding the lock,
+        # so readers never wait behind another worker's write lock.
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect(timeout=0.0)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()   # Held for one applied write, a commit or a read
+        self._in_batch = False
+        self._pending = 0
+        self._queue: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._committer: Optional[threading.Thread] = None
+        self._committer_lock = threading.Lock()
+        # Change polling (event loop only)
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._change_cursor = 0
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def _connect(self, timeout: float = BUSY_TIMEOUT_S) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoint, never corrupt
+        return conn
+
+    # ------------------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------------------
+
+    async def start(self):
+        """Starts polling for changes committed by other workers."""
+        if self._poll_task is not None:
+            return
+        self._watch = self._connect()
+        self._data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        self._change_cursor = self._watch.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        self._poll_task = asyncio.create_task(self._poll())
+        logger.info(
+            f"✓ SQLite transaction store at {self.path} (worker {self.origin}); "
+            f"no eviction or audit journal, the database is the audit record"
+        )
+
+    async def stop(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+            self._watch.close()
+            self._watch = None
+        await asyncio.to_thread(self.close)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commits every write queued so far now. False on timeout or commit failure."""
+        barrier = self._enqueue(None)
+        try:
+            return barrier.future.result(timeout)
+        except TimeoutError:
+            return False
+
+    def close(self):
+        """Commits pending writes and stops the committer thread (a new write restarts it)."""
+        with self._committer_lock:
+            thread = self._committer
+            if thread is None:
+                return
+            self._queue.put(None)
+            thread.join()
+            self._committer = None
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs fn(*args, **kwargs), typically a few store calls, on the committer
+        thread as one unit. The event loop isn't blocked; resumes once committed
+        (raises if the commit failed for good).
+        """
+        write = self._enqueue(functools.partial(fn, *args, **kwargs), durable=True)
+        return await asyncio.wrap_future(write.future)
+
+    # ------------------------------------------------------------------------
+    # MAPPING-STYLE READS
+    # ------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT transaction_id FROM transactions ORDER BY created_at")]
+        return iter(ids)
+
+    def get(self, transaction_id: Optional[str], default: Optional[BecknTransaction] = None) -> Optional[BecknTransaction]:
+        found = self._select("WHERE transaction_id = ?", (transaction_id,))
+        return found[0] if found else default
+
+    def values(self) -> List[BecknTransaction]:
+        return self._select("ORDER BY created_at")
+
+    def items(self) -> List[Tuple[str, BecknTransaction]]:
+        return [(transaction.transaction_id, transaction) for transaction in self.values()]
+
+    @_queued
+    def clear(self):
+        with self._write() as conn:
+            for table in ("transactions", "obp_ids", "history", "changes"):
+                conn.execute(f"DELETE FROM {table}")
+
+    # ------------------------------------------------------------------------
+    # WRITES
+    # ------------------------------------------------------------------------
+
+    @_queued
+    def add(self, transaction: BecknTransaction) -> BecknTransaction:
+        """Inserts (or replaces) a transaction, its history and its OBP IDs."""
+        data = transaction.model_dump(mode="json")
+        transaction_id = transaction.transaction_id
+        with self._write() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO transactions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(data))
+            conn.execute("DELETE FROM history WHERE transaction_id = ?", (transaction_id,))
+            conn.executemany(
+                "INSERT INTO history (transaction_id, entry) VALUES (?, ?)",
+                [(transaction_id, _dumps(entry)) for entry in data["history"]]
+            )
+            conn.execute("DELETE FROM obp_ids WHERE transaction_id = ?", (transaction_id,))
+            obp_ids = [data["obp_id"]] + [a.get("obp_id") for a in data["allocations"]]
+            conn.executemany(
+                "INSERT OR REPLACE INTO obp_ids (obp_id, transaction_id) VALUES (?, ?)",
+                [(obp_id, transaction_id) for obp_id in obp_ids if obp_id]
+            )
+            self._record_change(conn, transaction_id, transaction.status.value, None)
+        return transaction
+
+    @_queued
+    def remove(self, transaction_id: str) -> Optional[BecknTransaction]:
+        transaction = self.get(transaction_id)
+        if transaction is None:
+            return None
+        with self._write() as conn:
+            for table in ("transactions", "obp_ids", "history"):
+                conn.execute(f"DELETE FROM {table} WHERE transaction_id = ?", (transaction_id,))
+        return transaction
+
+    @_queued
+    def set_status(self, transaction_id: str, status: TransactionStatus) -> Optional[BecknTransaction]:
+        with self._write() as conn:
+            updated = conn.execute(
+                "UPDATE transactions SET status = ?, body = json_set(body, '$.updated_at', ?) WHERE transaction_id = ?",
+                (status.value, datetime.utcnow().isoformat(), transaction_id)
+            ).rowcount
+            if updated:
+                self._record_change(conn, transaction_id, status.value, None)
+        return self.get(transaction_id) if updated else None
+
+    @_queued
+    def set_obp_id(self, transaction_id: str, obp_id: Optional[str]) -> Optional[BecknTransaction]:
+        transaction = self.get(transaction_id)
+        if transaction is None:
+            return None
+        with self._write() as conn:
+            old = transaction.obp_id
+            if old and old != obp_id and not any(a.get("obp_id") == old for a in transaction.allocations):
+                conn.execute("DELETE FROM obp_ids WHERE obp_id = ? AND transaction_id = ?", (old, transaction_id))
+            conn.execute(
+                "UPDATE transactions SET obp_id = ?, body = json_set(body, '$.updated_at', ?) WHERE transaction_id = ?",
+                (obp_id, datetime.utcnow().isoformat(), transaction_id)
+            )
+            if obp_id:
+                conn.execute("INSERT OR REPLACE INTO obp_ids (obp_id, transaction_id) VALUES (?, ?)", (obp_id, transaction_id))
+        return self.get(transaction_id)
+
+    @_queued
+    def set_response(self, transaction_id: str, payload: Optional[Dict[str, Any]]) -> Optional[BecknTransaction]:
+        """Stores the latest response payload (e.g. a full ON_SEARCH catalog)."""
+        return self._update_body(transaction_id, lambda body: body.update(response_payload=payload))
+
+    @_queued
+    def update(self, transaction_id: str, **fields) -> Optional[BecknTransaction]:
+        """Sets non-indexed fields (quoted_price, provider_id, metrics, ...)."""
+        for name in fields:
+            if name in INDEXED_FIELDS:
+                raise ValueError(f"Use the dedicated store method to change '{name}'")
+        fields = json.loads(_dumps(fields))
+        return self._update_body(transaction_id, lambda body: body.update(fields))
+
+    @_queued
+    def update_metrics(self, transaction_id: str, **metrics) -> Optional[BecknTransaction]:
+        metrics = json.loads(_dumps(metrics))
+        return self._update_body(transaction_id, lambda body: body["metrics"].update(metrics), touch=False)
+
+    @_queued
+    def set_allocations(self, transaction_id: str, allocations: List[Dict[str, Any]]) -> Optional[BecknTransaction]:
+        allocations = [dict(a) for a in allocations]
+        transaction = self._update_body(transaction_id, lambda body: body.update(allocations=allocations))
+        if transaction is not None:
+            with self._write() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO obp_ids (obp_id, transaction_id) VALUES (?, ?)",
+                    [(a["obp_id"], transaction_id) for a in allocations if a.get("obp_id")]
+                )
+        return transaction
+
+    @_queued
+    def update_allocation(self, transaction_id: str, provider_id: Optional[str], **fields) -> Optional[Dict[str, Any]]:
+        """Updates one provider's allocation entry; returns it (None if not allocated)."""
+        updated: List[Dict[str, Any]] = []
+
+        def apply(body: Dict[str, Any]):
+            for allocation in body["allocations"]:
+                if allocation["provider_id"] == provider_id:
+                    allocation.update(fields)
+                    updated.append(allocation)
+                    return
+
+        with self._write() as conn:
+            self._update_body(transaction_id, apply)
+            if not updated:
+                return None
+            if fields.get("obp_id"):
+                conn.execute("INSERT OR REPLACE INTO obp_ids (obp_id, transaction_id) VALUES (?, ?)", (fields["obp_id"], transaction_id))
+            if fields.get("status"):
+                self._record_change(conn, transaction_id, fields["status"], provider_id)
+        return updated[0]
+
+    @_queued
+    def append_history(self, transaction_id: str, message: str, **extra) -> Optional[Dict[str, Any]]:
+        """Appends an audit trail entry (timestamped now)."""
+        entry = {"timestamp": datetime.utcnow().isoformat(), "message": message, **extra}
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM transactions WHERE transaction_id = ?", (transaction_id,)).fetchone() is None:
+                return None
+            conn.execute("INSERT INTO history (transaction_id, entry) VALUES (?, ?)", (transaction_id, _dumps(entry)))
+        return entry
+
+    # ------------------------------------------------------------------------
+    # INDEX LOOKUPS
+    # ------------------------------------------------------------------------
+
+    def by_obp_id(self, obp_id: str) -> Optional[BecknTransaction]:
+        """Transaction owning an OBP ID (its own or one of its providers')."""
+        found = self._select("WHERE transaction_id = (SELECT transaction_id FROM obp_ids WHERE obp_id = ?)", (obp_id,))
+        return found[0] if found else None
+
+    def by_feeder(self, feeder_id: str) -> List[BecknTransaction]:
+        return self._select("WHERE feeder_id = ? ORDER BY created_at", (feeder_id,))
+
+    def by_status(self, status: TransactionStatus) -> List[BecknTransaction]:
+        return self._select("WHERE status = ? ORDER BY created_at", (status.value,))
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM transactions GROUP BY status"))
+
+    def recent(self, limit: int = 50) -> List[BecknTransaction]:
+        """Newest transactions first (by created_at)."""
+        return self._select("ORDER BY created_at DESC LIMIT ?", (limit,)) if limit > 0 else []
+
+    def history_since(self, cursor: int) -> Tuple[List[Tuple[BecknTransaction, Dict[str, Any]]], int]:
+        """
+        History entries appended (by any worker) after `cursor`, at most the
+        last HISTORY_LOG_SIZE. Returns ([(transaction, entry), ...], new_cursor).
+        """
+        with self._lock:
+            latest = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM history").fetchone()[0]
+            if cursor >= latest:
+                return [], latest
+            rows = self._conn.execute(
+                "SELECT transaction_id, entry FROM history WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (max(cursor, latest - HISTORY_LOG_SIZE), latest)
+            ).fetchall()
+        ids = list({transaction_id for transaction_id, _ in rows})
+        transactions = {t.transaction_id: t for t in self._select_ids(ids)}
+        new = [(transactions[tid], json.loads(entry)) for tid, entry in rows if tid in transactions]
+        return new, latest
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": len(self),
+            "writes": self.writes,
+            "commits": self.commits,
+            "pending_writes": self._pending,
+            "queued_writes": self._queue.qsize(),
+            "failed_writes": self.failed_writes,
+            "last_error": self.last_error,
+            "changes_received": self.changes_received,
+            "by_status": self.count_by_status(),
+        }
+
+    # ------------------------------------------------------------------------
+    # CHANGE NOTIFICATION
+    # ------------------------------------------------------------------------
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval_s)
+            try:
+                self.poll_changes()
+            except Exception as e:
+                logger.error(f"✗ Polling store changes failed: {e}")
+
+    def poll_changes(self) -> int:
+        """Hands status changes committed by other workers to the listeners. Returns how many."""
+        version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return 0  # Nobody else committed
+        self._data_version = version
+        rows = self._watch.execute(
+            "SELECT seq, transaction_id, status, provider_id, origin FROM changes WHERE seq > ? ORDER BY seq",
+            (self._change_cursor,)
+        ).fetchall()
+        received = 0
+        for seq, transaction_id, status, provider_id, origin in rows:
+            self._change_cursor = seq
+            if origin == self.origin:
+                continue  # Local waiters were woken by the route itself
+            received += 1
+            for listener in self.listeners:
+                try:
+                    listener(transaction_id, TransactionStatus(status), provider_id)
+                except Exception as e:
+                    logger.error(f"✗ Store change listener failed: {e}")
+        self.changes_received += received
+        return received
+
+    def _record_change(self, conn: sqlite3.Connection, transaction_id: str, status: str, provider_id: Optional[str]):
+        conn.execute(
+            "INSERT INTO changes (transaction_id, status, provider_id, origin) VALUES (?, ?, ?, ?)",
+            (transaction_id, status, provider_id, self.origin)
+        )
+
+    # ------------------------------------------------------------------------
+    # BATCHED WRITES
+    # ------------------------------------------------------------------------
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """The write connection, inside the open batch (committer thread only)."""
+        with self._lock:
+            yield self._conn
+
+    def _enqueue(self, fn: Optional[Callable[[], Any]], durable: bool = False) -> _Write:
+        write = _Write(fn, durable)
+        with self._committer_lock:
+            if self._committer is None:
+                self._committer = threading.Thread(target=self._run_committer, name="sqlite-store-commit", daemon=True)
+                self._committer.start()
+            self._queue.put(write)
+        return write
+
+    def _run_committer(self):
+        while True:
+            write = self._queue.get()
+            if write is None:
+                return
+            batch: List[_Write] = []
+            deadline = time.monotonic() + self.commit_interval_s  # Let the batch fill up
+            while True:
+                if write is None:  # close(): commit what's there, then stop
+                    self._commit(batch)
+                    return
+                batch.append(write)
+                if write.fn is None:  # flush() barrier
+                    break
+                self._apply(write)
+                if self._pending >= self.batch_size:
+                    break
+                try:
+                    write = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _apply(self, write: _Write):
+        """Runs one queued write in the batch; a write that raises is undone on its own."""
+        try:
+            if not self._in_batch:
+                self._begin()
+            with self._lock:
+                self._conn.execute("SAVEPOINT write")
+                try:
+                    write.result = write.fn()
+                except BaseException:
+                    self._conn.execute("ROLLBACK TO write")
+                    raise
+                finally:
+                    self._conn.execute("RELEASE write")
+        except Exception as e:
+            write.fn = None  # Nothing to re-apply or resolve at commit
+            write.future.set_exception(e)
+            return
+        self._pending += 1
+        self.writes += 1
+        if not write.durable:
+            write.future.set_result(write.result)
+
+    def _begin(self):
+        """Opens the batch, waiting (lock released) while another worker holds the write lock."""
+        deadline = time.monotonic() + BUSY_TIMEOUT_S
+        delay = 0.001
+        while True:
+            with self._lock:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading
+                    self._in_batch = True
+                    return
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or time.monotonic() >= deadline:
+                        raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def _commit(self, batch: List[_Write]):
+        """Commits the open batch, re-applying its writes after a failed attempt."""
+        writes = [write for write in batch if write.fn is not None]
+        error: Optional[Exception] = None
+        if self._in_batch:
+            for attempt in range(1, COMMIT_RETRIES + 1):
+                try:
+                    if not self._in_batch:  # Retry: same writes, fresh transaction
+                        self._begin()
+                        with self._lock:
+                            for write in writes:
+                                write.result = write.fn()
+                    with self._lock:
+                        if self.commits % PRUNE_EVERY == 0:
+                            self._conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (CHANGES_KEPT,))
+                        self._conn.execute("COMMIT")
+                    self._in_batch = False
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    logger.warning(f"⚠ Committing {len(writes)} store writes failed (attempt {attempt}/{COMMIT_RETRIES}): {e}")
+                    with self._lock:
+                        if self._conn.in_transaction:
+                            self._conn.execute("ROLLBACK")
+                    self._in_batch = False
+                    time.sleep(0.01 * attempt)
+            self._pending = 0
+            if error is None:
+                self.commits += 1
+            else:
+                self.failed_writes += len(writes)
+                self.last_error = str(error)
+                logger.error(f"✗ {len(writes)} store writes lost after {COMMIT_RETRIES} failed commits: {error}")
+        for write in batch:
+            if write.fn is None and write.future.done():
+                continue  # Failed when applied
+            if write.fn is None:
+                write.future.set_result(error is None)  # flush() barrier
+            elif not write.durable:
+                continue  # Returned when applied
+            elif error is None:
+                write.future.set_result(write.result)
+            else:
+                write.future.set_exception(error)
+
+    # ------------------------------------------------------------------------
+    # INTERNALS
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _row(data: Dict[str, Any]) -> Tuple:
+        body = {key: value for key, value in data.items() if key not in INDEXED_FIELDS or key == "allocations"}
+        return (
+            data["transaction_id"], data["obp_id"], data["feeder_id"], data["status"],
+            data["created_at"], data["expires_at"], _dumps(body)
+        )
+
+    def _update_body(self, transaction_id: str, change, touch: bool = True) -> Optional[BecknTransaction]:
+        """Read-modify-write of the JSON body (inside the write batch, so atomic across workers)."""
+        with self._write() as conn:
+            row = conn.execute("SELECT body FROM transactions WHERE transaction_id = ?", (transaction_id,)).fetchone()
+            if row is None:
+                return None
+            body = json.loads(row[0])
+            change(body)
+            if touch:
+                body["updated_at"] = datetime.utcnow().isoformat()
+            conn.execute("UPDATE transactions SET body = ? WHERE transaction_id = ?", (_dumps(body), transaction_id))
+        return self.get(transaction_id)
+
+    def _select(self, where: str, params: Iterable = ()) -> List[BecknTransaction]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {COLUMNS} FROM transactions {where}", tuple(params)).fetchall()
+            return self._load(rows)
+
+    def _select_ids(self, transaction_ids: List[str]) -> List[BecknTransaction]:
+        if not transaction_ids:
+            return []
+        marks = ",".join("?" * len(transaction_ids))
+        return self._select(f"WHERE transaction_id IN ({marks})", transaction_ids)
+
+    def _load(self, rows: List[Tuple]) -> List[BecknTransaction]:
+        """Builds BecknTransactions from rows plus their history (one query)."""
+        if not rows:
+            return []
+        history: Dict[str, List[Dict[str, Any]]] = {row[0]: [] for row in rows}
+        marks = ",".join("?" * len(history))
+        for transaction_id, entry in self._conn.execute(
+            f"SELECT transaction_id, entry FROM history WHERE transaction_id IN ({marks}) ORDER BY seq",
+            tuple(history)
+        ):
+            history[transaction_id].append(json.loads(entry))
+        transactions = []
+        for transaction_id, obp_id, feeder_id, status, created_at, expires_at, body in rows:
+            data = json.loads(body)
+            data.update(
+                transaction_id=transaction_id, obp_id=obp_id, feeder_id=feeder_id, status=status,
+                created_at=created_at, expires_at=expires_at, history=history[transaction_id]
+            )
+            transactions.append(BecknTransaction.model_validate(data))
+        return transactions
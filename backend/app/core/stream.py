@@ -0,0 +1,166 @@
+# backend/app/core/stream.py
+"""
+Push channel for the dashboard (Server-Sent Events).
+Each telemetry tick is turned into one delta (changed risk levels, new load points,
+new audit entries), encoded once, and fanned out to every subscriber.
+Subscribers have bounded queues: a slow client is resynced, never waited for.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.beckn_client import transaction_store
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# SSE ENCODING
+# ============================================================================
+
+def encode_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Encodes one Server-Sent Event frame."""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    frame += f"data: {json.dumps(data, default=str)}\n\n"
+    return frame.encode()
+
+
+KEEPALIVE = b": keep-alive\n\n"
+
+# ============================================================================
+# SUBSCRIBERS
+# ============================================================================
+
+class Subscription:
+    """One connected client: a bounded queue of pre-encoded frames."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0  # Frames discarded because the client fell behind
+
+    def offer(self, frame: bytes, resync: Callable[[], bytes]) -> bool:
+        """
+        Enqueues without blocking. When the queue is full the pending deltas are
+        useless, so they are discarded and replaced by a full resync frame.
+        Returns False if the client had to be resynced.
+        """
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(resync())
+            return False
+
+
+class Broadcaster:
+    """Fans one computed update out to all subscribers."""
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, frame: bytes, make_resync: Callable[[], bytes]):
+        """
+        Delivers a frame to every subscriber (must run on the event loop).
+        `make_resync` is only called (once) if some subscriber fell behind.
+        """
+        self.published += 1
+        resync_frame: List[bytes] = []
+
+        def resync() -> bytes:
+            if not resync_frame:
+                resync_frame.append(make_resync())
+            return resync_frame[0]
+
+        for subscription in list(self.subscribers):
+            if not subscription.offer(frame, resync):
+                self.resyncs += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+
+# ============================================================================
+# FEEDER STREAM (telemetry deltas)
+# ============================================================================
+
+class FeederStream:
+    """Turns consecutive telemetry snapshots into deltas and broadcasts them."""
+
+    def __init__(self, queue_size: int = 32):
+        self.broadcaster = Broadcaster(queue_size)
+        self.latest = None                     # Latest TelemetrySnapshot seen
+        self._audit_cursor = 0                 # Store history sequence already streamed
+
+    def full_state(self) -> Dict[str, Any]:
+        """Payload a client needs to (re)build its view from scratch."""
+        snapshot = self.latest
+        return {
+            "sequence": snapshot.sequence if snapshot else 0,
+            "feeders": [dict(row) for row in snapshot.feeders] if snapshot else [],
+        }
+
+    def _new_audit_entries(self) -> List[Dict[str, Any]]:
+        """History entries appended since the previous tick."""
+        new, self._audit_cursor = transaction_store.history_since(self._audit_cursor)
+        return [
+            {
+                "obp_id": txn.obp_id or f"OBP-{txn.transaction_id[:8]}",
+                "ts": event.get("timestamp"),
+                "message": event.get("message"),
+                "latency_ms": event.get("latency_ms")
+            }
+            for txn, event in new
+        ]
+
+    def build_delta(self, previous, snapshot) -> Dict[str, Any]:
+        """Changed feeder risk levels, the new load point of every feeder, and new audit entries."""
+        before = {row["id"]: row for row in previous.feeders} if previous else {}
+        changed, load_points = [], []
+        for row in snapshot.feeders:
+            old = before.get(row["id"])
+            if old is None or old["state"] != row["state"] or old.get("predicted_risk") != row.get("predicted_risk"):
+                changed.append({"id": row["id"], "state": row["state"], "predicted_risk": row.get("predicted_risk")})
+            load_points.append({"id": row["id"], "load_kw": row["load_kw"], "temperature": row["temperature"]})
+        return {
+            "sequence": snapshot.sequence,
+            "timestamp": snapshot.generated_at.isoformat(),
+            "changed": changed,
+            "load_points": load_points,
+            "audit": self._new_audit_entries(),
+        }
+
+    def on_snapshot(self, previous, snapshot):
+        """Telemetry listener: computes the delta once and fans it out."""
+        self.latest = snapshot
+        if not self.broadcaster.subscribers:
+            self._new_audit_entries()  # Keep the cursor current so reconnecting clients get only new entries
+            return
+        delta = self.build_delta(previous, snapshot)
+        self.broadcaster.publish(
+            encode_event("delta", delta, snapshot.sequence),
+            lambda: encode_event("snapshot", self.full_state(), snapshot.sequence)
+        )
+
+
+# Singleton
+feeder_stream = FeederStream()
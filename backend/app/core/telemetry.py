@@ -0,0 +1,217 @@
+# backend/app/core/telemetry.py
+"""
+Background telemetry ticker for FLUXEON.
+On a fixed cadence it simulates readings for every feeder (one batch call), runs
+risk inference for all of them at once, and publishes an immutable snapshot.
+/feeders and /feeders/{id}/state serve the snapshot's pre-encoded JSON, so the
+cost of a poll no longer depends on the simulation or the number of clients.
+"""
+import asyncio
+import json
+import logging
+import time
+import numpy as np
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.simulator import grid_sim
+from app.core.ts_pipeline import ai_brain
+from app.core.features import LAG_WINDOW
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Feeders exposed to the dashboard: (id, name)
+FEEDERS: Tuple[Tuple[str, str], ...] = (
+    ("F1", "Feeder 1"),
+    ("F2", "Feeder 2"),
+)
+
+HISTORY_POINTS = 24   # Last 6 hours, 15-minute intervals
+FORECAST_POINTS = 4   # Next hour
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+@dataclass(frozen=True)
+class TelemetrySnapshot:
+    """Immutable result of one tick. Never mutated after publication."""
+    sequence: int
+    generated_at: datetime
+    feeders: Tuple[Mapping, ...]           # /feeders rows
+    states: Mapping[str, Mapping]          # feeder_id -> /feeders/{id}/state payload
+    feeders_json: bytes                    # Pre-encoded /feeders response
+    states_json: Mapping[str, bytes]       # Pre-encoded /feeders/{id}/state responses
+
+
+def _predict_risk(loads: np.ndarray, temps: np.ndarray, is_workday: bool) -> List[Optional[int]]:
+    """AI risk for every feeder's latest window; None when the model isn't available."""
+    if ai_brain.model is None:
+        return [None] * len(loads)
+    return ai_brain.predict_risk_batch(loads, temps, is_workday).tolist()
+
+
+def build_snapshot(feeders: Sequence[Tuple[str, str]] = FEEDERS, now: Optional[datetime] = None, sequence: int = 0) -> TelemetrySnapshot:
+    """
+    Simulates history, current reading and forecast for all feeders in one
+    get_readings call and renders both endpoint payloads.
+    Only the current reading gets random spikes.
+    """
+    now = now or datetime.now()
+    offsets = range(-HISTORY_POINTS, FORECAST_POINTS + 1)
+    timestamps = [now + timedelta(minutes=15 * i) for i in offsets]
+    block = grid_sim.get_readings(timestamps, [feeder_id for feeder_id, _ in feeders], inject_spikes=[i == 0 for i in offsets])
+
+    # Risk inference on [last history points..., current] for all feeders at once
+    window = slice(HISTORY_POINTS + 1 - LAG_WINDOW, HISTORY_POINTS + 1)
+    start = time.perf_counter()
+    predicted = _predict_risk(block["load_kw"][:, window], block["temperature"][:, window], bool(block["is_workday"][0, HISTORY_POINTS]))
+    if ai_brain.model is not None and feeders:
+        per_feeder_ms = (time.perf_counter() - start) * 1000 / len(feeders)
+        for feeder_id, _ in feeders:
+            metrics.inference_ms.labels(feeder_id=feeder_id).record(per_feeder_ms)
+
+    history_ts = [ts.isoformat() for ts in timestamps[:HISTORY_POINTS]]
+    threshold_kw = grid_sim.max_capacity_kw * grid_sim.warning_threshold
+    critical_threshold_kw = grid_sim.max_capacity_kw * grid_sim.critical_threshold
+
+    rows, states = [], {}
+    for row, (feeder_id, name) in enumerate(feeders):
+        loads = block["load_kw"][row].tolist()
+        temps = block["temperature"][row].tolist()
+        workdays = block["is_workday"][row].tolist()
+        risks = block["risk_label"][row].tolist()
+        risk_level = risks[HISTORY_POINTS]
+        forecast = loads[HISTORY_POINTS + 1:]
+
+        rows.append({
+            "id": feeder_id,
+            "name": name,
+            "state": risk_level,
+            "load_kw": loads[HISTORY_POINTS],
+            "temperature": temps[HISTORY_POINTS],
+            "predicted_risk": predicted[row]
+        })
+        states[feeder_id] = {
+            "feeder_id": feeder_id,
+            "timestamp": now.isoformat(),
+            "risk_level": risk_level,
+            "predicted_risk": predicted[row],
+            "current_load_kw": loads[HISTORY_POINTS],
+            "forecast_load_kw": forecast[0] if forecast else None,
+            "threshold_kw": threshold_kw,
+            "critical_threshold_kw": critical_threshold_kw,
+            "recent_history": [
+                {
+                    "timestamp": history_ts[i],
+                    "load_kw": loads[i],
+                    "temperature": temps[i],
+                    "is_workday": workdays[i],
+                    "risk_label": risks[i]
+                }
+                for i in range(HISTORY_POINTS)
+            ],
+            "forecast_kw": forecast,
+            "message": f"Feeder {feeder_id} operating normally" if risk_level == 0 else f"Feeder {feeder_id} in alert state"
+        }
+
+    return TelemetrySnapshot(
+        sequence=sequence,
+        generated_at=now,
+        feeders=tuple(MappingProxyType(r) for r in rows),
+        states=MappingProxyType({k: MappingProxyType(v) for k, v in states.items()}),
+        feeders_json=json.dumps(rows).encode(),
+        states_json=MappingProxyType({k: json.dumps(v).encode() for k, v in states.items()})
+    )
+
+
+# ============================================================================
+# TICKER
+# ============================================================================
+
+class TelemetryTicker:
+    """Advances the simulation on a fixed cadence and publishes snapshots by reference swap."""
+
+    def __init__(self, interval_s: float = settings.telemetry_interval_s, feeders: Sequence[Tuple[str, str]] = FEEDERS):
+        self.interval_s = interval_s
+        self.feeders = tuple(feeders)
+        self.snapshot: Optional[TelemetrySnapshot] = None
+        self.listeners: List[Callable[[Optional[TelemetrySnapshot], TelemetrySnapshot], None]] = []
+        self._sequence = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[Optional[TelemetrySnapshot], TelemetrySnapshot], None]):
+        """Registers listener(previous, snapshot), called on the event loop after each publish."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def _notify(self, previous: Optional[TelemetrySnapshot], snapshot: TelemetrySnapshot):
+        for listener in self.listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                logger.error(f"✗ Telemetry listener failed: {e}")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def tick(self) -> TelemetrySnapshot:
+        """Builds and publishes one snapshot (synchronously)."""
+        self._sequence += 1
+        with metrics.telemetry_tick_ms.labels().time():
+            snapshot = build_snapshot(self.feeders, sequence=self._sequence)
+        self.snapshot = snapshot  # Atomic publish: readers see the old or the new snapshot
+        return snapshot
+
+    def current(self) -> TelemetrySnapshot:
+        """
+        Latest published snapshot. When the ticker isn't running (tests, scripts),
+        a fresh one is built per call so data never goes stale.
+        """
+        if self.running and self.snapshot is not None:
+            return self.snapshot
+        return build_snapshot(self.feeders)
+
+    async def start(self):
+        if self.running:
+            return
+        self._notify(None, self.tick())  # Serve data from the very first request
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"✓ Telemetry ticker started ({len(self.feeders)} feeders every {self.interval_s}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            # Fixed cadence: schedule from the previous deadline, not from when work finished
+            next_tick += self.interval_s
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            previous = self.snapshot
+            try:
+                # Simulation + inference run off the event loop
+                snapshot = await asyncio.to_thread(self.tick)
+            except Exception as e:
+                logger.error(f"✗ Telemetry tick failed: {e}")
+            else:
+                self._notify(previous, snapshot)
+            if loop.time() > next_tick + self.interval_s:
+                next_tick = loop.time()  # Fell behind: skip missed ticks instead of bursting
+
+
+# Singleton
+telemetry_ticker = TelemetryTicker()
@@ -0,0 +1,215 @@
+# backend/app/core/tracing.py
+"""
+Lightweight in-process tracing for the asynchronous Beckn flow.
+One trace per transaction_id collects spans for every outbound send, every
+callback wait and every inbound webhook, so the wall-clock time of a slow
+orchestration can be broken down without an external collector.
+
+Spans nest through a context variable (each asyncio task sees its own
+current span); webhook spans join the trace of their transaction_id.
+Finished traces go to a bounded ring buffer served by /traces.
+"""
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# SPANS AND TRACES
+# ============================================================================
+
+@dataclass
+class Span:
+    """One timed operation inside a trace."""
+    span_id: int
+    trace_id: str
+    name: str
+    parent_id: Optional[int]
+    start: float                          # perf_counter
+    started_at: datetime
+    end: Optional[float] = None
+    status: str = "ok"                    # ok / error
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end is None else (self.end - self.start) * 1000
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "offset_ms": round((self.start - origin) * 1000, 3),   # From the trace start
+            "duration_ms": None if self.end is None else round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+@dataclass
+class Trace:
+    """All spans of one transaction_id."""
+    trace_id: str
+    start: float
+    started_at: datetime
+    spans: List[Span] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    end: Optional[float] = None
+    status: str = "in_progress"
+    dropped_spans: int = 0
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "spans": len(self.spans),
+            "attributes": self.attributes,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "dropped_spans": self.dropped_spans,
+            "spans": [span.to_dict(self.start) for span in self.spans],
+        }
+
+# ============================================================================
+# TRACER
+# ============================================================================
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("fluxeon_current_span", default=None)
+
+
+class Tracer:
+    """Keeps in-progress traces by transaction_id and a ring buffer of finished ones."""
+
+    def __init__(self, capacity: int = 500, max_active: int = 2000, max_spans: int = 500):
+        """
+        Args:
+            capacity: Finished traces kept (oldest dropped first)
+            max_active: Unfinished traces kept; beyond that the oldest is closed as "abandoned"
+            max_spans: Spans kept per trace (further spans are only counted)
+        """
+        self.capacity = capacity
+        self.max_active = max_active
+        self.max_spans = max_spans
+        self.active: "OrderedDict[str, Trace]" = OrderedDict()
+        self.completed: Deque[Trace] = deque(maxlen=capacity)
+        self._span_ids = itertools.count(1)
+
+    def _trace(self, trace_id: str, start: float) -> Trace:
+        trace = self.active.get(trace_id)
+        if trace is None:
+            trace = Trace(trace_id=trace_id, start=start, started_at=datetime.utcnow())
+            self.active[trace_id] = trace
+            while len(self.active) > self.max_active:
+                _, oldest = self.active.popitem(last=False)
+                self._complete(oldest, "abandoned")
+        return trace
+
+    @contextmanager
+    def span(self, trace_id: Optional[str], name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Times the `with` block as a span of `trace_id` (a transaction_id); the
+        trace is created on its first span. Exceptions mark the span as error.
+        Yields None (and records nothing) when trace_id is None.
+        """
+        if trace_id is None:
+            yield None
+            return
+        start = time.perf_counter()
+        trace = self._trace(trace_id, start)
+        parent = _current_span.get()
+        span = Span(
+            span_id=next(self._span_ids),
+            trace_id=trace_id,
+            name=name,
+            parent_id=parent.span_id if parent is not None and parent.trace_id == trace_id else None,
+            start=start,
+            started_at=datetime.utcnow(),
+            attributes=attributes
+        )
+        if len(trace.spans) < self.max_spans:
+            trace.spans.append(span)
+        else:
+            trace.dropped_spans += 1
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def annotate(self, trace_id: str, **attributes):
+        """Sets trace-level attributes (feeder, requested kW, OBP ID, ...)."""
+        trace = self.active.get(trace_id)
+        if trace is not None:
+            trace.attributes.update(attributes)
+
+    def finish(self, trace_id: str, status: str = "ok", **attributes) -> Optional[Trace]:
+        """Closes a trace and moves it to the ring buffer."""
+        trace = self.active.pop(trace_id, None)
+        if trace is None:
+            return None
+        trace.attributes.update(attributes)
+        self._complete(trace, status)
+        return trace
+
+    def _complete(self, trace: Trace, status: str):
+        trace.end = time.perf_counter()
+        trace.status = status
+        self.completed.append(trace)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        """In-progress or finished trace (latest one for that transaction_id)."""
+        trace = self.active.get(trace_id)
+        if trace is not None:
+            return trace
+        for trace in reversed(self.completed):
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Trace]:
+        """Finished traces, newest first, optionally only the slow ones."""
+        found = []
+        for trace in reversed(self.completed):
+            if trace.duration_ms >= min_duration_ms:
+                found.append(trace)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def export(self) -> List[Dict[str, Any]]:
+        """Every finished trace with its spans, oldest first (JSON-serializable)."""
+        return [trace.to_dict() for trace in list(self.completed)]
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": len(self.active), "completed": len(self.completed), "capacity": self.capacity}
+
+
+# Singleton
+tracer = Tracer(capacity=settings.trace_buffer_size)
@@ -0,0 +1,676 @@
+# backend/app/core/transaction_store.py
+"""
+Indexed in-memory transaction store for FLUXEON.
+Keeps BecknTransactions by transaction_id plus secondary indexes (obp_id,
+feeder_id, status, created_at) so audit lookups don't scan every transaction.
+All writes go through the store's methods, which keep the indexes current.
+Methods are synchronous: on the event loop each call is atomic.
+
+Memory is bounded by an entry and a byte budget (LRU) plus the Beckn context
+TTL (expires_at). Only finished or expired transactions are evicted, and each
+one is handed to the `spill` callback (durable audit storage) first.
+
+With a `journal` attached, every write is also appended to it as an operation
+record (see app/models/audit.py); restore() rebuilds the store from those records.
+
+TransactionStoreBase is the interface shared with the SQLite backend
+(sqlite_store.py), which multi-worker deployments use instead:
+- memory: LRU/TTL eviction (spilled to the archive first), every write
+  journaled and replayed on start; flush() waits for the journal fsync.
+- sqlite: no eviction and no journal, the database file is the record;
+  flush() waits for the open write batch to commit.
+"""
+import asyncio
+import bisect
+import heapq
+import itertools
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.models.audit import JournalOp
+from app.models.beckn import BecknTransaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LOG_SIZE = 10000   # Recent history entries kept for incremental readers (SSE stream)
+
+# Finished transactions (safe to evict once no provider flow is still running)
+TERMINAL_STATUSES = frozenset({
+    TransactionStatus.CONFIRMED,
+    TransactionStatus.COMPLETED,
+    TransactionStatus.CANCELLED,
+    TransactionStatus.FAILED,
+    TransactionStatus.FAILURE_EXTERNAL,
+})
+TERMINAL_VALUES = frozenset(status.value for status in TERMINAL_STATUSES)
+
+# Resident size estimate (bytes): JSON size of the payloads plus fixed overheads
+BASE_SIZE = 2048
+HISTORY_ENTRY_SIZE = 160
+ALLOCATION_SIZE = 512
+
+
+def _json_size(payload: Optional[Dict[str, Any]]) -> int:
+    return len(json.dumps(payload, default=str)) if payload else 0
+
+
+def estimate_size(transaction: BecknTransaction) -> int:
+    """Approximate memory held by a transaction (payload JSON dominates)."""
+    return (
+        BASE_SIZE
+        + _json_size(transaction.request_payload)
+        + _json_size(transaction.response_payload)
+        + sum(HISTORY_ENTRY_SIZE + len(entry.get("message") or "") for entry in transaction.history)
+        + ALLOCATION_SIZE * len(transaction.allocations)
+    )
+
+# Fields only the dedicated store methods may change
+INDEXED_FIELDS = frozenset({"transaction_id", "status", "obp_id", "feeder_id", "created_at", "allocations", "history", "expires_at"})
+
+# Called with (transaction_id, status, provider_id) for status changes made by other processes
+ChangeListener = Callable[[str, TransactionStatus, Optional[str]], None]
+
+# ============================================================================
+# INTERFACE
+# ============================================================================
+
+class TransactionStoreBase(ABC):
+    """
+    Store backend interface. All writes go through these methods; reads return
+    BecknTransactions that callers must not mutate (re-read after a wait).
+    """
+
+    listeners: List[ChangeListener]
+
+    def __contains__(self, transaction_id: object) -> bool:
+        return isinstance(transaction_id, str) and self.get(transaction_id) is not None
+
+    def __getitem__(self, transaction_id: str) -> BecknTransaction:
+        transaction = self.get(transaction_id)
+        if transaction is None:
+            raise KeyError(transaction_id)
+        return transaction
+
+    def __setitem__(self, transaction_id: str, transaction: BecknTransaction):
+        if transaction_id != transaction.transaction_id:
+            raise ValueError(f"Key {transaction_id} doesn't match transaction {transaction.transaction_id}")
+        self.add(transaction)
+
+    def add_change_listener(self, listener: ChangeListener):
+        """Registers a callback for status changes written by other processes (e.g. notify_status)."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def start(self):
+        """Called once the event loop runs (app startup)."""
+
+    async def stop(self):
+        """Flushes pending writes (app shutdown)."""
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Durability barrier: blocks until every write made so far is on disk. False on timeout or error."""
+        return True
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs fn(*args, **kwargs) (one or more store calls) from the event loop
+        without blocking it. In memory the call is simply atomic on the loop.
+        """
+        return fn(*args, **kwargs)
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]: ...
+
+    @abstractmethod
+    def get(self, transaction_id: Optional[str], default: Optional[BecknTransaction] = None) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def values(self) -> Iterable[BecknTransaction]: ...
+
+    @abstractmethod
+    def items(self) -> Iterable[Tuple[str, BecknTransaction]]: ...
+
+    @abstractmethod
+    def clear(self): ...
+
+    @abstractmethod
+    def add(self, transaction: BecknTransaction) -> BecknTransaction: ...
+
+    @abstractmethod
+    def remove(self, transaction_id: str) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def set_status(self, transaction_id: str, status: TransactionStatus) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def set_obp_id(self, transaction_id: str, obp_id: Optional[str]) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def set_response(self, transaction_id: str, payload: Optional[Dict[str, Any]]) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def update(self, transaction_id: str, **fields) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def update_metrics(self, transaction_id: str, **metrics) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def set_allocations(self, transaction_id: str, allocations: List[Dict[str, Any]]) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def update_allocation(self, transaction_id: str, provider_id: Optional[str], **fields) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def append_history(self, transaction_id: str, message: str, **extra) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def by_obp_id(self, obp_id: str) -> Optional[BecknTransaction]: ...
+
+    @abstractmethod
+    def by_feeder(self, feeder_id: str) -> List[BecknTransaction]: ...
+
+    @abstractmethod
+    def by_status(self, status: TransactionStatus) -> List[BecknTransaction]: ...
+
+    @abstractmethod
+    def count_by_status(self) -> Dict[str, int]: ...
+
+    @abstractmethod
+    def recent(self, limit: int = 50) -> List[BecknTransaction]: ...
+
+    @abstractmethod
+    def history_since(self, cursor: int) -> Tuple[List[Tuple[BecknTransaction, Dict[str, Any]]], int]: ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]: ...
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class TransactionStore(TransactionStoreBase):
+    """In-memory backend: dict-like store of BecknTransactions with secondary indexes."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        spill: Optional[Callable[[BecknTransaction], None]] = None,
+        journal=None,
+        compact_journal: bool = True
+    ):
+        """
+        Args:
+            max_entries: Resident transaction budget (None = unbounded)
+            max_bytes: Resident size budget, estimated (None = unbounded)
+            spill: Called with each transaction before it's evicted
+            journal: Receives every write as a record via journal.append(record)
+            compact_journal: Compact the replayed journal into a snapshot on start()
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.journal = journal
+        self.compact_journal = compact_journal
+        self.listeners: List[ChangeListener] = []  # Single process: never called
+        self._restoring = False
+        self._transactions: Dict[str, BecknTransaction] = {}
+        self._by_obp_id: Dict[str, str] = {}                      # obp_id -> transaction_id
+        self._by_feeder: Dict[str, Set[str]] = {}                 # feeder_id -> transaction_ids
+        self._by_status: Dict[TransactionStatus, Set[str]] = {}   # status -> transaction_ids
+        self._by_created: List[Tuple[datetime, int, str]] = []    # Sorted (created_at, seq, transaction_id)
+        self._seq = itertools.count()
+        self._created_key: Dict[str, Tuple[datetime, int, str]] = {}
+        # Append-only log of history entries: (seq, transaction_id, entry)
+        self._history_log: Deque[Tuple[int, str, Dict[str, Any]]] = deque(maxlen=HISTORY_LOG_SIZE)
+        self._history_seq = 0
+        # Eviction state
+        self._lru: "OrderedDict[str, None]" = OrderedDict()      # Least recently used first
+        self._sizes: Dict[str, int] = {}
+        self._response_sizes: Dict[str, int] = {}
+        self._expiry: List[Tuple[datetime, str]] = []           # Heap of (expires_at, transaction_id)
+        self.resident_bytes = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self.spill_errors = 0
+
+    # ------------------------------------------------------------------------
+    # MAPPING-STYLE READS
+    # ------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def __contains__(self, transaction_id: object) -> bool:
+        return transaction_id in self._transactions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._transactions)
+
+    def __getitem__(self, transaction_id: str) -> BecknTransaction:
+        return self._transactions[transaction_id]
+
+    def get(self, transaction_id: Optional[str], default: Optional[BecknTransaction] = None) -> Optional[BecknTransaction]:
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return default
+        self._lru.move_to_end(transaction_id)
+        return transaction
+
+    def values(self):
+        return self._transactions.values()
+
+    def items(self):
+        return self._transactions.items()
+
+    def clear(self):
+        listeners = self.listeners
+        self.__init__(self.max_entries, self.max_bytes, self.spill, self.journal, compact_journal=self.compact_journal)
+        self.listeners = listeners
+
+    async def start(self):
+        """Rebuilds the store from the journal written by previous runs (file IO off the event loop)."""
+        if self.journal is None:
+            return
+        restored = await asyncio.to_thread(self.restore, self.journal.replay(), self.compact_journal)
+        if restored:
+            logger.info(f"📒 Restored {len(self._transactions)} transactions from {restored} journal records")
+
+    async def stop(self):
+        if self.journal is not None:
+            await asyncio.to_thread(self.journal.close)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the journal records of every write so far to be fsynced."""
+        return self.journal.flush(timeout) if self.journal is not None else True
+
+    # ------------------------------------------------------------------------
+    # WRITES (keep indexes current)
+    # ------------------------------------------------------------------------
+
+    def add(self, transaction: BecknTransaction) -> BecknTransaction:
+        """Inserts (or replaces) a transaction and indexes it."""
+        transaction_id = transaction.transaction_id
+        if transaction_id in self._transactions:
+            self._unindex(self._transactions[transaction_id])
+        self._transactions[transaction_id] = transaction
+
+        self._by_feeder.setdefault(transaction.feeder_id, set()).add(transaction_id)
+        self._by_status.setdefault(transaction.status, set()).add(transaction_id)
+        if transaction.obp_id:
+            self._by_obp_id[transaction.obp_id] = transaction_id
+        for allocation in transaction.allocations:
+            if allocation.get("obp_id"):
+                self._by_obp_id[allocation["obp_id"]] = transaction_id
+
+        key = (transaction.created_at, next(self._seq), transaction_id)
+        self._created_key[transaction_id] = key
+        if not self._by_created or key >= self._by_created[-1]:
+            self._by_created.append(key)  # Common case: created in order
+        else:
+            bisect.insort(self._by_created, key)
+
+        self._lru[transaction_id] = None
+        self._response_sizes[transaction_id] = _json_size(transaction.response_payload)
+        self._resize(transaction_id, estimate_size(transaction))
+        if transaction.expires_at is not None:
+            heapq.heappush(self._expiry, (transaction.expires_at, transaction_id))
+
+        self._log(JournalOp.PUT, txn=transaction.model_dump(mode="json"))
+        if self._restoring:
+            return transaction  # Evicted once the whole journal is replayed
+        self.evict_expired()
+        self._enforce_budget()
+        return transaction
+
+    def remove(self, transaction_id: str) -> Optional[BecknTransaction]:
+        """Drops a transaction and its index entries."""
+        transaction = self._transactions.pop(transaction_id, None)
+        if transaction is not None:
+            self._unindex(transaction)
+        return transaction
+
+    def set_status(self, transaction_id: str, status: TransactionStatus) -> Optional[BecknTransaction]:
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        if transaction.status != status:
+            self._discard(self._by_status, transaction.status, transaction_id)
+            self._by_status.setdefault(status, set()).add(transaction_id)
+            transaction.status = status
+        self._touch(transaction)
+        self._log(JournalOp.STATUS, id=transaction_id, status=status.value)
+        if status in TERMINAL_STATUSES and not self._restoring:
+            self._enforce_budget()  # Newly evictable
+        return transaction
+
+    def set_obp_id(self, transaction_id: str, obp_id: Optional[str]) -> Optional[BecknTransaction]:
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        if transaction.obp_id and self._by_obp_id.get(transaction.obp_id) == transaction_id and not self._allocation_obp(transaction, transaction.obp_id):
+            del self._by_obp_id[transaction.obp_id]
+        transaction.obp_id = obp_id
+        if obp_id:
+            self._by_obp_id[obp_id] = transaction_id
+        self._touch(transaction)
+        self._log(JournalOp.OBP_ID, id=transaction_id, obp_id=obp_id)
+        return transaction
+
+    def set_response(self, transaction_id: str, payload: Optional[Dict[str, Any]]) -> Optional[BecknTransaction]:
+        """Stores the latest response payload (e.g. a full ON_SEARCH catalog) and re-sizes the entry."""
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        transaction.response_payload = payload
+        self._touch(transaction)
+        new_size = _json_size(payload)
+        self._resize(transaction_id, self._sizes[transaction_id] + new_size - self._response_sizes[transaction_id])
+        self._response_sizes[transaction_id] = new_size
+        self._log(JournalOp.RESPONSE, id=transaction_id, payload=payload)
+        if not self._restoring:
+            self._enforce_budget()
+        return transaction
+
+    def update(self, transaction_id: str, **fields) -> Optional[BecknTransaction]:
+        """Sets non-indexed fields (quoted_price, provider_id, metrics, ...)."""
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        for name, value in fields.items():
+            if name in INDEXED_FIELDS:
+                raise ValueError(f"Use the dedicated store method to change '{name}'")
+            setattr(transaction, name, value)
+        self._touch(transaction)
+        self._log(JournalOp.UPDATE, id=transaction_id, fields=fields)
+        return transaction
+
+    def update_metrics(self, transaction_id: str, **metrics) -> Optional[BecknTransaction]:
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        transaction.metrics.update(metrics)
+        self._log(JournalOp.METRICS, id=transaction_id, metrics=metrics)
+        return transaction
+
+    def set_allocations(self, transaction_id: str, allocations: List[Dict[str, Any]]) -> Optional[BecknTransaction]:
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        self._resize(transaction_id, self._sizes[transaction_id] + ALLOCATION_SIZE * (len(allocations) - len(transaction.allocations)))
+        transaction.allocations = [dict(a) for a in allocations]
+        for allocation in transaction.allocations:
+            if allocation.get("obp_id"):
+                self._by_obp_id[allocation["obp_id"]] = transaction_id
+        self._touch(transaction)
+        self._log(JournalOp.ALLOCATIONS, id=transaction_id, allocations=[dict(a) for a in allocations])
+        return transaction
+
+    def update_allocation(self, transaction_id: str, provider_id: Optional[str], **fields) -> Optional[Dict[str, Any]]:
+        """Updates one provider's allocation entry; returns it (None if not allocated)."""
+        transaction = self._transactions.get(transaction_id)
+        if transaction is None:
+            return None
+        allocation = find_allocation(transaction, provider_id)
+        if allocation is None:
+            return None
+        allocation.update(fields)
+        if fields.get("obp_id"):
+            self._by_obp_id[fields["obp_id"]] = transaction_id
+        self._touch(transaction)
+        self._log(JournalOp.ALLOCATION, id=transaction_id, provider_id=provider_id, fields=fields)
+        return allocation
+
+    def append_history(self, transaction_id: str, message: str, **extra) -> Optional[Dict[str, Any]]:
+        """Appends an audit trail entry (timestamped now)."""
+        if transaction_id not in self._transactions:
+            return None
+        return self._append_entry(transaction_id, {"timestamp": datetime.utcnow().isoformat(), "message": message, **extra})
+
+    def _append_entry(self, transaction_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        transaction = self._transactions[transaction_id]
+        message = entry.get("message") or ""
+        transaction.history.append(entry)
+        self._history_seq += 1
+        self._history_log.append((self._history_seq, transaction_id, entry))
+        self._resize(transaction_id, self._sizes[transaction_id] + HISTORY_ENTRY_SIZE + len(message))
+        self._lru.move_to_end(transaction_id)
+        self._log(JournalOp.HISTORY, id=transaction_id, entry=entry)
+        return entry
+
+    # ------------------------------------------------------------------------
+    # JOURNAL REPLAY
+    # ------------------------------------------------------------------------
+
+    def restore(self, records: Iterable[Dict[str, Any]], compact: bool = False) -> int:
+        """
+        Rebuilds the store by applying journal records in order (nothing is
+        re-journaled). Archived transactions are dropped; eviction runs once at
+        the end. With `compact`, the replayed journal is then rewritten as a
+        snapshot of the restored state. Returns how many records were applied.
+        """
+        journal, self.journal = self.journal, None
+        self._restoring = True
+        applied = 0
+        try:
+            for record in records:
+                try:
+                    self.apply(record)
+                    applied += 1
+                except Exception as e:
+                    logger.warning(f"⚠ Skipping journal record {record.get('op')} for {record.get('id')}: {e}")
+        finally:
+            self.journal = journal
+            self._restoring = False
+        if compact and journal is not None and applied:
+            journal.compact(self.snapshot_records())
+        self.evict_expired()
+        self._enforce_budget()
+        return applied
+
+    def snapshot_records(self) -> List[Dict[str, Any]]:
+        """One put record per resident transaction, oldest first (journal compaction)."""
+        return [
+            {"op": JournalOp.PUT.value, "txn": self._transactions[transaction_id].model_dump(mode="json")}
+            for _, _, transaction_id in self._by_created
+        ]
+
+    def apply(self, record: Dict[str, Any]):
+        """Applies one journal record (see JournalOp for the record shapes)."""
+        op = JournalOp(record["op"])
+        transaction_id = record.get("id")
+        if op == JournalOp.PUT:
+            self.add(BecknTransaction.model_validate(record["txn"]))
+        elif op == JournalOp.ARCHIVE:
+            self.remove(record["txn"]["transaction_id"])
+        elif transaction_id not in self._transactions:
+            return  # Written after the transaction was archived
+        elif op == JournalOp.STATUS:
+            self.set_status(transaction_id, TransactionStatus(record["status"]))
+        elif op == JournalOp.OBP_ID:
+            self.set_obp_id(transaction_id, record["obp_id"])
+        elif op == JournalOp.RESPONSE:
+            self.set_response(transaction_id, record["payload"])
+        elif op == JournalOp.UPDATE:
+            self.update(transaction_id, **record["fields"])
+        elif op == JournalOp.METRICS:
+            self.update_metrics(transaction_id, **record["metrics"])
+        elif op == JournalOp.ALLOCATIONS:
+            self.set_allocations(transaction_id, record["allocations"])
+        elif op == JournalOp.ALLOCATION:
+            self.update_allocation(transaction_id, record["provider_id"], **record["fields"])
+        elif op == JournalOp.HISTORY:
+            self._append_entry(transaction_id, record["entry"])
+
+    # ------------------------------------------------------------------------
+    # INDEX LOOKUPS
+    # ------------------------------------------------------------------------
+
+    def by_obp_id(self, obp_id: str) -> Optional[BecknTransaction]:
+        """Transaction owning an OBP ID (its own or one of its providers')."""
+        transaction_id = self._by_obp_id.get(obp_id)
+        return self.get(transaction_id) if transaction_id else None
+
+    def by_feeder(self, feeder_id: str) -> List[BecknTransaction]:
+        return self._sorted(self._by_feeder.get(feeder_id, ()))
+
+    def by_status(self, status: TransactionStatus) -> List[BecknTransaction]:
+        return self._sorted(self._by_status.get(status, ()))
+
+    def count_by_status(self) -> Dict[str, int]:
+        return {status.value: len(ids) for status, ids in self._by_status.items() if ids}
+
+    def recent(self, limit: int = 50) -> List[BecknTransaction]:
+        """Newest transactions first (by created_at)."""
+        keys = self._by_created[-limit:] if limit > 0 else []
+        return [self._transactions[transaction_id] for _, _, transaction_id in reversed(keys)]
+
+    def history_since(self, cursor: int) -> Tuple[List[Tuple[BecknTransaction, Dict[str, Any]]], int]:
+        """
+        History entries appended after `cursor` (a value previously returned here, 0 at first).
+        Returns ([(transaction, entry), ...], new_cursor). Entries older than the log are skipped.
+        """
+        if cursor >= self._history_seq:
+            return [], self._history_seq
+        new = []
+        for seq, transaction_id, entry in reversed(self._history_log):
+            if seq <= cursor:
+                break
+            transaction = self._transactions.get(transaction_id)
+            if transaction is not None:
+                new.append((transaction, entry))
+        new.reverse()
+        return new, self._history_seq
+
+    # ------------------------------------------------------------------------
+    # EVICTION
+    # ------------------------------------------------------------------------
+
+    def evictable(self, transaction: BecknTransaction, now: Optional[datetime] = None) -> bool:
+        """Expired, or finished with no provider flow still running."""
+        if transaction.expires_at is not None and transaction.expires_at <= (now or datetime.utcnow()):
+            return True
+        if transaction.status not in TERMINAL_STATUSES:
+            return False
+        return all(allocation.get("status") in TERMINAL_VALUES for allocation in transaction.allocations)
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Evicts every transaction whose expires_at has passed. Returns how many."""
+        now = now or datetime.utcnow()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, transaction_id = heapq.heappop(self._expiry)
+            transaction = self._transactions.get(transaction_id)
+            if transaction is not None and transaction.expires_at == expires_at and self._evict(transaction_id):
+                self.evicted_ttl += 1
+                evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        self.evict_expired()
+        return {
+            "entries": len(self._transactions),
+            "resident_bytes": self.resident_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+            "spill_errors": self.spill_errors,
+            "by_status": self.count_by_status(),
+        }
+
+    def _over_budget(self) -> bool:
+        return (
+            (self.max_entries is not None and len(self._transactions) > self.max_entries)
+            or (self.max_bytes is not None and self.resident_bytes > self.max_bytes)
+        )
+
+    def _enforce_budget(self):
+        """Evicts least recently used evictable transactions until within budget."""
+        if not self._over_budget():
+            return
+        now = datetime.utcnow()
+        for transaction_id in list(self._lru):
+            if not self._over_budget():
+                break
+            if self.evictable(self._transactions[transaction_id], now) and self._evict(transaction_id):
+                self.evicted_lru += 1
+
+    def _evict(self, transaction_id: str) -> bool:
+        """Spills then drops a transaction. Returns False if it had to stay resident."""
+        transaction = self._transactions[transaction_id]
+        if self.spill is not None:
+            try:
+                self.spill(transaction)
+            except Exception as e:
+                # Keep it resident rather than lose the audit trail
+                self.spill_errors += 1
+                logger.error(f"✗ Spilling transaction {transaction_id} failed, not evicting: {e}")
+                return False
+        self.remove(transaction_id)
+        return True
+
+    # ------------------------------------------------------------------------
+    # INTERNALS
+    # ------------------------------------------------------------------------
+
+    def _log(self, op: JournalOp, **fields):
+        if self.journal is not None:
+            self.journal.append({"op": op.value, **fields})
+
+    def _touch(self, transaction: BecknTransaction):
+        transaction.updated_at = datetime.utcnow()
+        self._lru.move_to_end(transaction.transaction_id)
+
+    def _resize(self, transaction_id: str, size: int):
+        self.resident_bytes += size - self._sizes.get(transaction_id, 0)
+        self._sizes[transaction_id] = size
+
+    def _sorted(self, transaction_ids) -> List[BecknTransaction]:
+        """Transactions for a set of ids, oldest first."""
+        keys = sorted(self._created_key[transaction_id] for transaction_id in transaction_ids)
+        return [self._transactions[transaction_id] for _, _, transaction_id in keys]
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key: Any, transaction_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(transaction_id)
+            if not ids:
+                del index[key]
+
+    @staticmethod
+    def _allocation_obp(transaction: BecknTransaction, obp_id: str) -> bool:
+        return any(allocation.get("obp_id") == obp_id for allocation in transaction.allocations)
+
+    def _unindex(self, transaction: BecknTransaction):
+        transaction_id = transaction.transaction_id
+        self._lru.pop(transaction_id, None)
+        self.resident_bytes -= self._sizes.pop(transaction_id, 0)
+        self._response_sizes.pop(transaction_id, None)
+        self._discard(self._by_feeder, transaction.feeder_id, transaction_id)
+        self._discard(self._by_status, transaction.status, transaction_id)
+        obp_ids = [transaction.obp_id] + [a.get("obp_id") for a in transaction.allocations]
+        for obp_id in obp_ids:
+            if obp_id and self._by_obp_id.get(obp_id) == transaction_id:
+                del self._by_obp_id[obp_id]
+        key = self._created_key.pop(transaction_id, None)
+        if key is not None:
+            i = bisect.bisect_left(self._by_created, key)
+            if i < len(self._by_created) and self._by_created[i] == key:
+                del self._by_created[i]
+
+
+def find_allocation(transaction: BecknTransaction, provider_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Allocation entry of a provider in a multi-provider order (None if not allocated)."""
+    for allocation in transaction.allocations:
+        if allocation["provider_id"] == provider_id:
+            return allocation
+    return None
@@ -6,7 +6,13 @@ Predicts risk level (0, 1, 2) based on the last 4 readings (1 hour).
 import joblib
 import numpy as np
 import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from app.core.config import settings
 from app.models.feeder import FeederReading
+from app.core.features import FeatureBuffer, RollingFeatureState, compute_features, n_features, LAG_WINDOW
+from app.core import native_mlp
 
 # Paths setup
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,9 +22,21 @@ SCALER_PATH = os.path.join(BASE_DIR, '../../data/models/scaler.pkl')
 #--------------------------------------------------------------------------------------------------------------
 class TSPipeline:
 
-    def __init__(self):
+    def __init__(self, max_feeders: int = settings.ts_max_feeders):
+        """
+        Args:
+            max_feeders: Feeders whose state stays resident; the least recently
+                used one is dropped beyond that (its window warms up again)
+        """
         self.model = None
         self.scaler = None
+        self.native = None      # NumPy forward pass with the scaler folded in (None -> sklearn path)
+        self.use_native = True
+        self.max_feeders = max_feeders
+        self._buffers: "OrderedDict[Optional[str], FeatureBuffer]" = OrderedDict()  # Per-feeder feature buffers (LRU)
+        self._states: "OrderedDict[str, RollingFeatureState]" = OrderedDict()       # Per-feeder rolling windows (push_reading, LRU)
+        self._batch_out = np.empty((0, n_features()))           # Grown on demand by predict_risk_batch
+        self._batch_lock = threading.Lock()                      # _batch_out is shared by ticker/request threads
         self.load_model()
 
     def load_model(self):
@@ -27,6 +45,7 @@ class TSPipeline:
             if os.path.exists(MODEL_PATH):
                 self.model = joblib.load(MODEL_PATH)
                 self.scaler = joblib.load(SCALER_PATH)
+                self.native = native_mlp.try_build(self.model, self.scaler)
                 print("✓ FLUXORAX AI Model loaded successfully.")
             else:
                 print(f"✗ CRITICAL ERROR: Model not found at {MODEL_PATH}")
@@ -37,34 +56,110 @@ class TSPipeline:
             self.model = None
 
 #--------------------------------------------------------------------------------------------------------------
-    def predict_risk(self, history_window: list[FeederReading]) -> int:
+    def _feeder_entry(self, table: OrderedDict, feeder_id: Optional[str], factory: Callable):
+        """Returns a feeder's entry in `table` (created on first use), evicting the least recently used."""
+        entry = table.get(feeder_id)
+        if entry is None:
+            entry = table[feeder_id] = factory()
+            if len(table) > self.max_feeders:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(feeder_id)
+        return entry
+
+    def _feature_buffer(self, feeder_id: Optional[str]) -> FeatureBuffer:
+        """Returns the preallocated feature buffer of a feeder (created on first use)."""
+        return self._feeder_entry(self._buffers, feeder_id, FeatureBuffer)
+
+    def predict_risk(self, history_window: list[FeederReading], feeder_id: Optional[str] = None) -> int:
         """
         Predicts risk level based on the last 4 readings.
+        Pass `feeder_id` to reuse that feeder's feature buffer across calls.
         Returns: 0 (Normal), 1 (Warning), or 2 (Critical)
         """
         if self.model is None:
             raise RuntimeError("AI Model is not loaded. Cannot make predictions. Train the model first.")
 
-        if len(history_window) < 4:
+        if len(history_window) < LAG_WINDOW:
             print("⚠ Insufficient data for prediction (need 4 readings). Returning 0 (Normal).")
             return 0
 
-        # 1. Extract Features (Same logic as trainer)
-        window = history_window[-4:]  # We take the last 4 readings
+        # 1. Extract Features (Same kernel as trainer)
+        window = history_window[-LAG_WINDOW:]  # We take the last 4 readings
+        buffer = self._feature_buffer(feeder_id)
+        for j, reading in enumerate(window):
+            buffer.loads[0, j] = reading.load_kw
+            buffer.temps[0, j] = reading.temperature
+        vector = buffer.compute(1 if window[-1].is_workday else 0)
+        return self._infer(vector)
+
+    def push_reading(self, feeder_id: str, reading: FeederReading) -> int:
+        """
+        Streaming variant of predict_risk: adds one reading to the feeder's rolling
+        window (O(1) update) and returns the risk for the latest 4 readings.
+        Returns 0 (Normal) until the feeder has a full window.
+        """
+        if self.model is None:
+            raise RuntimeError("AI Model is not loaded. Cannot make predictions. Train the model first.")
+
+        state = self._feeder_entry(self._states, feeder_id, RollingFeatureState)
+        if not state.push(reading.load_kw, reading.temperature, reading.is_workday):
+            return 0
+
+        buffer = self._feature_buffer(feeder_id)
+        state.write_features(buffer.out[0])
+        return self._infer(buffer.out)
+
+    def predict_risk_batch(self, loads: np.ndarray, temps: np.ndarray, is_workday) -> np.ndarray:
+        """
+        Scores N feeders in one scaler + model call.
         
-        loads = np.array([r.load_kw for r in window])
-        temps = np.array([r.temperature for r in window])
+        Args:
+            loads, temps: (N, window) blocks with window >= 4 (the last 4 columns are used)
+            is_workday: (N,) activity flags or a single flag for all feeders
         
-        rms = np.sqrt(np.mean(loads**2))
-        peak = np.max(loads)
-        kurtosis_proxy = peak / np.mean(loads) if np.mean(loads) > 0 else 0
-        is_workday = 1 if window[-1].is_workday else 0
+        Returns:
+            (N,) int array of risk levels: 0 (Normal), 1 (Warning), or 2 (Critical)
+        """
+        if self.model is None:
+            raise RuntimeError("AI Model is not loaded. Cannot make predictions. Train the model first.")
+
+        loads = np.asarray(loads, dtype=np.float64)
+        temps = np.asarray(temps, dtype=np.float64)
+        if loads.ndim != 2 or loads.shape != temps.shape or loads.shape[1] < LAG_WINDOW:
+            raise ValueError(f"Expected matching (N, >={LAG_WINDOW}) load/temp blocks, got {loads.shape} and {temps.shape}")
+
+        n_rows = loads.shape[0]
+        if n_rows == 0:
+            return np.empty(0, dtype=np.int64)
+        is_workday = np.asarray(is_workday, dtype=bool).astype(np.float64)
         
-        # Construct Vector
-        vector = np.concatenate([loads, temps, [rms, peak, kurtosis_proxy, is_workday]])
+        # The feature buffer is reused across calls: one batch at a time
+        with self._batch_lock:
+            if self._batch_out.shape[0] < n_rows:
+                self._batch_out = np.empty((n_rows, n_features()))
+            
+            # 1. Extract Features (one kernel call for all feeders)
+            vectors = compute_features(loads[:, -LAG_WINDOW:], temps[:, -LAG_WINDOW:], is_workday, self._batch_out[:n_rows])
+            
+            # 2. Scale and 3. Infer
+            if self.native is not None and self.use_native:
+                return self.native.predict(vectors).astype(np.int64)
+            return self.model.predict(self.scaler.transform(vectors)).astype(np.int64)
+
+    def reset_feeder(self, feeder_id: str):
+        """Drops the rolling window and buffers of a feeder."""
+        self._states.pop(feeder_id, None)
+        self._buffers.pop(feeder_id, None)
+
+    def _infer(self, vector: np.ndarray) -> int:
+        """Scales a (1, n_features) vector and runs the classifier."""
+        if self.native is not None and self.use_native:
+            # 2 + 3. Scale and Infer in one float32 pass (scaler folded into layer 1)
+            return self.native.predict_one(vector[0])
         
         # 2. Scale
-        vector_scaled = self.scaler.transform([vector])
+        vector_scaled = self.scaler.transform(vector)
         
         # 3. Infer
         prediction = self.model.predict(vector_scaled)[0]
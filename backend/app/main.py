@@ -1,12 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api import feeders, events, audit
+from .api import feeders, events, audit, stream, orchestrator as orchestrator_api, metrics as metrics_api, traces
 from .api.beckn import routes as beckn_routes
+from .core.telemetry import telemetry_ticker
+from .core.stream import feeder_stream
+from .core.beckn_client import beckn_client, transaction_store
+from .core.orchestrator import orchestrator
+from .core.loop_monitor import loop_monitor
+from .core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="FLUXEON Backend - DEG Hackathon", version="0.2.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: event loop lag sampler + blocking-call watchdog
+    if settings.loop_monitor_enabled:
+        await loop_monitor.start()
+    # Startup: transaction store (replays the audit journal / starts change polling)
+    await transaction_store.start()
+    # Startup: pooled HTTP clients for the sandbox and ONIX
+    await beckn_client.start()
+    await orchestrator.start()
+    # Startup: background telemetry (simulation + risk inference -> snapshots)
+    # Each snapshot is also pushed to /stream subscribers as a delta
+    telemetry_ticker.add_listener(feeder_stream.on_snapshot)
+    await telemetry_ticker.start()
+    yield
+    # Shutdown
+    await telemetry_ticker.stop()
+    await orchestrator.stop()
+    await beckn_client.close()
+    await transaction_store.stop()
+    await loop_monitor.stop()
+
+app = FastAPI(title="FLUXEON Backend - DEG Hackathon", version="0.2.0", lifespan=lifespan)
 
 # CORS: permitir frontend en 3000
 origins = [
@@ -26,6 +55,10 @@ app.add_middleware(
 app.include_router(feeders.router, prefix="/feeders", tags=["feeders"])
 app.include_router(events.router, prefix="/events", tags=["events"])
 app.include_router(audit.router, prefix="/audit", tags=["audit"])
+app.include_router(stream.router, prefix="/stream", tags=["stream"])
+app.include_router(orchestrator_api.router, prefix="/orchestrator", tags=["orchestrator"])
+app.include_router(metrics_api.router, prefix="/metrics", tags=["metrics"])
+app.include_router(traces.router, prefix="/traces", tags=["traces"])
 app.include_router(beckn_routes.router, prefix="/beckn/webhook", tags=["beckn"])
 
 # ============================================================================
@@ -0,0 +1,28 @@
+# backend/app/models/audit.py
+"""
+Audit journal record types for FLUXEON (P444 compliance).
+Every transaction store write is journaled as one operation record;
+replaying the records in order rebuilds the store.
+"""
+from enum import Enum
+
+# ============================================================================
+# ENUMS
+# ============================================================================
+
+class JournalOp(str, Enum):
+    """Operation carried by a journal record (the record's "op" field)."""
+    PUT = "put"                   # {"txn": full transaction snapshot}
+    STATUS = "status"             # {"id", "status"}
+    OBP_ID = "obp_id"             # {"id", "obp_id"}
+    RESPONSE = "response"         # {"id", "payload"}
+    UPDATE = "update"             # {"id", "fields"}
+    METRICS = "metrics"           # {"id", "metrics"}
+    ALLOCATIONS = "allocations"   # {"id", "allocations"}
+    ALLOCATION = "allocation"     # {"id", "provider_id", "fields"}
+    HISTORY = "history"           # {"id", "entry"}
+    ARCHIVE = "archive"           # {"txn": final snapshot}, transaction left memory
+
+
+# Record header flags
+FLAG_COMPRESSED = 0x01            # Payload is zlib-compressed JSON
@@ -74,6 +74,7 @@ class BecknTransaction(BaseModel):
     provider_id: Optional[str] = Field(None, description="Selected provider BAP ID")
     provider_name: Optional[str] = Field(None, description="Provider name")
     quoted_price: Optional[float] = Field(None, description="Quoted price for service")
+    allocations: List[Dict[str, Any]] = Field(default_factory=list, description="Per-provider share of the flexibility (multi-provider orders)")
     metrics: Dict[str, Any] = Field(default_factory=dict, description="Performance metrics and measurements")
     history: List[Dict[str, Any]] = Field(default_factory=list, description="Audit trail history")
     
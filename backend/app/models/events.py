@@ -0,0 +1,15 @@
+# backend/app/models/events.py
+"""
+Flexibility event models for FLUXEON.
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class FlexibilityRequest(BaseModel):
+    """A feeder asking the Beckn network for flexibility in a time window"""
+    feeder_id: str
+    risk_level: int = Field(..., ge=0, le=2)   # 0: Normal, 1: Warning, 2: Critical
+    flexibility_kw: float = Field(..., gt=0)
+    window_start: datetime
+    window_end: datetime
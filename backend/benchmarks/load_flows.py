@@ -0,0 +1,198 @@
+# benchmarks/load_flows.py
+"""
+End-to-end orchestration load test against the in-process mock sandbox/ONIX.
+
+Runs full run_agent flows (DISCOVER -> allocate -> SELECT/INIT/CONFIRM per
+provider, callbacks through /beckn/webhook) at increasing concurrency and
+reports completed orchestrations per second plus per-stage latency from the
+fluxeon_beckn_stage_ms histograms.
+
+Usage (from backend/):
+    python -m benchmarks.load_flows                                    # 1, 10, 100, 1000 concurrent flows
+    python -m benchmarks.load_flows -c 10 100 --flows 500 --delay-ms 50 --jitter-ms 25
+    python -m benchmarks.load_flows --failure-rate 0.05 --failure-mode drop --callback-timeout 2
+    python -m benchmarks.load_flows --output benchmarks/results/load.json
+
+The audit journal goes to a temporary directory unless AUDIT_JOURNAL_DIR is set.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Before the app is imported: load-test transactions must not end up in the dev journal
+os.environ.setdefault("AUDIT_JOURNAL_DIR", tempfile.mkdtemp(prefix="fluxeon-load-"))
+
+import httpx
+
+from app.main import app
+from app.core import beckn_client as beckn_client_module
+from app.core import metrics
+from app.core.audit_log import audit_journal
+from app.core.beckn_client import BecknClient, run_agent
+from app.core.config import settings
+from app.core.metrics import Histogram
+from benchmarks.mock_network import FAILURE_MODES, MockBecknNetwork, MockNetworkConfig
+
+DEFAULT_LEVELS = (1, 10, 100, 1000)
+STAGES = (
+    metrics.STAGE_DISCOVER, metrics.STAGE_ON_SEARCH_WAIT, metrics.STAGE_SELECT,
+    metrics.STAGE_INIT, metrics.STAGE_CONFIRM, metrics.STAGE_END_TO_END,
+)
+
+# ============================================================================
+# LOAD RUN
+# ============================================================================
+
+async def run_level(
+    concurrency: int,
+    flows: int,
+    network_config: MockNetworkConfig,
+    flexibility_kw: float = 80.0
+) -> Dict[str, Any]:
+    """
+    Runs `flows` orchestrations, at most `concurrency` at a time, against a
+    fresh mock network. Stage histograms are reset first so every level is
+    measured on its own.
+    """
+    metrics.beckn_stage_ms.clear()
+    metrics.beckn_stage_failures.clear()
+    end_to_end = Histogram()
+    errors: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    now = datetime.utcnow()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fluxeon") as webhook:
+        network = MockBecknNetwork(webhook, network_config)
+        client = BecknClient(transport=httpx.ASGITransport(app=network.app))
+        previous, beckn_client_module.beckn_client = beckn_client_module.beckn_client, client
+
+        async def flow(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                result = await run_agent(f"LOAD-{i % 50}", 2, flexibility_kw, now, now + timedelta(hours=1))
+                if result.get("success"):
+                    end_to_end.record((time.perf_counter() - start) * 1000)
+                else:
+                    errors[str(result.get("error", "partial allocation")).split(":")[0]] += 1
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(flow(i) for i in range(flows)))
+            wall_s = time.perf_counter() - started
+            await network.drain()
+        finally:
+            beckn_client_module.beckn_client = previous
+            await client.close()
+
+    stages = {}
+    for labels, histogram in metrics.beckn_stage_ms.children():
+        p50, p90, p99 = histogram.percentiles((0.5, 0.9, 0.99))
+        stages[labels["stage"]] = {"count": histogram.count, "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": histogram.max_ms}
+    for labels, counter in metrics.beckn_stage_failures.children():
+        stages.setdefault(labels["stage"], {"count": 0})["failures"] = counter.value
+
+    completed = end_to_end.count
+    return {
+        "concurrency": concurrency,
+        "flows": flows,
+        "completed": completed,
+        "failed": flows - completed,
+        "wall_s": wall_s,
+        "flows_per_s": completed / wall_s if wall_s > 0 else 0.0,
+        "latency_ms": dict(zip(("p50", "p90", "p99"), end_to_end.percentiles((0.5, 0.9, 0.99)))),
+        "stages": stages,
+        "errors": dict(errors.most_common(5)),
+        "network": dict(network.stats),
+    }
+
+
+def print_level(result: Dict[str, Any]):
+    latency = result["latency_ms"]
+    print(f"\n▶ {result['concurrency']} concurrent: {result['completed']}/{result['flows']} completed in {result['wall_s']:.2f}s "
+          f"-> {result['flows_per_s']:.1f} orchestrations/s "
+          f"(end-to-end p50={latency['p50']:.1f} p90={latency['p90']:.1f} p99={latency['p99']:.1f} ms)")
+    for stage in STAGES:
+        stats = result["stages"].get(stage)
+        if stats is None:
+            continue
+        line = f"    {stage:15s} n={stats['count']:<6d}"
+        if stats["count"]:
+            line += f" p50={stats['p50_ms']:8.1f}  p90={stats['p90_ms']:8.1f}  p99={stats['p99_ms']:8.1f}  max={stats['max_ms']:8.1f} ms"
+        if stats.get("failures"):
+            line += f"  failures={stats['failures']:.0f}"
+        print(line)
+    for error, count in result["errors"].items():
+        print(f"    ✗ {count} x {error}")
+
+
+async def run(levels: Sequence[int], flows: Optional[int], network_config: MockNetworkConfig, flexibility_kw: float) -> List[Dict[str, Any]]:
+    results = []
+    try:
+        for concurrency in levels:
+            # Default: enough flows to keep every slot busy for a few rounds
+            count = flows or max(50, 3 * concurrency)
+            result = await run_level(concurrency, count, network_config, flexibility_kw)
+            print_level(result)
+            results.append(result)
+    finally:
+        await asyncio.to_thread(audit_journal.close)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="FLUXEON orchestration load test (in-process mock sandbox/ONIX)")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=list(DEFAULT_LEVELS), help="Concurrent flows per level (default 1 10 100 1000)")
+    parser.add_argument("--flows", type=int, help="Flows per level (default max(50, 3 x concurrency))")
+    parser.add_argument("--kw", type=float, default=80.0, help="Flexibility requested per flow (default 80 kW)")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Mean callback delay (default 20 ms)")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Callback delay jitter (default ±10 ms)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail (default 0)")
+    parser.add_argument("--failure-mode", choices=FAILURE_MODES, default="nack", help="nack: HTTP error, drop: no callback")
+    parser.add_argument("--catalog-size", type=int, default=5, help="DER providers per catalog (default 5)")
+    parser.add_argument("--callback-timeout", type=float, help=f"Per-callback wait (default BECKN_CALLBACK_TIMEOUT_S = {settings.beckn_callback_timeout_s:g}s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Keep the orchestrator's logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.CRITICAL)
+    if args.callback_timeout is not None:
+        settings.beckn_callback_timeout_s = args.callback_timeout
+
+    network_config = MockNetworkConfig(
+        delay_ms=args.delay_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode,
+        catalog_size=args.catalog_size,
+        seed=args.seed
+    )
+    print("=" * 70)
+    print(f"FLUXEON orchestration load test: levels {args.concurrency}, callbacks after "
+          f"{args.delay_ms:g}±{args.jitter_ms:g} ms, failure rate {args.failure_rate:g} ({args.failure_mode}), "
+          f"{args.catalog_size} providers, {args.kw:g} kW per flow")
+    print("=" * 70)
+    results = asyncio.run(run(args.concurrency, args.flows, network_config, args.kw))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "levels": results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
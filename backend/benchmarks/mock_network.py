@@ -0,0 +1,133 @@
+# benchmarks/mock_network.py
+"""
+In-process stand-in for the DEG BAP sandbox and the ONIX adapter.
+
+MockBecknNetwork is an ASGI app that ACKs /api/discover, /api/confirm,
+/api/status, /bap/caller/select and /bap/caller/init, then fires the matching
+on_* callback into FLUXEON's /beckn/webhook routes after a configurable
+delay (+ jitter). A failure rate makes requests fail: NACKed with an HTTP
+error ("nack") or ACKed without any callback ("drop", the flow times out).
+
+Wire it up with httpx.ASGITransport on both sides, no sockets involved:
+
+    webhook = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fluxeon")
+    network = MockBecknNetwork(webhook, MockNetworkConfig(delay_ms=20))
+    client = BecknClient(transport=httpx.ASGITransport(app=network.app))
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Request path -> (action, callback route)
+ROUTES = {
+    "/api/discover": ("discover", "on_search"),
+    "/bap/caller/select": ("select", "on_select"),
+    "/bap/caller/init": ("init", "on_init"),
+    "/api/confirm": ("confirm", "on_confirm"),
+    "/api/status": ("status", "on_status"),
+}
+
+FAILURE_MODES = ("nack", "drop")
+
+
+@dataclass
+class MockNetworkConfig:
+    delay_ms: float = 20.0          # Mean time before the on_* callback
+    jitter_ms: float = 10.0         # Callback delay is uniform in delay_ms ± jitter_ms
+    failure_rate: float = 0.0       # Fraction of requests that fail
+    failure_mode: str = "nack"      # "nack": HTTP 503, "drop": ACK but never call back
+    catalog_size: int = 3           # DER providers in every on_search catalog
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.failure_mode not in FAILURE_MODES:
+            raise ValueError(f"failure_mode must be one of {FAILURE_MODES}, got {self.failure_mode!r}")
+
+
+def build_catalog(size: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """`size` DER providers with one flexibility item each (price per MWh, kW available)."""
+    return [
+        {
+            "id": f"der-{i:04d}",
+            "descriptor": {"name": f"Mock DER {i}"},
+            "items": [{
+                "id": f"der-{i:04d}-flex",
+                "price": {"value": str(rng.randint(200, 1000))},
+                "quantity": {"available": {"count": str(rng.randint(10, 60))}},
+            }],
+        }
+        for i in range(size)
+    ]
+
+
+class MockBecknNetwork:
+    """Sandbox + ONIX in one ASGI app, calling back through the `webhook` client."""
+
+    def __init__(self, webhook: httpx.AsyncClient, config: Optional[MockNetworkConfig] = None, prefix: str = "/beckn/webhook"):
+        self.webhook = webhook
+        self.config = config or MockNetworkConfig()
+        self.prefix = prefix
+        self.rng = random.Random(self.config.seed)
+        self.catalog = build_catalog(self.config.catalog_size, self.rng)
+        self.stats: Dict[str, int] = {"requests": 0, "nacked": 0, "dropped": 0, "callbacks": 0, "callback_errors": 0}
+        self._pending: Set[asyncio.Task] = set()
+
+        self.app = FastAPI(title="Mock DEG sandbox / ONIX")
+        for path, (action, callback) in ROUTES.items():
+            self.app.add_api_route(path, self._endpoint(action, callback), methods=["POST"])
+
+    def _endpoint(self, action: str, callback: str):
+        async def endpoint(request: Request):
+            return await self._handle(await request.json(), action, callback)
+        endpoint.__name__ = f"mock_{action}"
+        return endpoint
+
+    async def _handle(self, payload: Dict[str, Any], action: str, callback: str) -> JSONResponse:
+        self.stats["requests"] += 1
+        if self.config.failure_rate and self.rng.random() < self.config.failure_rate:
+            if self.config.failure_mode == "nack":
+                self.stats["nacked"] += 1
+                return JSONResponse(
+                    status_code=503,
+                    content={"message": {"ack": {"status": "NACK"}}, "error": {"code": "30000", "message": f"Mock {action} failure"}}
+                )
+            self.stats["dropped"] += 1
+            return JSONResponse(content={"message": {"ack": {"status": "ACK"}}})
+
+        task = asyncio.create_task(self._callback(callback, self._response(payload, action)))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return JSONResponse(content={"message": {"ack": {"status": "ACK"}}})
+
+    def _response(self, payload: Dict[str, Any], action: str) -> Dict[str, Any]:
+        context = dict(payload.get("context", {}), action=f"on_{action}")
+        if action == "discover":
+            return {"context": context, "message": {"catalog": {"providers": self.catalog}}}
+        order = payload.get("message", {}).get("order", {})
+        provider = order.get("provider", {})
+        body = {"id": f"OBP-{provider.get('id')}-{context.get('transaction_id', '')[:8]}", "provider": provider}
+        if action == "select":
+            body["quote"] = {"price": {"currency": "EUR", "value": str(self.rng.randint(50, 500))}}
+        elif action == "status":
+            body = {"id": order.get("id"), "status": "ACTIVE"}
+        return {"context": context, "message": {"order": body}}
+
+    async def _callback(self, route: str, body: Dict[str, Any]):
+        delay = self.config.delay_ms + self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        await asyncio.sleep(max(delay, 0.0) / 1000)
+        try:
+            response = await self.webhook.post(f"{self.prefix}/{route}", json=body)
+            response.raise_for_status()
+            self.stats["callbacks"] += 1
+        except Exception:
+            self.stats["callback_errors"] += 1
+
+    async def drain(self):
+        """Waits for the callbacks still in flight."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
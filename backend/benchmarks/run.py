@@ -0,0 +1,392 @@
+# benchmarks/run.py
+"""
+Benchmark suite for the hot paths: simulator, feature extraction, risk
+inference (single and batch) and the /feeders endpoints (through the ASGI app).
+
+Each benchmark is calibrated so one round lasts ~min_time/rounds, then timed
+for `rounds` rounds; per-call statistics go to a JSON file that can serve as
+the baseline of a later run.
+
+Usage (from backend/):
+    python -m benchmarks.run                                   # Run all, write benchmarks/results/latest.json
+    python -m benchmarks.run -k predict                        # Only benchmarks whose name contains "predict"
+    python -m benchmarks.run --output benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json --threshold 0.2
+                                                               # Exit code 1 if a median got >20% slower
+
+A benchmark that raises is recorded as {"error": ...} in the JSON and makes
+the run exit with code 1; so does a baseline benchmark that errors or is
+missing in the compared run.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+DEFAULT_THRESHOLD = 0.25    # Median per-call time more than 25% above the baseline = regression
+FAILING_STATUSES = ("regression", "error", "missing")
+T0 = datetime(2025, 11, 24, 17, 0)
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], ContextManager[Callable[[], Any]]]   # Yields the zero-argument call to time
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str):
+    """Registers a generator that prepares the inputs, yields the call to time and cleans up."""
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, contextmanager(setup)))
+        return setup
+    return register
+
+# ============================================================================
+# SIMULATOR + FEATURES
+# ============================================================================
+
+@benchmark("simulator.get_reading")
+def bench_get_reading() -> Iterator[Callable]:
+    from app.core.simulator import GridSimulator
+    simulator = GridSimulator()
+    yield lambda: simulator.get_reading(T0)
+
+
+@benchmark("simulator.get_readings[2x29]")
+def bench_get_readings() -> Iterator[Callable]:
+    # One telemetry tick: 2 feeders x (24 history + now + 4 forecast) timestamps
+    from app.core.simulator import GridSimulator
+    simulator = GridSimulator()
+    timestamps = [T0 + timedelta(minutes=15 * i) for i in range(-24, 5)]
+    yield lambda: simulator.get_readings(timestamps, feeder_ids=["F1", "F2"], inject_spikes=False)
+
+
+@benchmark("simulator.generate_history[30d]")
+def bench_generate_history() -> Iterator[Callable]:
+    from app.core.simulator import GridSimulator
+    simulator = GridSimulator()
+    yield lambda: simulator.generate_history(days=30, seed=1, start_time=T0)
+
+
+@benchmark("features.prepare_features[30d]")
+def bench_prepare_features() -> Iterator[Callable]:
+    from app.core.simulator import GridSimulator
+    from app.core.features import prepare_features
+    df = GridSimulator().generate_history(days=30, seed=1, start_time=T0)
+    yield lambda: prepare_features(df)
+
+# ============================================================================
+# INFERENCE
+# ============================================================================
+
+def _pipeline(use_native: bool):
+    """A private TSPipeline (the ai_brain singleton is left untouched)."""
+    from app.core.ts_pipeline import TSPipeline
+    pipeline = TSPipeline()
+    if pipeline.model is None:
+        raise RuntimeError("model not trained (python -m app.core.agent_core)")
+    pipeline.use_native = use_native
+    return pipeline
+
+
+def _predict_risk(use_native: bool) -> Iterator[Callable]:
+    from app.core.simulator import GridSimulator
+    from app.models.feeder import FeederReading
+    pipeline = _pipeline(use_native)
+    df = GridSimulator().generate_history(days=30, seed=1, start_time=T0)
+    readings = [FeederReading(**row) for row in df.to_dict("records")]
+    windows = [readings[i:i + 4] for i in range(len(readings) - 4)]
+    calls = iter(range(1 << 62))
+    yield lambda: pipeline.predict_risk(windows[next(calls) % len(windows)], feeder_id="F1")
+
+
+def _predict_risk_batch(use_native: bool, n_feeders: int) -> Iterator[Callable]:
+    pipeline = _pipeline(use_native)
+    rng = np.random.default_rng(1)
+    loads = rng.uniform(200, 1500, size=(n_feeders, 4))
+    temps = rng.uniform(5, 35, size=(n_feeders, 4))
+    is_workday = rng.random(n_feeders) < 0.7
+    yield lambda: pipeline.predict_risk_batch(loads, temps, is_workday)
+
+
+@benchmark("inference.predict_risk[native]")
+def bench_predict_native() -> Iterator[Callable]:
+    yield from _predict_risk(use_native=True)
+
+
+@benchmark("inference.predict_risk[sklearn]")
+def bench_predict_sklearn() -> Iterator[Callable]:
+    yield from _predict_risk(use_native=False)
+
+
+@benchmark("inference.predict_risk_batch[native,100]")
+def bench_batch_native() -> Iterator[Callable]:
+    yield from _predict_risk_batch(use_native=True, n_feeders=100)
+
+
+@benchmark("inference.predict_risk_batch[sklearn,100]")
+def bench_batch_sklearn() -> Iterator[Callable]:
+    yield from _predict_risk_batch(use_native=False, n_feeders=100)
+
+# ============================================================================
+# API (ASGI app in-process, no network)
+# ============================================================================
+
+@contextmanager
+def _asgi_get(path: str, ticker_running: bool) -> Iterator[Callable]:
+    import httpx
+    from app.main import app
+    from app.core.telemetry import telemetry_ticker
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    interval = telemetry_ticker.interval_s
+    if ticker_running:
+        # Serve the published snapshot; no tick lands inside the measurement
+        telemetry_ticker.interval_s = 3600
+        loop.run_until_complete(telemetry_ticker.start())
+
+    def get():
+        response = loop.run_until_complete(client.get(path))
+        response.raise_for_status()
+        return response
+
+    try:
+        yield get
+    finally:
+        if ticker_running:
+            loop.run_until_complete(telemetry_ticker.stop())
+            telemetry_ticker.interval_s = interval
+        loop.run_until_complete(client.aclose())
+        loop.close()
+
+
+@benchmark("api.feeders[snapshot]")
+def bench_feeders_snapshot() -> Iterator[Callable]:
+    with _asgi_get("/feeders", ticker_running=True) as get:
+        yield get
+
+
+@benchmark("api.feeders[on_demand]")
+def bench_feeders_on_demand() -> Iterator[Callable]:
+    # Ticker stopped: every request simulates and scores a fresh snapshot
+    with _asgi_get("/feeders", ticker_running=False) as get:
+        yield get
+
+
+@benchmark("api.feeder_state[snapshot]")
+def bench_feeder_state() -> Iterator[Callable]:
+    with _asgi_get("/feeders/F1/state", ticker_running=True) as get:
+        yield get
+
+# ============================================================================
+# TIMING
+# ============================================================================
+
+def measure(fn: Callable[[], Any], min_time_s: float = 1.0, rounds: int = 20) -> Dict[str, float]:
+    """
+    Per-call statistics (µs) of fn. The call count per round is calibrated
+    so that each round lasts about min_time_s / rounds.
+    """
+    round_target = min_time_s / rounds
+    fn()  # Warm-up (imports, caches, first allocation)
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= round_target or iterations >= 1 << 20:
+            break
+        iterations = max(iterations * 2, int(iterations * round_target / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations * 1e6)
+
+    median = statistics.median(samples)
+    return {
+        "median_us": median,
+        "mean_us": statistics.fmean(samples),
+        "min_us": min(samples),
+        "max_us": max(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_s": 1e6 / median if median > 0 else float("inf"),
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def run(selected: List[Benchmark], min_time_s: float = 1.0, rounds: int = 20) -> Dict[str, Dict[str, Any]]:
+    """Times every selected benchmark; one that raises is recorded as {"error": "..."}."""
+    results = {}
+    for bench in selected:
+        try:
+            # The simulator and model loader print progress: keep it out of the report
+            with redirect_stdout(io.StringIO()), bench.setup() as fn:
+                results[bench.name] = measure(fn, min_time_s, rounds)
+        except Exception as e:
+            results[bench.name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  ✗ {bench.name} failed: {results[bench.name]['error']}")
+            continue
+        stats = results[bench.name]
+        print(f"  {bench.name:45s} median={_fmt(stats['median_us'])}  min={_fmt(stats['min_us'])}  "
+              f"stdev={_fmt(stats['stdev_us'])}  ({stats['iterations']} x {stats['rounds']})")
+    return results
+
+
+def _fmt(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:8.2f} s "
+    if us >= 1e3:
+        return f"{us / 1e3:8.2f} ms"
+    return f"{us:8.1f} us"
+
+# ============================================================================
+# BASELINE + COMPARISON
+# ============================================================================
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers come from (results are only comparable on the same machine)."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Median-to-median comparison. status is "regression" when a benchmark got
+    more than `threshold` slower, "improvement" when it got that much faster,
+    "error" when it raised in the current run, "new" / "missing" when it has
+    timings on one side only. FAILING_STATUSES fail the comparison.
+    """
+    rows = []
+    for name in sorted(set(current) | set(baseline)):
+        now, before = current.get(name), baseline.get(name)
+        if now is not None and "error" in now:
+            rows.append({"name": name, "status": "error", "error": now["error"]})
+            continue
+        if before is None or now is None or "error" in before:
+            rows.append({"name": name, "status": "missing" if now is None else "new"})
+            continue
+        ratio = now["median_us"] / before["median_us"] if before["median_us"] > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "name": name,
+            "status": status,
+            "baseline_us": before["median_us"],
+            "current_us": now["median_us"],
+            "ratio": ratio,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    print("=" * 70)
+    print(f"Comparison against baseline (threshold ±{threshold:.0%} on the median)")
+    print("=" * 70)
+    marks = {"regression": "✗", "improvement": "✓", "ok": " ", "new": "+", "missing": "✗", "error": "✗"}
+    for row in rows:
+        if "ratio" in row:
+            print(f"  {marks[row['status']]} {row['name']:45s} {_fmt(row['baseline_us'])} -> {_fmt(row['current_us'])}  "
+                  f"x{row['ratio']:.2f}  {row['status']}")
+        else:
+            print(f"  {marks[row['status']]} {row['name']:45s} {row['status']}" + (f": {row['error']}" if "error" in row else ""))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="FLUXEON hot-path benchmarks")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="Only benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds spent timing each benchmark (default 1.0)")
+    parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per benchmark (default 20)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"Results JSON (default {os.path.relpath(DEFAULT_OUTPUT)})")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON to compare against; exit code 1 on regressions, errors or missing benchmarks")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Relative slowdown counted as a regression (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS if not args.filter or any(f in b.name for f in args.filter)]
+    if args.list:
+        print("\n".join(b.name for b in selected))
+        return 0
+    if args.rounds < 2:
+        parser.error("--rounds must be at least 2")
+
+    warnings.simplefilter("ignore")
+    print("=" * 70)
+    print(f"FLUXEON benchmarks ({len(selected)} selected, ~{args.min_time:g}s each)")
+    print("=" * 70)
+    results = run(selected, args.min_time, args.rounds)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "benchmarks": results}, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+    errors = [name for name, stats in results.items() if "error" in stats]
+
+    if not args.compare:
+        if errors:
+            print(f"\n✗ {len(errors)} benchmark(s) failed: {', '.join(errors)}")
+            return 1
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    # Benchmarks left out by -k aren't reported as missing
+    names = {b.name for b in selected}
+    rows = compare(results, {k: v for k, v in baseline["benchmarks"].items() if k in names}, args.threshold)
+    print_comparison(rows, args.threshold)
+    failures = [f"{row['name']} ({row['status']})" for row in rows if row["status"] in FAILING_STATUSES]
+    if failures:
+        print(f"\n✗ {len(failures)} failing benchmark(s): {', '.join(failures)}")
+        return 1
+    print("\n✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+# tests/conftest.py
+"""
+Shared test setup: the audit journal writes to a throwaway directory so test
+runs never replay (or pollute) the real journal.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("AUDIT_JOURNAL_DIR", tempfile.mkdtemp(prefix="fluxeon-journal-"))
+os.environ.setdefault("AUDIT_JOURNAL_FSYNC", "false")
@@ -0,0 +1,151 @@
+# tests/test_audit_log.py
+"""
+Test suite for the append-only audit journal and store replay.
+"""
+from datetime import datetime
+import asyncio
+import time
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.audit_log import AuditJournal, read_segment
+from app.core.transaction_store import TransactionStore
+from app.models.beckn import BecknTransaction, BecknAction, TransactionStatus
+
+
+def make_transaction(transaction_id: str) -> BecknTransaction:
+    return BecknTransaction(
+        transaction_id=transaction_id,
+        message_id="msg-" + transaction_id,
+        feeder_id="F1",
+        action=BecknAction.SEARCH,
+        created_at=datetime(2025, 11, 24, 17, 0)
+    )
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_replay_rebuilds_store(tmp_path):
+    """Every store write is journaled; a new process rebuilds the same state."""
+    journal = AuditJournal(str(tmp_path), fsync=False)
+    store = TransactionStore(max_entries=2, spill=journal.archive, journal=journal)
+    store.add(make_transaction("t1"))
+    store.append_history("t1", "DISCOVER -> sandbox", latency_ms=12)
+    store.set_response("t1", {"message": {"catalog": {"providers": [{"id": "P1"}]}}})
+    store.set_allocations("t1", [{"provider_id": "P1", "allocated_kw": 40.0, "status": "PENDING"}])
+    store.update_allocation("t1", "P1", obp_id="OBP-P1", status="CONFIRMED")
+    store.update("t1", quoted_price=3.5)
+    store.update_metrics("t1", latency_ms=120)
+    store.set_status("t1", TransactionStatus.CONFIRMED)
+    store.add(make_transaction("t2"))
+    store.add(make_transaction("t3"))  # Over budget: t1 is archived
+    assert "t1" not in store
+    journal.close()
+
+    reopened = AuditJournal(str(tmp_path))
+    restored = TransactionStore(journal=reopened)
+    assert restored.restore(reopened.replay()) == journal.appended
+    assert sorted(restored) == ["t2", "t3"]  # Archived transactions stay archived
+    archived = reopened.lookup("OBP-P1")
+    assert archived["history"][0]["message"] == "DISCOVER -> sandbox"
+    assert archived["quoted_price"] == 3.5 and archived["status"] == "CONFIRMED"
+
+    # Replay is idempotent within a process and nothing was re-journaled
+    assert list(reopened.replay()) == [] and reopened.appended == 0
+
+
+def test_replay_keeps_live_state(tmp_path):
+    """Resident transactions come back with their indexes, history and allocations."""
+    journal = AuditJournal(str(tmp_path), fsync=False)
+    store = TransactionStore(journal=journal)
+    store.add(make_transaction("t1"))
+    store.set_allocations("t1", [{"provider_id": "P1", "status": "PENDING"}])
+    store.update_allocation("t1", "P1", obp_id="OBP-P1")
+    store.set_obp_id("t1", "OBP-T1")
+    store.set_status("t1", TransactionStatus.INIT_RECEIVED)
+    entry = store.append_history("t1", "INIT -> P1")
+    journal.close()
+
+    restored = TransactionStore()
+    restored.restore(AuditJournal(str(tmp_path)).replay())
+    transaction = restored.by_obp_id("OBP-P1")
+    assert transaction is restored.by_obp_id("OBP-T1")
+    assert transaction.status == TransactionStatus.INIT_RECEIVED
+    assert transaction.history == [entry]
+    assert restored.count_by_status() == {"INIT_RECEIVED": 1}
+
+
+def test_startup_compacts_journal(tmp_path):
+    """start() replays off the loop and leaves one snapshot segment with the same state and archive lookups."""
+    journal = AuditJournal(str(tmp_path), segment_bytes=1500, fsync=False)
+    store = TransactionStore(max_entries=3, spill=journal.archive, journal=journal)
+    for i in range(6):
+        store.add(make_transaction(f"t{i}"))
+        store.set_allocations(f"t{i}", [{"provider_id": "P1", "status": "PENDING"}])
+        store.update_allocation(f"t{i}", "P1", obp_id=f"OBP-{i}", status="CONFIRMED")
+        for j in range(10):
+            store.append_history(f"t{i}", f"STATUS -> {j}")
+        store.set_status(f"t{i}", TransactionStatus.CONFIRMED)
+        journal.flush()  # One batch per transaction: segments rotate between batches
+    journal.close()
+    assert len(journal.segments()) > 3
+
+    reopened = AuditJournal(str(tmp_path), fsync=False)
+    restored = TransactionStore(max_entries=3, spill=reopened.archive, journal=reopened)
+    asyncio.run(restored.start())
+    assert len(reopened.segments()) == 1 and reopened.compacted > 3
+    assert sorted(restored) == ["t3", "t4", "t5"]
+    assert len(restored["t5"].history) == 10
+    assert reopened.lookup("OBP-0")["transaction_id"] == "t0"
+
+    # Writes after compaction go to a new segment; the next start compacts both
+    restored.append_history("t5", "after restart")
+    asyncio.run(restored.stop())
+    again = AuditJournal(str(tmp_path), fsync=False)
+    rebuilt = TransactionStore(journal=again)
+    asyncio.run(rebuilt.start())
+    assert len(again.segments()) == 1
+    assert rebuilt["t5"].history[-1]["message"] == "after restart"
+    assert again.lookup("OBP-2")["status"] == "CONFIRMED"
+
+
+def test_torn_tail_and_rotation(tmp_path):
+    """Segments rotate by size; a torn record at the tail is ignored on replay."""
+    journal = AuditJournal(str(tmp_path), segment_bytes=2000, compress_min_bytes=256, fsync=False)
+    for i in range(60):
+        journal.append({"op": "history", "id": "t", "entry": {"message": "x" * (i * 10)}})
+        journal.flush()
+    journal.close()
+    segments = journal.segments()
+    assert len(segments) > 1
+
+    last = segments[-1][1]
+    count = len(list(read_segment(last)))
+    with open(last, "ab") as f:
+        f.write(b"\x00\x00\x01\x00garbage")  # Crash mid-write
+    replayed = list(AuditJournal(str(tmp_path)).replay())
+    assert len(replayed) == 60
+    assert len(list(read_segment(last))) == count
+    assert replayed[-1]["entry"]["message"] == "x" * 590
+
+
+def test_sustained_write_rate(tmp_path):
+    """Appends + group-committed fsyncs sustain well over 10k history entries/s."""
+    journal = AuditJournal(str(tmp_path))
+    store = TransactionStore(journal=journal)
+    store.add(make_transaction("t1"))
+
+    n = 20000
+    start = time.perf_counter()
+    for i in range(n):
+        store.append_history("t1", f"STATUS -> P{i % 10}", latency_ms=i)
+    assert journal.flush(timeout=30)
+    elapsed = time.perf_counter() - start
+    journal.close()
+
+    assert n / elapsed > 10000, f"{n / elapsed:.0f} entries/s"
+    assert journal.batches < n  # Group commit: many records per fsync
@@ -0,0 +1,211 @@
+# tests/test_beckn_client.py
+"""
+Test suite for the Beckn client orchestration helpers.
+"""
+import asyncio
+import json
+import time
+import httpx
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core import beckn_client as beckn_client_module
+from app.core.beckn_client import BecknClient, transaction_store, status_waiters, wait_for_callback
+from app.core.config import settings
+from app.models.beckn import BecknTransaction, BecknAction, TransactionStatus
+
+def make_transaction(transaction_id: str) -> BecknTransaction:
+    transaction = BecknTransaction(
+        transaction_id=transaction_id,
+        message_id="msg-" + transaction_id,
+        feeder_id="F1",
+        action=BecknAction.SEARCH
+    )
+    transaction_store[transaction_id] = transaction
+    return transaction
+
+# ============================================================================
+# CALLBACK WAITERS
+# ============================================================================
+
+def test_webhook_wakes_waiter_immediately():
+    """ON_SELECT resolves the waiter as soon as the route updates the store."""
+    async def scenario():
+        make_transaction("txn-wake")
+        waiter = asyncio.create_task(wait_for_callback("txn-wake", TransactionStatus.SELECT_RECEIVED, timeout_seconds=5))
+        await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/beckn/webhook/on_select", json={
+                "context": {"transaction_id": "txn-wake"},
+                "message": {"order": {"quote": {"price": {"value": "42"}}}}
+            })
+        assert response.status_code == 200
+        assert await waiter is True
+        assert time.perf_counter() - start < 0.5  # No poll interval involved
+        assert transaction_store["txn-wake"].quoted_price == 42.0
+        assert not status_waiters
+
+    asyncio.run(scenario())
+
+
+def test_wait_returns_for_reached_status_and_times_out():
+    """Already-reached statuses return at once; missing callbacks time out and clean up."""
+    async def scenario():
+        make_transaction("txn-timeout")
+        transaction_store.set_status("txn-timeout", TransactionStatus.INIT_RECEIVED)
+        assert await wait_for_callback("txn-timeout", TransactionStatus.INIT_RECEIVED, timeout_seconds=1)
+        assert not await wait_for_callback("txn-timeout", TransactionStatus.CONFIRMED, timeout_seconds=0.05)
+        assert not status_waiters
+
+    asyncio.run(scenario())
+
+
+def test_provider_callbacks_only_move_their_allocation():
+    """In a multi-provider order the first ON_CONFIRM neither confirms nor rewinds the transaction."""
+    async def scenario():
+        make_transaction("txn-multi")
+        transaction_store.set_status("txn-multi", TransactionStatus.SEARCH_RECEIVED)
+        transaction_store.set_allocations("txn-multi", [
+            {"provider_id": "P1", "status": "PENDING", "obp_id": None},
+            {"provider_id": "P2", "status": "PENDING", "obp_id": None},
+        ])
+        order = asyncio.create_task(wait_for_callback("txn-multi", TransactionStatus.CONFIRMED, timeout_seconds=5))
+        await asyncio.sleep(0)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.post("/beckn/webhook/on_confirm", json={
+                "context": {"transaction_id": "txn-multi"},
+                "message": {"order": {"id": "OBP-P1", "provider": {"id": "P1"}}}
+            })
+            await client.post("/beckn/webhook/on_select", json={
+                "context": {"transaction_id": "txn-multi"},
+                "message": {"order": {"provider": {"id": "P2"}, "quote": {"price": {"value": "42"}}}}
+            })
+        await asyncio.sleep(0.01)
+        assert not order.done()
+        order.cancel()
+
+    asyncio.run(scenario())
+    transaction = transaction_store["txn-multi"]
+    assert transaction.status == TransactionStatus.SEARCH_RECEIVED
+    assert transaction.obp_id == "OBP-P1" and transaction.quoted_price is None
+    assert [a["status"] for a in transaction.allocations] == ["CONFIRMED", "SELECT_RECEIVED"]
+    assert transaction.allocations[1]["quoted_price"] == 42.0
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+def test_pooled_clients_are_reused():
+    """Sends go through one long-lived client per base URL until close()."""
+    async def scenario():
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            return httpx.Response(200, json={"message": {"ack": {"status": "ACK"}}})
+
+        client = BecknClient(transport=httpx.MockTransport(handler))
+        await client.start()
+        sandbox = client._client(client.sandbox_url)
+        assert len(client._clients) == 2
+
+        await client.send_confirm("txn-pool", "prov-1", "item-1")
+        await client.send_status("txn-pool", "order-1")
+        assert client._client(client.sandbox_url) is sandbox
+        assert requests == ["/api/confirm", "/api/status"]
+
+        await client.close()
+        assert sandbox.is_closed and not client._clients
+
+    asyncio.run(scenario())
+
+# ============================================================================
+# MULTI-PROVIDER FLOW
+# ============================================================================
+
+CATALOG = [
+    {"id": "small", "items": [{"id": "s1", "price": {"value": "300"}, "quantity": {"available": {"count": "30"}}}]},
+    {"id": "medium", "items": [{"id": "m1", "price": {"value": "700"}, "quantity": {"available": {"count": "45"}}}]},
+    {"id": "large", "items": [{"id": "l1", "price": {"value": "900"}, "quantity": {"available": {"count": "55"}}}]},
+]
+
+def network_transport(webhook: httpx.AsyncClient, drop: tuple = ()) -> httpx.MockTransport:
+    """ACKs every request and answers asynchronously through the webhook routes (except `drop` actions)."""
+    async def callback(path: str, body: dict):
+        await asyncio.sleep(0.01)
+        await webhook.post(f"/beckn/webhook/{path}", json=body)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        context = payload["context"]
+        order = payload["message"].get("order", {})
+        provider = order.get("provider", {})
+        action = request.url.path.rsplit("/", 1)[-1]
+        if action == "discover":
+            body = {"context": context, "message": {"catalog": {"providers": CATALOG}}}
+        else:
+            body = {"context": context, "message": {"order": {
+                "id": f"OBP-{provider.get('id')}",
+                "provider": provider,
+                "quote": {"price": {"value": "100"}}
+            }}}
+        path = {"discover": "on_search", "select": "on_select", "init": "on_init", "confirm": "on_confirm"}[action]
+        if action not in drop:
+            asyncio.create_task(callback(path, body))
+        return httpx.Response(200, json={"message": {"ack": {"status": "ACK"}}})
+
+    return httpx.MockTransport(handler)
+
+
+def test_run_agent_allocates_across_providers(monkeypatch):
+    """80 kW exceeds every offer: two providers are confirmed in parallel under one transaction."""
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as webhook:
+            client = BecknClient(transport=network_transport(webhook))
+            monkeypatch.setattr(beckn_client_module, "beckn_client", client)
+            now = datetime.utcnow()
+            result = await beckn_client_module.run_agent("F1", 2, 80.0, now, now + timedelta(hours=1))
+            await client.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["success"] is True
+    # Cheapest cover of 80 kW: small (30) + large (55) = 1200 < medium + large = 1600
+    assert sorted(a["provider_id"] for a in result["allocations"]) == ["large", "small"]
+    assert all(a["status"] == "CONFIRMED" for a in result["allocations"])
+    assert abs(result["confirmed_kw"] - 80.0) < 1e-6
+    transaction = transaction_store[result["transaction_id"]]
+    assert transaction.obp_id in ("OBP-small", "OBP-large")
+    assert transaction.quoted_price == 200.0
+    assert any(entry["message"].startswith("ALLOCATE") for entry in transaction.history)
+
+
+def test_run_agent_fails_transaction_when_no_provider_confirms(monkeypatch):
+    """No ON_CONFIRM from any provider: the transaction ends FAILED, never CONFIRMED."""
+    monkeypatch.setattr(settings, "beckn_callback_timeout_s", 0.2)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as webhook:
+            client = BecknClient(transport=network_transport(webhook, drop=("confirm",)))
+            monkeypatch.setattr(beckn_client_module, "beckn_client", client)
+            now = datetime.utcnow()
+            result = await beckn_client_module.run_agent("F1", 2, 80.0, now, now + timedelta(hours=1))
+            await client.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert "ON_CONFIRM timeout" in result["error"] and not result.get("success")
+    transaction = transaction_store[result["transaction_id"]]
+    assert transaction.status == TransactionStatus.FAILED
+    assert all(a["status"] == "FAILED" for a in transaction.allocations)
+    assert transaction.history[-1]["message"].startswith("FAILED -> No provider confirmed")
@@ -0,0 +1,69 @@
+# tests/test_benchmarks.py
+"""
+Test suite for the benchmark runner (timing, JSON baseline, regression check).
+"""
+import json
+import sys
+from contextlib import contextmanager
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import benchmarks.run as run_module
+from benchmarks.run import BENCHMARKS, FAILING_STATUSES, Benchmark, compare, main, measure
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"a": {"median_us": 100.0}, "b": {"median_us": 100.0}, "c": {"median_us": 100.0}, "gone": {"median_us": 1.0}}
+    current = {"a": {"median_us": 119.0}, "b": {"median_us": 121.0}, "c": {"median_us": 80.0}, "added": {"median_us": 1.0}}
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.2)}
+
+    assert rows["a"]["status"] == "ok"
+    assert rows["b"]["status"] == "regression" and abs(rows["b"]["ratio"] - 1.21) < 1e-9
+    assert rows["c"]["status"] == "improvement"
+    assert rows["added"]["status"] == "new" and rows["gone"]["status"] == "missing"
+    assert "missing" in FAILING_STATUSES and "new" not in FAILING_STATUSES
+
+
+def test_run_writes_baseline_and_compares(tmp_path):
+    """Every hot path is registered; a run writes JSON that a second run compares against."""
+    names = {bench.name for bench in BENCHMARKS}
+    assert {"simulator.get_reading", "simulator.generate_history[30d]", "features.prepare_features[30d]",
+            "inference.predict_risk[native]", "inference.predict_risk_batch[native,100]",
+            "api.feeders[snapshot]", "api.feeder_state[snapshot]"} <= names
+
+    stats = measure(lambda: sum(range(100)), min_time_s=0.02, rounds=4)
+    assert stats["rounds"] == 4 and stats["min_us"] <= stats["median_us"] <= stats["max_us"]
+
+    baseline = str(tmp_path / "baseline.json")
+    argv = ["-k", "generate_history", "--min-time", "0.02", "--rounds", "4"]
+    assert main(argv + ["--output", baseline]) == 0
+    with open(baseline) as f:
+        saved = json.load(f)
+    assert set(saved["benchmarks"]) == {"simulator.generate_history[30d]"}
+    assert saved["environment"]["python"]
+
+    # Generous threshold: only the plumbing is under test here, not the machine's noise
+    assert main(argv + ["--output", str(tmp_path / "run.json"), "--compare", baseline, "--threshold", "100"]) == 0
+
+
+def test_errored_benchmark_is_recorded_and_fails(tmp_path, monkeypatch):
+    """A benchmark that raises lands in the JSON as an error and fails the run and the comparison."""
+    def broken():
+        raise RuntimeError("model not loaded")
+        yield
+
+    monkeypatch.setattr(run_module, "BENCHMARKS", [Benchmark("broken", contextmanager(broken))])
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"benchmarks": {"broken": {"median_us": 10.0}}}))
+    output = str(tmp_path / "run.json")
+
+    assert main(["--output", output, "--min-time", "0.02", "--rounds", "4"]) == 1
+    with open(output) as f:
+        assert json.load(f)["benchmarks"]["broken"] == {"error": "RuntimeError: model not loaded"}
+    assert main(["--output", output, "--compare", str(baseline)]) == 1
+    assert compare({"broken": {"error": "x"}}, {"broken": {"median_us": 10.0}})[0]["status"] == "error"
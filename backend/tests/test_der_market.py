@@ -0,0 +1,129 @@
+# tests/test_der_market.py
+"""
+Test suite for DER catalog flattening, ranking and allocation.
+"""
+import itertools
+import numpy as np
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.der_market import DerCatalog, rank_der_offers, allocate_flexibility
+from app.core.beckn_client import select_best_der
+
+def make_providers(n_providers: int, items_per_provider: int = 3, seed: int = 0):
+    """Random ON_SEARCH catalog with string-encoded numbers, as sent by the network."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": f"P{p}",
+            "items": [
+                {
+                    "id": f"P{p}-I{i}",
+                    "price": {"currency": "ARS", "value": str(round(float(rng.uniform(100, 5000)), 2))},
+                    "quantity": {"available": {"count": str(int(rng.integers(5, 200)))}}
+                }
+                for i in range(items_per_provider)
+            ]
+        }
+        for p in range(n_providers)
+    ]
+
+def reference_score(item):
+    price = float(item["price"]["value"])
+    capacity = float(item["quantity"]["available"]["count"])
+    return 0.6 * (1.0 / (1.0 + price / 1000.0)) + 0.4 * min(capacity / 100.0, 1.0)
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+def test_top_k_matches_full_sort():
+    """argpartition top-k equals the k best of a full per-item scoring loop."""
+    providers = make_providers(500)
+    expected = sorted(
+        ((reference_score(item), item["id"]) for p in providers for item in p["items"]),
+        key=lambda pair: -pair[0]
+    )
+    ranking = rank_der_offers(providers)
+    assert len(ranking.catalog) == 1500
+
+    top = ranking.top(10)
+    assert [offer["item_id"] for offer in top] == [item_id for _, item_id in expected[:10]]
+    assert np.allclose([offer["score"] for offer in top], [score for score, _ in expected[:10]])
+    # Fallback candidates come from the same scores
+    assert ranking.top(3) == top[:3]
+    assert len(ranking.top(5000)) == 1500
+
+
+def test_select_best_der_and_malformed_offers():
+    """Malformed offers are skipped, missing fields use defaults, empty catalogs give None."""
+    providers = [
+        {"id": "bad", "items": [{"id": "x", "price": {"value": "n/a"}}]},
+        {"id": "empty", "items": []},
+        {"id": "cheap", "items": [{"id": "c1", "price": {"value": "100"}, "quantity": {"available": {"count": "80"}}}]},
+        {"id": "noprice", "items": [{"id": "n1", "quantity": {"available": {"count": "100"}}}]},
+    ]
+    catalog = DerCatalog.from_providers(providers)
+    assert catalog.item_ids == ["c1", "n1"]
+    assert catalog.price[1] == 999999.0
+
+    best = select_best_der(providers)
+    assert best["provider_id"] == "cheap" and best["item_id"] == "c1"
+    assert best["capacity"] == 80.0
+    assert select_best_der([]) is None
+
+# ============================================================================
+# ALLOCATION
+# ============================================================================
+
+def brute_force_cover(catalog, requested_kw):
+    """Cheapest cover with at most one item per provider, by enumeration."""
+    groups = {}
+    for i, provider_id in enumerate(catalog.provider_ids):
+        groups.setdefault(provider_id, []).append(i)
+    best = None
+    for combo in itertools.product(*[[None] + g for g in groups.values()]):
+        chosen = [i for i in combo if i is not None]
+        if catalog.capacity_kw[chosen].sum() >= requested_kw:
+            price = catalog.price[chosen].sum()
+            best = price if best is None else min(best, price)
+    return best
+
+
+def test_allocation_is_min_cost_cover():
+    """Solver matches exhaustive search on small catalogs, one item per provider."""
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        provider_ids, prices, capacities = [], [], []
+        for p in range(int(rng.integers(2, 7))):
+            for _ in range(int(rng.integers(1, 3))):
+                provider_ids.append(f"P{p}")
+                prices.append(float(rng.integers(50, 2000)))
+                capacities.append(float(rng.integers(5, 120)))
+        catalog = DerCatalog(provider_ids, [str(i) for i in range(len(prices))], np.array(prices), np.array(capacities))
+        requested_kw = float(rng.integers(20, 300))
+
+        allocation = allocate_flexibility(catalog, requested_kw)
+        expected = brute_force_cover(catalog, requested_kw)
+        chosen_providers = [catalog.provider_ids[i] for i in allocation.indices]
+        assert len(set(chosen_providers)) == len(chosen_providers)
+        if expected is None:
+            assert allocation.method == "partial" and not allocation.covered
+        else:
+            assert allocation.covered
+            assert np.isclose(allocation.total_price, expected)
+
+
+def test_large_request_spans_providers():
+    """A request larger than any single DER is split; each share fits its offer."""
+    providers = make_providers(200, items_per_provider=2, seed=3)
+    catalog = rank_der_offers(providers).catalog
+    requested_kw = float(catalog.capacity_kw.max()) * 3
+
+    allocation = allocate_flexibility(catalog, requested_kw)
+    assert allocation.covered and len(allocation.offers) >= 3
+    assert allocation.to_dict()["covered_kw"] >= requested_kw
+    assert allocate_flexibility(DerCatalog([], [], np.empty(0), np.empty(0)), 50.0).offers == []
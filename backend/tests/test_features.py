@@ -0,0 +1,105 @@
+# tests/test_features.py
+"""
+Test suite for feature extraction.
+The vectorized extractor must reproduce the row-by-row reference exactly.
+"""
+import numpy as np
+from datetime import datetime
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.simulator import GridSimulator
+from app.core.features import prepare_features, n_features, FeatureBuffer, RollingFeatureState
+
+START = datetime(2025, 11, 24, 0, 0)
+
+# ============================================================================
+# REFERENCE (row-by-row window slicing)
+# ============================================================================
+
+def reference_prepare_features(df, lag_window):
+    X, y = [], []
+    for i in range(lag_window, len(df)):
+        window = df.iloc[i - lag_window:i]
+        loads = window['load_kw'].values
+        temps = window['temperature'].values
+        rms = np.sqrt(np.mean(loads ** 2))
+        peak = np.max(loads)
+        kurtosis_proxy = peak / np.mean(loads) if np.mean(loads) > 0 else 0
+        is_workday = 1 if df.iloc[i]['is_workday'] else 0
+        X.append(np.concatenate([loads, temps, [rms, peak, kurtosis_proxy, is_workday]]))
+        y.append(df.iloc[i]['risk_label'])
+    return np.array(X), np.array(y)
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_prepare_features_bit_identical_to_reference():
+    """Same matrix, bit for bit, for the default and a wider window."""
+    df = GridSimulator().generate_history(days=3, seed=5, start_time=START)
+
+    for lag_window in (4, 12):
+        X, y = prepare_features(df, lag_window=lag_window)
+        X_ref, y_ref = reference_prepare_features(df, lag_window)
+
+        assert X.shape == (len(df) - lag_window, n_features(lag_window))
+        assert np.array_equal(X, X_ref)
+        assert np.array_equal(y, y_ref)
+
+
+def test_prepare_features_short_frame():
+    """Fewer rows than the window -> empty but well-shaped output."""
+    df = GridSimulator().generate_history(days=1, seed=5, start_time=START).head(3)
+    X, y = prepare_features(df)
+
+    assert X.shape == (0, n_features())
+    assert y.shape == (0,)
+
+
+def test_feature_buffer_matches_training_rows():
+    """Online buffer path reproduces the trainer's rows and reuses its output array."""
+    df = GridSimulator().generate_history(days=1, seed=8, start_time=START)
+    X, _ = prepare_features(df)
+    loads = df['load_kw'].to_numpy()
+    temps = df['temperature'].to_numpy()
+    workday = df['is_workday'].to_numpy()
+
+    buffer = FeatureBuffer()
+    out_id = id(buffer.out)
+    for i in (0, 17, len(X) - 1):
+        buffer.loads[0] = loads[i:i + 4]
+        buffer.temps[0] = temps[i:i + 4]
+        vector = buffer.compute(workday[i + 4])
+        assert np.array_equal(vector[0], X[i])
+    assert id(vector) == out_id
+
+
+def test_rolling_state_tracks_sliding_window():
+    """O(1) rolling state agrees with the batch kernel at every step."""
+    df = GridSimulator().generate_history(days=2, seed=21, start_time=START)
+    loads = df['load_kw'].to_numpy()
+    temps = df['temperature'].to_numpy()
+    workday = df['is_workday'].to_numpy()
+
+    state = RollingFeatureState(lag_window=4)
+    state.RESYNC_EVERY = 50
+    buffer = FeatureBuffer()
+    row = np.empty(n_features())
+    for i in range(len(df)):
+        ready = state.push(loads[i], temps[i], workday[i])
+        assert ready == (i >= 3)
+        if not ready:
+            continue
+        buffer.loads[0] = loads[i - 3:i + 1]
+        buffer.temps[0] = temps[i - 3:i + 1]
+        expected = buffer.compute(1 if workday[i] else 0)[0]
+        state.write_features(row)
+        # Lags and peak are exact; running aggregates agree to float precision
+        assert np.array_equal(row[:8], expected[:8])
+        assert row[9] == expected[9]
+        assert np.allclose(row, expected, rtol=1e-12, atol=0)
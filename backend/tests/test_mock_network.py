@@ -0,0 +1,44 @@
+# tests/test_mock_network.py
+"""
+Test suite for the in-process mock sandbox/ONIX and the orchestration load driver.
+"""
+import asyncio
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from benchmarks.load_flows import run_level
+from benchmarks.mock_network import MockNetworkConfig
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_concurrent_flows_complete_against_mock_network():
+    """Every flow is confirmed; the report carries throughput and per-stage latency."""
+    config = MockNetworkConfig(delay_ms=5, jitter_ms=2, catalog_size=5, seed=3)
+    result = asyncio.run(run_level(concurrency=10, flows=20, network_config=config))
+
+    assert result["completed"] == 20 and result["failed"] == 0
+    assert result["flows_per_s"] > 0
+    assert result["stages"]["end_to_end"]["count"] == 20
+    assert result["stages"]["on_search_wait"]["p50_ms"] >= 3  # At least the callback delay
+    providers = result["stages"]["select"]["count"] // 20
+    assert providers >= 2  # 80 kW never fits one 10-60 kW offer
+    # DISCOVER + SELECT/INIT/CONFIRM per provider, each answered by one callback
+    assert result["network"]["requests"] == result["network"]["callbacks"] == 20 * (1 + 3 * providers)
+
+
+def test_failures_nack_fast_and_drops_use_callback_timeout(monkeypatch):
+    """NACKs fail the DISCOVER at once; dropped callbacks give up after BECKN_CALLBACK_TIMEOUT_S."""
+    nack = asyncio.run(run_level(4, 4, MockNetworkConfig(failure_rate=1.0, failure_mode="nack", seed=1)))
+    assert nack["failed"] == 4 and nack["network"]["nacked"] == 4
+    assert nack["stages"]["discover"]["failures"] == 4
+
+    monkeypatch.setattr(settings, "beckn_callback_timeout_s", 0.2)
+    drop = asyncio.run(run_level(4, 4, MockNetworkConfig(failure_rate=1.0, failure_mode="drop", seed=1)))
+    assert drop["failed"] == 4 and drop["errors"] == {"ON_SEARCH timeout": 4}
+    assert drop["wall_s"] < 2.0
@@ -0,0 +1,109 @@
+# tests/test_orchestrator.py
+"""
+Test suite for the concurrent orchestration engine.
+"""
+import asyncio
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.orchestrator import OrchestrationEngine
+
+START = datetime(2025, 11, 24, 17, 0)
+END = START + timedelta(hours=1)
+
+class FakeRunner:
+    """Stands in for run_agent: records start order and peak concurrency."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.started = []
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, feeder_id, risk_level, flexibility_kw, window_start, window_end):
+        self.started.append(feeder_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if feeder_id == "BROKEN":
+            raise RuntimeError("sandbox down")
+        if feeder_id == "TIMEOUT":
+            return {"error": "ON_SEARCH timeout", "success": False, "feeder_id": feeder_id}
+        return {"success": True, "feeder_id": feeder_id}
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_bounded_pool_runs_critical_first():
+    """Workers never exceed the pool size and higher risk levels start first."""
+    async def scenario():
+        runner = FakeRunner()
+        engine = OrchestrationEngine(max_workers=1, runner=runner)
+        await engine.start()
+        futures = [
+            engine.submit("W1", 1, 10.0, START, END),
+            engine.submit("N1", 0, 10.0, START, END),
+            engine.submit("C1", 2, 10.0, START, END),
+            engine.submit("C2", 2, 10.0, START, END),
+        ]
+        assert engine.stats()["queue_depth"] == 4
+        results = await asyncio.gather(*futures)
+        await engine.stop()
+
+        assert runner.started == ["C1", "C2", "W1", "N1"]
+        assert [r["feeder_id"] for r in results] == ["W1", "N1", "C1", "C2"]
+        assert runner.peak == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_and_deduplication():
+    """Same feeder + window shares one flow; distinct feeders run in parallel; error results aren't completions."""
+    async def scenario():
+        runner = FakeRunner(delay=0.05)
+        engine = OrchestrationEngine(max_workers=4, runner=runner)
+        first = engine.submit("F1", 2, 50.0, START, END)
+        duplicate = engine.submit("F1", 2, 50.0, START, END)
+        other_window = engine.submit("F1", 2, 50.0, END, END + timedelta(hours=1))
+        others = [engine.submit(f"F{i}", 2, 50.0, START, END) for i in range(2, 8)]
+        timeout = engine.submit("TIMEOUT", 2, 50.0, START, END)
+
+        assert duplicate is first
+        await asyncio.sleep(0.01)
+        stats = engine.stats()
+        assert stats["in_flight"] == 4 and stats["queue_depth"] == 5
+
+        await asyncio.gather(first, other_window, *others)
+        assert (await timeout)["success"] is False
+        stats = engine.stats()
+        await engine.stop()
+
+        assert runner.started.count("F1") == 2
+        assert runner.peak == 4
+        assert stats["deduplicated"] == 1
+        assert stats["completed"] == 8 and stats["in_flight"] == 0
+        assert stats["unsuccessful"] == 1 and stats["failed"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_flow_is_reported_and_released():
+    """A failing flow surfaces its exception and can be resubmitted."""
+    async def scenario():
+        engine = OrchestrationEngine(max_workers=2, runner=FakeRunner())
+        try:
+            await engine.run("BROKEN", 2, 10.0, START, END)
+            assert False, "expected failure"
+        except RuntimeError:
+            pass
+        assert engine.stats()["failed"] == 1
+        assert engine.submit("BROKEN", 2, 10.0, START, END) is not None
+        await engine.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,179 @@
+# tests/test_simulator.py
+"""
+Test suite for the grid simulator.
+Checks shape, reproducibility and label consistency of generated data.
+"""
+import numpy as np
+from datetime import datetime
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.simulator import GridSimulator
+from app.core.fleet import FeederFleet, simulate_fleet_history
+
+START = datetime(2025, 11, 24, 0, 0)
+
+# ============================================================================
+# GENERATE HISTORY
+# ============================================================================
+
+def test_generate_history_shape_and_columns():
+    """One row per interval with the FeederReading columns."""
+    df = GridSimulator().generate_history(days=2, interval_mins=15, seed=1, start_time=START)
+
+    assert len(df) == 2 * 24 * 4
+    assert list(df.columns) == ["timestamp", "load_kw", "temperature", "is_workday", "risk_label"]
+    assert df["timestamp"].iloc[1] - df["timestamp"].iloc[0] == np.timedelta64(15, "m")
+    assert set(df["risk_label"].unique()) <= {0, 1, 2}
+
+
+def test_generate_history_reproducible_with_seed():
+    """Same seed and start time -> identical dataset."""
+    sim = GridSimulator()
+    df_a = sim.generate_history(days=3, seed=42, start_time=START)
+    df_b = sim.generate_history(days=3, seed=42, start_time=START)
+    df_c = sim.generate_history(days=3, seed=43, start_time=START)
+
+    assert df_a.equals(df_b)
+    assert not df_a.equals(df_c)
+
+
+def test_generate_history_labels_follow_thresholds():
+    """Ramp-up events exist and every label agrees with the load thresholds."""
+    sim = GridSimulator()
+    df = sim.generate_history(days=30, seed=7, start_time=START)
+    load = df["load_kw"].to_numpy()
+    risk = df["risk_label"].to_numpy()
+
+    warning_kw = sim.max_capacity_kw * sim.warning_threshold
+    critical_kw = sim.max_capacity_kw * sim.critical_threshold
+
+    assert (risk == 2).any() and (risk == 1).any()
+    assert np.all(load[risk == 2] >= critical_kw - 0.01)
+    assert np.all((load[risk == 1] >= warning_kw - 0.01) & (load[risk == 1] < critical_kw + 0.01))
+    assert np.all(load[risk == 0] < warning_kw + 0.01)
+
+
+def scan_ramp_starts(limit, gaps, durations):
+    """The original interval scan, with each event's geometric wait taken from `gaps`."""
+    starts, i = [], 0
+    for gap, duration in zip(gaps, durations):
+        i += gap - 1          # Intervals scanned without starting an event
+        if i >= limit:
+            break
+        starts.append(i)
+        i += duration         # Skip the event duration
+    return starts
+
+
+def original_ramp_starts(n, seed):
+    """The original per-interval loop (event starts only)."""
+    rng = np.random.RandomState(seed)
+    starts, i = [], 0
+    while i < n:
+        if rng.random_sample() < 0.05 and rng.choice(3, p=[0.4, 0.3, 0.3]) != 2:
+            starts.append(i)
+            i += rng.randint(3, 7)
+        else:
+            i += 1
+    return np.array(starts)
+
+
+def test_ramp_starts_match_sequential_scan():
+    """Vectorized starts equal the interval scan fed the same seeded draws."""
+    limit = 5000
+    starts, durations = GridSimulator._ramp_events(limit, np.random.default_rng(5))
+    rng = np.random.default_rng(5)
+    gaps = rng.geometric(0.05 * 0.7, size=limit // 3 + 1)
+    expected_durations = rng.integers(3, 7, size=limit // 3 + 1)
+
+    assert starts.tolist() == scan_ramp_starts(limit, gaps, expected_durations)
+    assert durations.tolist() == expected_durations[:len(starts)].tolist()
+
+
+def test_ramp_spacing_matches_original_loop():
+    """Mean start-to-start spacing agrees with the original loop (no extra interval per event)."""
+    n = 1_000_000
+    starts, _ = GridSimulator._ramp_events(n, np.random.default_rng(0))
+    original = original_ramp_starts(n, seed=0)
+
+    assert abs(np.diff(starts).mean() - np.diff(original).mean()) < 0.5
+
+
+# ============================================================================
+# BATCH READINGS
+# ============================================================================
+
+def test_get_readings_block_layout():
+    """(n_feeders, n_timestamps) block with one column per reading field."""
+    sim = GridSimulator()
+    timestamps = [START.replace(hour=h) for h in range(24)]
+    block = sim.get_readings(timestamps, ["F1", "F2", "F3"])
+
+    assert block.shape == (3, 24)
+    assert set(block.dtype.names) == {"timestamp", "load_kw", "temperature", "is_workday", "risk_label"}
+    assert np.all(block["timestamp"][2] == np.array(timestamps, dtype="datetime64[us]"))
+    # Independent noise per feeder
+    assert not np.array_equal(block["load_kw"][0], block["load_kw"][1])
+    # Labels follow the same thresholds as get_reading
+    assert np.all(block["load_kw"][block["risk_label"] == 2] >= sim.max_capacity_kw * sim.critical_threshold - 0.01)
+
+
+def test_get_readings_spike_mask():
+    """Spikes only appear where requested."""
+    sim = GridSimulator()
+    timestamps = [START.replace(hour=3)] * 2
+    block = sim.get_readings(timestamps, [f"F{i}" for i in range(2000)], inject_spikes=[False, True])
+
+    # 03:00 base load is far below the warning threshold without spikes
+    assert np.all(block["risk_label"][:, 0] == 0)
+    spiked = np.mean(block["risk_label"][:, 1] > 0)
+    assert 0.15 < spiked < 0.30
+
+
+# ============================================================================
+# FEEDER FLEET
+# ============================================================================
+
+def test_fleet_tick_uses_per_feeder_profiles():
+    """Each feeder is labelled against its own capacity and thresholds."""
+    fleet = FeederFleet(5000, seed=3, start_time=START)
+    fleet.tick()
+
+    assert fleet.load_kw.shape == (5000,) and fleet.risk_label.dtype == np.int8
+    assert fleet.current_time == START + fleet.interval
+    assert np.all(fleet.risk_label[fleet.load_kw >= fleet.critical_kw] == 2)
+    assert np.all(fleet.risk_label[fleet.load_kw < fleet.warning_kw] == 0)
+    # Capacities differ, so loads scale with them
+    assert np.corrcoef(fleet.max_capacity_kw, fleet.load_kw)[0, 1] > 0.5
+
+
+def test_fleet_profile_overrides_and_seed():
+    """Profile overrides broadcast to the fleet; same seed -> same trajectory."""
+    fleet_a = FeederFleet(100, seed=9, start_time=START, profiles={"max_capacity_kw": 1500.0})
+    fleet_b = FeederFleet(100, seed=9, start_time=START, profiles={"max_capacity_kw": 1500.0})
+    assert np.all(fleet_a.max_capacity_kw == 1500.0)
+
+    for _ in range(4):
+        fleet_a.tick()
+        fleet_b.tick()
+    assert np.array_equal(fleet_a.load_kw, fleet_b.load_kw)
+    assert np.array_equal(fleet_a.risk_label, fleet_b.risk_label)
+
+
+def test_sharded_history_independent_of_worker_count():
+    """Per-shard RNG streams -> same output for 1 or several workers."""
+    kwargs = dict(n_feeders=250, n_ticks=8, seed=11, start_time=START, shard_size=64)
+
+    with simulate_fleet_history(n_workers=1, **kwargs) as serial, \
+         simulate_fleet_history(n_workers=3, **kwargs) as parallel:
+        assert serial.load_kw.shape == (8, 250)
+        assert len(serial.timestamps) == 8 and serial.feeder_ids[-1] == "F250"
+        assert np.array_equal(serial.load_kw, parallel.load_kw)
+        assert np.array_equal(serial.temperature, parallel.temperature)
+        assert np.array_equal(serial.risk_label, parallel.risk_label)
+        # Shards draw from different streams
+        assert not np.array_equal(serial.load_kw[:, :64], serial.load_kw[:, 64:128])
@@ -0,0 +1,170 @@
+# tests/test_sqlite_store.py
+"""
+Test suite for the SQLite (WAL) transaction store backend.
+Two store instances on one file stand in for two uvicorn workers.
+"""
+from datetime import datetime, timedelta
+import asyncio
+import sqlite3
+import threading
+import sys
+import os
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.core.beckn_client as beckn_client_module
+from app.core.beckn_client import notify_status, wait_for_callback
+from app.core.sqlite_store import SqliteTransactionStore
+from app.models.beckn import BecknTransaction, BecknAction, TransactionStatus
+
+T0 = datetime(2025, 11, 24, 17, 0)
+
+def make_transaction(transaction_id: str, feeder_id: str = "F1", minutes: int = 0) -> BecknTransaction:
+    return BecknTransaction(
+        transaction_id=transaction_id,
+        message_id="msg-" + transaction_id,
+        feeder_id=feeder_id,
+        action=BecknAction.SEARCH,
+        created_at=T0 + timedelta(minutes=minutes)
+    )
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_writes_and_indexes(tmp_path):
+    """Same behaviour as the in-memory backend: indexed lookups, JSON fields, history."""
+    store = SqliteTransactionStore(str(tmp_path / "store.db"))
+    store.add(make_transaction("a", "F1", minutes=0))
+    store.add(make_transaction("c", "F2", minutes=10))
+    store.add(make_transaction("b", "F1", minutes=5))
+    store.set_allocations("a", [{"provider_id": "P1", "status": "PENDING", "obp_id": None}])
+    allocation = store.update_allocation("a", "P1", obp_id="OBP-P1", status="CONFIRMED")
+    store.set_obp_id("a", "OBP-A")
+    store.set_status("a", TransactionStatus.CONFIRMED)
+    store.update("a", quoted_price=12.5)
+    store.update_metrics("a", latency_attempt=80.0)
+    store.append_history("a", "DISCOVER -> sandbox")
+
+    assert allocation["status"] == "CONFIRMED"
+    assert store.update_allocation("a", "P9", status="FAILED") is None
+    transaction = store.by_obp_id("OBP-P1")
+    assert transaction.transaction_id == "a" and store.by_obp_id("OBP-A").transaction_id == "a"
+    assert transaction.quoted_price == 12.5 and transaction.metrics["latency_attempt"] == 80.0
+    assert transaction.history[0]["message"] == "DISCOVER -> sandbox"
+    assert [t.transaction_id for t in store.by_feeder("F1")] == ["a", "b"]
+    assert [t.transaction_id for t in store.recent(2)] == ["c", "b"]
+    assert store.count_by_status() == {"CONFIRMED": 1, "PENDING": 2}
+
+    entries, cursor = store.history_since(0)
+    assert [(t.transaction_id, e["message"]) for t, e in entries] == [("a", "DISCOVER -> sandbox")]
+    assert store.history_since(cursor) == ([], cursor)
+    store.flush()
+
+
+def test_batched_writes_commit_together(tmp_path):
+    """Writes share one transaction until the batch is committed; other workers then see all of them."""
+    path = str(tmp_path / "store.db")
+    writer = SqliteTransactionStore(path, commit_interval_s=60)  # Only flush() commits
+    reader = SqliteTransactionStore(path)
+    writer.add(make_transaction("t"))
+    for i in range(100):
+        writer.append_history("t", f"STATUS -> {i}")
+
+    assert writer.get("t") is not None and "t" not in reader  # Own writes visible before commit
+    writer.flush()
+    assert writer.commits == 1 and writer.writes == 101
+    assert len(reader["t"].history) == 100
+
+
+def test_callback_on_other_worker_wakes_waiter(tmp_path, monkeypatch):
+    """A status change committed by one worker resolves wait_for_callback() in another."""
+    path = str(tmp_path / "store.db")
+    waiting = SqliteTransactionStore(path)
+    waiting.add_change_listener(notify_status)
+    callback = SqliteTransactionStore(path)
+    monkeypatch.setattr(beckn_client_module, "transaction_store", waiting)
+    waiting.add(make_transaction("txn-x"))
+    waiting.set_allocations("txn-x", [{"provider_id": "P1", "status": "PENDING"}])
+    waiting.flush()
+
+    async def scenario():
+        await waiting.start()
+        try:
+            order = asyncio.create_task(wait_for_callback("txn-x", TransactionStatus.CONFIRMED, timeout_seconds=5))
+            provider = asyncio.create_task(wait_for_callback("txn-x", TransactionStatus.CONFIRMED, timeout_seconds=5, provider_id="P1"))
+            await asyncio.sleep(0.05)
+            assert not order.done()
+
+            # The ON_CONFIRM callback lands on the other worker
+            start = asyncio.get_running_loop().time()
+            callback.update_allocation("txn-x", "P1", status=TransactionStatus.CONFIRMED.value, obp_id="OBP-X")
+            callback.set_status("txn-x", TransactionStatus.CONFIRMED)
+            assert await provider and await order
+            assert asyncio.get_running_loop().time() - start < 1.0
+            assert waiting.by_obp_id("OBP-X").status == TransactionStatus.CONFIRMED
+            assert waiting.changes_received == 2
+        finally:
+            await waiting.stop()
+            callback.flush()
+
+    asyncio.run(scenario())
+
+
+def test_submit_waits_for_other_worker_off_the_loop(tmp_path):
+    """While another worker holds the write lock the loop keeps running; submit() resumes once committed."""
+    path = str(tmp_path / "store.db")
+    store = SqliteTransactionStore(path)
+    reader = SqliteTransactionStore(path)
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, other.execute, ("COMMIT",)).start()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        try:
+            await store.submit(store.add, make_transaction("t"))
+        finally:
+            task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 10   # The loop wasn't blocked by BEGIN IMMEDIATE
+    assert "t" in reader                   # Committed when submit() returned
+    assert store.flush(1.0) and store.commits == 1
+    store.close()
+    other.close()
+
+
+def test_failed_commit_is_retried_then_surfaced(tmp_path):
+    """A batch whose COMMIT keeps failing is rolled back and the submit() caller gets the error."""
+    path = str(tmp_path / "store.db")
+    store = SqliteTransactionStore(path)
+    # Deferred foreign key: the insert works, the COMMIT fails
+    store._conn.executescript("""
+        PRAGMA foreign_keys = ON;
+        CREATE TABLE parent (id TEXT PRIMARY KEY);
+        CREATE TABLE child (ref TEXT REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED);
+        CREATE TRIGGER bad_feeder AFTER INSERT ON transactions WHEN NEW.feeder_id = 'BAD'
+        BEGIN INSERT INTO child VALUES ('missing'); END;
+    """)
+
+    async def scenario():
+        with pytest.raises(sqlite3.IntegrityError):
+            await store.submit(store.add, make_transaction("bad", "BAD"))
+        await store.submit(store.add, make_transaction("ok"))
+
+    asyncio.run(scenario())
+    assert "bad" not in store and "ok" in store
+    assert store.failed_writes == 1 and "FOREIGN KEY" in store.last_error
+    store.close()
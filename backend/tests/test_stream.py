@@ -0,0 +1,71 @@
+# tests/test_stream.py
+"""
+Test suite for the SSE feeder stream (delta computation and fan-out).
+"""
+import asyncio
+import json
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.stream import FeederStream
+from app.core.telemetry import build_snapshot
+
+FEEDERS = [("F1", "Feeder 1"), ("F2", "Feeder 2")]
+
+def _parse(frame: bytes):
+    """Splits an SSE frame into (event, data)."""
+    lines = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_delta_contents():
+    """Every feeder gets a load point; only changed risk levels are listed."""
+    stream = FeederStream()
+    first = build_snapshot(FEEDERS, sequence=1)
+    second = build_snapshot(FEEDERS, sequence=2)
+
+    delta = stream.build_delta(first, second)
+    assert delta["sequence"] == 2
+    assert [p["id"] for p in delta["load_points"]] == ["F1", "F2"]
+    assert delta["load_points"][0]["load_kw"] == second.feeders[0]["load_kw"]
+
+    # No previous snapshot: everything counts as changed
+    assert len(stream.build_delta(None, second)["changed"]) == 2
+    # Identical snapshot: nothing changed
+    assert stream.build_delta(second, second)["changed"] == []
+
+
+def test_slow_subscriber_is_resynced():
+    """A full queue is replaced by one snapshot frame; other clients keep getting deltas."""
+    async def scenario():
+        stream = FeederStream(queue_size=2)
+        fast = stream.broadcaster.subscribe()
+        slow = stream.broadcaster.subscribe()
+
+        previous = None
+        for sequence in range(1, 4):
+            snapshot = build_snapshot(FEEDERS, sequence=sequence)
+            stream.on_snapshot(previous, snapshot)
+            previous = snapshot
+            # The fast client drains its queue every tick
+            event, data = _parse(fast.queue.get_nowait())
+            assert event == "delta" and data["sequence"] == sequence
+
+        assert slow.queue.qsize() == 1
+        event, data = _parse(slow.queue.get_nowait())
+        assert event == "snapshot"
+        assert data["sequence"] == 3
+        assert [row["id"] for row in data["feeders"]] == ["F1", "F2"]
+        assert slow.dropped == 2
+        assert stream.broadcaster.stats()["resyncs"] == 1
+
+        stream.broadcaster.unsubscribe(slow)
+        assert stream.broadcaster.stats()["subscribers"] == 1
+
+    asyncio.run(scenario())
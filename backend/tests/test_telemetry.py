@@ -0,0 +1,46 @@
+# tests/test_telemetry.py
+"""
+Test suite for the telemetry ticker and the /feeders endpoints it feeds.
+"""
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core.telemetry import telemetry_ticker, build_snapshot, HISTORY_POINTS, FORECAST_POINTS
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_build_snapshot_payloads():
+    """One snapshot holds both endpoint payloads for every feeder."""
+    snapshot = build_snapshot([("F1", "Feeder 1"), ("F7", "Feeder 7")], sequence=3)
+
+    assert snapshot.sequence == 3
+    assert [row["id"] for row in snapshot.feeders] == ["F1", "F7"]
+    state = snapshot.states["F7"]
+    assert len(state["recent_history"]) == HISTORY_POINTS
+    assert len(state["forecast_kw"]) == FORECAST_POINTS
+    assert state["current_load_kw"] == snapshot.feeders[1]["load_kw"]
+    assert state["predicted_risk"] in (None, 0, 1, 2)
+
+
+def test_endpoints_serve_published_snapshot():
+    """While the ticker runs, polls return the published snapshot unchanged."""
+    with TestClient(app) as client:
+        assert telemetry_ticker.running
+        snapshot = telemetry_ticker.snapshot
+
+        response = client.get("/feeders")
+        assert response.status_code == 200
+        assert response.content == snapshot.feeders_json
+        assert client.get("/feeders/F1/state").content == snapshot.states_json["F1"]
+
+        # Unknown feeders are not simulated on demand
+        assert client.get("/feeders/F99/state").status_code == 404
+
+    assert not telemetry_ticker.running
@@ -0,0 +1,131 @@
+# tests/test_tracing.py
+"""
+Test suite for per-transaction tracing and the /traces endpoints.
+"""
+import asyncio
+import httpx
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core import beckn_client as beckn_client_module
+from app.core.beckn_client import BecknClient
+from app.core.tracing import Tracer
+from tests.test_beckn_client import network_transport
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_spans_nest_and_ring_buffer_is_bounded():
+    """Spans nest per task, errors are marked, only the newest finished traces are kept."""
+    tracer = Tracer(capacity=2, max_active=3)
+
+    async def provider(trace_id: str, provider_id: str):
+        with tracer.span(trace_id, "provider_flow", provider_id=provider_id):
+            with tracer.span(trace_id, "send.select"):
+                await asyncio.sleep(0.01)
+
+    async def scenario():
+        with tracer.span("t1", "send.discover") as span:
+            span.set(http_status=200)
+        # Concurrent tasks each see their own parent span
+        await asyncio.gather(provider("t1", "P1"), provider("t1", "P2"))
+        with pytest.raises(RuntimeError):
+            with tracer.span("t1", "allocate"):
+                raise RuntimeError("boom")
+
+    asyncio.run(scenario())
+    trace = tracer.finish("t1", status="ok", obp_id="OBP-1")
+    spans = {(s.name, s.attributes.get("provider_id")): s for s in trace.spans}
+    for provider_id in ("P1", "P2"):
+        parent = spans[("provider_flow", provider_id)]
+        child = next(s for s in trace.spans if s.name == "send.select" and s.parent_id == parent.span_id)
+        assert child.duration_ms >= 10 and parent.duration_ms >= child.duration_ms
+    assert spans[("send.discover", None)].parent_id is None
+    assert spans[("allocate", None)].status == "error"
+    assert trace.to_dict()["attributes"] == {"obp_id": "OBP-1"}
+
+    with tracer.span(None, "untraced") as span:
+        assert span is None
+    for i in range(2, 6):
+        with tracer.span(f"t{i}", "send.discover"):
+            pass
+    # t2 was closed as abandoned once more than 3 traces were open; capacity 2 kept the newest
+    assert [t.trace_id for t in tracer.recent()] == ["t2", "t1"]
+    assert tracer.get("t2").status == "abandoned"
+    assert tracer.stats() == {"active": 3, "completed": 2, "capacity": 2}
+
+
+def test_run_agent_trace_endpoints(monkeypatch):
+    """A full flow yields one trace with send, wait and callback spans, served by /traces."""
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as webhook:
+            client = BecknClient(transport=network_transport(webhook))
+            monkeypatch.setattr(beckn_client_module, "beckn_client", client)
+            now = datetime.utcnow()
+            result = await beckn_client_module.run_agent("F1", 2, 80.0, now, now + timedelta(hours=1))
+            await client.close()
+        return result
+
+    result = asyncio.run(scenario())
+    transaction_id = result["transaction_id"]
+
+    with TestClient(app) as http:
+        trace = http.get(f"/traces/{transaction_id}").json()
+        recent = http.get("/traces", params={"limit": 1000}).json()
+        export = http.get("/traces/export")
+        missing = http.get("/traces/no-such-transaction")
+
+    assert trace["status"] == "ok" and trace["attributes"]["feeder_id"] == "F1"
+    names = [span["name"] for span in trace["spans"]]
+    assert names.count("send.select") == 2 and names.count("callback.on_confirm") == 2
+    assert {"send.discover", "wait.search_received", "allocate", "provider_flow"} <= set(names)
+    sends = [span for span in trace["spans"] if span["name"].startswith("send.")]
+    assert all(span["attributes"]["payload_bytes"] > 0 and span["attributes"]["http_status"] == 200 for span in sends)
+    confirms = [span for span in trace["spans"] if span["name"] == "callback.on_confirm"]
+    assert sorted(span["attributes"]["provider_id"] for span in confirms) == ["large", "small"]
+
+    assert any(t["trace_id"] == transaction_id for t in recent["traces"])
+    assert "attachment" in export.headers["content-disposition"]
+    assert any(t["trace_id"] == transaction_id for t in export.json())
+    assert missing.status_code == 404
+
+
+def test_trace_finishes_with_error_when_flow_raises(monkeypatch):
+    """A store failure mid-flow still closes the trace, as "error", into the completed ring."""
+    from app.core.tracing import tracer
+    store = beckn_client_module.transaction_store
+    submit = store.submit
+    failed = []
+
+    async def failing_submit(fn, *args, **kwargs):
+        if fn == store.append_history:
+            failed.append(args[0])
+            raise RuntimeError("commit failed")
+        return await submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(store, "submit", failing_submit)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as webhook:
+            client = BecknClient(transport=network_transport(webhook))
+            monkeypatch.setattr(beckn_client_module, "beckn_client", client)
+            now = datetime.utcnow()
+            try:
+                with pytest.raises(RuntimeError):
+                    await beckn_client_module.run_agent("F1", 2, 80.0, now, now + timedelta(hours=1))
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+    transaction_id = failed[0]
+    assert transaction_id not in tracer.active
+    trace = next(t for t in tracer.completed if t.trace_id == transaction_id)
+    assert trace.status == "error" and "commit failed" in trace.attributes["error"]
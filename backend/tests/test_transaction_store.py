@@ -0,0 +1,177 @@
+# tests/test_transaction_store.py
+"""
+Test suite for the indexed transaction store and the audit endpoints using it.
+"""
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core.beckn_client import transaction_store
+from app.core.transaction_store import TransactionStore
+from app.core.audit_log import AuditJournal
+from app.models.beckn import BecknTransaction, BecknAction, TransactionStatus
+
+T0 = datetime(2025, 11, 24, 17, 0)
+
+def make_transaction(transaction_id: str, feeder_id: str = "F1", minutes: int = 0) -> BecknTransaction:
+    return BecknTransaction(
+        transaction_id=transaction_id,
+        message_id="msg-" + transaction_id,
+        feeder_id=feeder_id,
+        action=BecknAction.SEARCH,
+        created_at=T0 + timedelta(minutes=minutes)
+    )
+
+# ============================================================================
+# INDEXES
+# ============================================================================
+
+def test_indexes_follow_writes():
+    """obp_id / feeder / status / created_at indexes stay current through store writes."""
+    store = TransactionStore()
+    store.add(make_transaction("a", "F1", minutes=0))
+    store.add(make_transaction("c", "F2", minutes=10))
+    store.add(make_transaction("b", "F1", minutes=5))  # Out of order
+
+    assert [t.transaction_id for t in store.recent(10)] == ["c", "b", "a"]
+    assert [t.transaction_id for t in store.recent(2)] == ["c", "b"]
+    assert [t.transaction_id for t in store.by_feeder("F1")] == ["a", "b"]
+
+    store.set_status("a", TransactionStatus.CONFIRMED)
+    store.set_obp_id("a", "OBP-1")
+    assert [t.transaction_id for t in store.by_status(TransactionStatus.PENDING)] == ["b", "c"]
+    assert store.by_status(TransactionStatus.CONFIRMED)[0].status == TransactionStatus.CONFIRMED
+    assert store.by_obp_id("OBP-1").transaction_id == "a"
+
+    # Per-provider OBP IDs resolve to the owning transaction
+    store.set_allocations("b", [{"provider_id": "P1", "item_id": "i1", "status": "PENDING", "obp_id": None}])
+    store.update_allocation("b", "P1", obp_id="OBP-P1", status="CONFIRMED")
+    assert store.by_obp_id("OBP-P1").transaction_id == "b"
+
+    store.remove("a")
+    assert store.by_obp_id("OBP-1") is None
+    assert store.by_status(TransactionStatus.CONFIRMED) == []
+    assert [t.transaction_id for t in store.recent(10)] == ["c", "b"]
+    assert store.count_by_status() == {"PENDING": 2}
+
+
+def test_history_since_returns_only_new_entries():
+    store = TransactionStore()
+    store.add(make_transaction("a"))
+    store.add(make_transaction("b"))
+    store.append_history("a", "first")
+    entries, cursor = store.history_since(0)
+    assert [e["message"] for _, e in entries] == ["first"]
+
+    store.append_history("b", "second")
+    store.append_history("a", "third", latency_ms=12.5)
+    entries, cursor = store.history_since(cursor)
+    assert [(t.transaction_id, e["message"]) for t, e in entries] == [("b", "second"), ("a", "third")]
+    assert entries[1][1]["latency_ms"] == 12.5
+    assert store.history_since(cursor) == ([], cursor)
+
+# ============================================================================
+# EVICTION
+# ============================================================================
+
+def test_lru_evicts_only_finished_transactions(tmp_path):
+    """Over the entry budget, the least recently used finished transactions are spilled and dropped."""
+    journal = AuditJournal(str(tmp_path), fsync=False)
+    store = TransactionStore(max_entries=3, spill=journal.archive)
+    for i in range(3):
+        store.add(make_transaction(f"t{i}", minutes=i))
+    store.set_status("t0", TransactionStatus.CONFIRMED)
+    store.set_obp_id("t0", "OBP-T0")
+    store.set_status("t1", TransactionStatus.CONFIRMED)
+    store.get("t0")  # t0 is now more recently used than t1
+
+    store.add(make_transaction("t3", minutes=3))
+    assert "t1" not in store and "t0" in store
+    assert store.stats()["evicted_lru"] == 1
+
+    # Pending transactions are never evicted, even over budget
+    store.add(make_transaction("t4", minutes=4))
+    store.add(make_transaction("t5", minutes=5))
+    assert "t0" not in store
+    assert len(store) == 4 and store.stats()["evicted_lru"] == 2
+
+    # Evicted transactions stay readable from the archive
+    assert journal.lookup("OBP-T0")["transaction_id"] == "t0"
+    assert journal.lookup("t1")["status"] == "CONFIRMED"
+    journal.close()
+    reopened = AuditJournal(str(tmp_path))
+    list(reopened.replay())  # Index rebuilt from the segments
+    assert reopened.lookup("OBP-T0")["transaction_id"] == "t0"
+
+
+def test_byte_budget_and_running_allocations(tmp_path):
+    """Large catalogs count against the byte budget; orders with running provider flows stay."""
+    store = TransactionStore(max_bytes=50_000, spill=AuditJournal(str(tmp_path), fsync=False).archive)
+    catalog = {"message": {"catalog": {"providers": [{"id": f"P{i}", "items": []} for i in range(1000)]}}}
+    store.add(make_transaction("big"))
+    store.set_response("big", catalog)
+    assert store.resident_bytes > 20_000
+    store.set_allocations("big", [
+        {"provider_id": "P1", "status": "CONFIRMED"},
+        {"provider_id": "P2", "status": "SELECT_RECEIVED"},
+    ])
+    store.set_status("big", TransactionStatus.CONFIRMED)
+
+    store.add(make_transaction("big2"))
+    store.set_response("big2", catalog)
+    assert "big" in store  # P2 still in flight
+
+    store.update_allocation("big", "P2", status="CONFIRMED")
+    store.set_status("big", TransactionStatus.CONFIRMED)
+    assert "big" not in store
+    assert store.resident_bytes <= 50_000
+
+
+def test_ttl_eviction():
+    """Transactions past expires_at are evicted even if unfinished."""
+    store = TransactionStore()
+    expired = make_transaction("old")
+    expired.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    fresh = make_transaction("new")
+    fresh.expires_at = datetime.utcnow() + timedelta(minutes=10)
+    store.add(fresh)
+    store.add(expired)
+    assert "old" not in store and "new" in store
+    assert store.stats()["evicted_ttl"] == 1
+
+
+def test_clear_keeps_configuration(tmp_path):
+    """clear() drops the data but keeps the budgets and journal settings."""
+    journal = AuditJournal(str(tmp_path), fsync=False)
+    store = TransactionStore(max_entries=3, journal=journal, compact_journal=False)
+    store.add(make_transaction("t0"))
+    store.clear()
+    assert "t0" not in store
+    assert store.max_entries == 3 and store.journal is journal and store.compact_journal is False
+    journal.close()
+
+# ============================================================================
+# AUDIT ENDPOINTS
+# ============================================================================
+
+def test_audit_endpoints_use_indexes():
+    transaction_store.clear()
+    for i in range(5):
+        transaction_store.add(make_transaction(f"audit-{i}", minutes=i))
+        transaction_store.append_history(f"audit-{i}", f"DISCOVER -> {i}")
+    transaction_store.set_obp_id("audit-2", "OBP-AUDIT-2")
+
+    client = TestClient(app)
+    recent = client.get("/audit/recent", params={"limit": 3}).json()
+    assert [log["entries"][0]["message"] for log in recent] == ["DISCOVER -> 4", "DISCOVER -> 3", "DISCOVER -> 2"]
+    assert recent[2]["obp_id"] == "OBP-AUDIT-2"
+
+    log = client.get("/audit/OBP-AUDIT-2").json()
+    assert log["obp_id"] == "OBP-AUDIT-2" and log["entries"][0]["message"] == "DISCOVER -> 2"
+    assert client.get("/audit/OBP-audit-1").json()["entries"][0]["message"] == "DISCOVER -> 1"
+    transaction_store.clear()
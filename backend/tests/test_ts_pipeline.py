@@ -0,0 +1,125 @@
+# tests/test_ts_pipeline.py
+"""
+Test suite for the AI pipeline (TSPipeline).
+Uses the trained artifacts in data/models.
+"""
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.simulator import GridSimulator
+from app.core.ts_pipeline import TSPipeline
+from app.core.native_mlp import NativeMLP
+from app.core.features import prepare_features
+from app.models.feeder import FeederReading
+
+START = datetime(2025, 11, 24, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    brain = TSPipeline()
+    if brain.model is None:
+        pytest.skip("Model artifacts not available")
+    return brain
+
+
+@pytest.fixture(scope="module")
+def readings():
+    """Two days of simulated readings with ramp-up events."""
+    df = GridSimulator().generate_history(days=2, seed=4, start_time=START)
+    return [FeederReading(**row) for row in df.to_dict("records")]
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_push_reading_matches_predict_risk(pipeline, readings):
+    """Streaming updates give the same risk as re-sending the full window."""
+    pipeline.reset_feeder("F-STREAM")
+    for i, reading in enumerate(readings):
+        streamed = pipeline.push_reading("F-STREAM", reading)
+        if i < 3:
+            assert streamed == 0
+        else:
+            assert streamed == pipeline.predict_risk(readings[i - 3:i + 1], feeder_id="F-WINDOW")
+
+
+def test_feeder_state_is_bounded(pipeline, readings, monkeypatch):
+    """Per-feeder windows and buffers are kept for the most recently used feeders only."""
+    monkeypatch.setattr(pipeline, "max_feeders", 3)
+    for feeder in range(10):
+        for reading in readings[:4]:
+            pipeline.push_reading(f"F-LRU-{feeder}", reading)
+    pipeline.push_reading("F-LRU-7", readings[4])  # Most recent again
+
+    assert list(pipeline._states) == ["F-LRU-8", "F-LRU-9", "F-LRU-7"]
+    assert len(pipeline._buffers) == 3
+    # An evicted feeder starts a fresh window
+    assert [pipeline.push_reading("F-LRU-0", reading) for reading in readings[:3]] == [0, 0, 0]
+
+
+def test_critical_ramp_is_detected(pipeline):
+    """A steep ramp towards capacity is classified as Critical."""
+    window = [
+        FeederReading(
+            timestamp=START + timedelta(minutes=15 * i),
+            load_kw=800.0 + i * 233,
+            temperature=12.0,
+            is_workday=True,
+            risk_label=0
+        )
+        for i in range(4)
+    ]
+    assert pipeline.predict_risk(window) == 2
+
+
+def test_predict_risk_batch_matches_single_calls(pipeline, readings):
+    """One batched call scores every window like predict_risk does."""
+    loads = np.array([r.load_kw for r in readings])
+    temps = np.array([r.temperature for r in readings])
+    n_windows = len(readings) - 5
+    # Windows wider than 4: only the last 4 columns count
+    load_block = np.stack([loads[i:i + 6] for i in range(n_windows)])
+    temp_block = np.stack([temps[i:i + 6] for i in range(n_windows)])
+    workday = np.array([readings[i + 5].is_workday for i in range(n_windows)])
+
+    batch = pipeline.predict_risk_batch(load_block, temp_block, workday)
+
+    assert batch.shape == (n_windows,)
+    expected = [pipeline.predict_risk(readings[i + 2:i + 6]) for i in range(n_windows)]
+    assert batch.tolist() == expected
+    assert set(batch.tolist()) <= {0, 1, 2}
+
+
+def test_predict_risk_batch_is_thread_safe(pipeline, readings):
+    """Concurrent batches (ticker thread + request threads) don't share feature rows."""
+    rng = np.random.default_rng(5)
+    blocks = [
+        (rng.uniform(200, 2000, size=(n, 4)), rng.uniform(0, 35, size=(n, 4)), rng.random(n) < 0.5)
+        for n in (3000, 5000, 2000, 4000) * 2
+    ]
+    expected = [pipeline.predict_risk_batch(*block).tolist() for block in blocks]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _ in range(10):
+            got = list(pool.map(lambda block: pipeline.predict_risk_batch(*block).tolist(), blocks))
+            assert got == expected
+
+
+def test_native_mlp_parity_with_sklearn(pipeline):
+    """Folded float32 forward pass predicts exactly what model.predict does."""
+    df = GridSimulator().generate_history(days=30, seed=12, start_time=START)
+    X, _ = prepare_features(df)
+    native = NativeMLP.from_sklearn(pipeline.model, pipeline.scaler)
+
+    expected = pipeline.model.predict(pipeline.scaler.transform(X))
+
+    assert np.array_equal(native.predict(X), expected)
+    assert [native.predict_one(x) for x in X[:500]] == expected[:500].tolist()